@@ -0,0 +1,38 @@
+CREATE TABLE exogenous_features (
+  `asset` VARCHAR(16) NOT NULL COMMENT '外生资产前缀，如oil, gld',
+  `symbol` VARCHAR(32) NOT NULL COMMENT '数字货币交易对，如SUIUSDT',
+  `interval` VARCHAR(16) NOT NULL COMMENT 'K线周期，如1h, 4h, 1d',
+  `open_time` DATETIME NOT NULL COMMENT 'K线开始时间',
+  `open` DOUBLE,
+  `high` DOUBLE,
+  `low` DOUBLE,
+  `close` DOUBLE,
+  `volume` DOUBLE,
+  `body_ratio` DOUBLE,
+  `RSI6` DOUBLE,
+  `RSI12` DOUBLE,
+  `RSI24` DOUBLE,
+  `MA_5` DOUBLE,
+  `MA_10` DOUBLE,
+  `MA_20` DOUBLE,
+  `Bollinger_Upper` DOUBLE,
+  `Bollinger_Lower` DOUBLE,
+  `ROC_5` DOUBLE,
+  `Momentum_10` DOUBLE,
+  `ATR` DOUBLE,
+  `Volume_MA_5` DOUBLE,
+  `volume_spike` BOOLEAN,
+  `price_position` DOUBLE,
+  `relative_position` DOUBLE,
+  `volatility_ratio` DOUBLE,
+  `price_volatility` DOUBLE,
+  `crypto_price_corr` DOUBLE,
+  `crypto_price_ratio` DOUBLE,
+  `crypto_returns_corr` DOUBLE,
+  `crypto_vol_ratio` DOUBLE,
+  `crypto_rsi_diff` DOUBLE,
+  `crypto_trend_consistency` TINYINT,
+  `market_state` VARCHAR(32),
+  PRIMARY KEY (`asset`, `symbol`, `interval`, `open_time`),
+  KEY idx_symbol_interval_time (`symbol`, `interval`, `open_time`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='外生资产（原油、黄金等）特征表，按需与complete_tech_indicators拼接';
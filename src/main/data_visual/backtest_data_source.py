@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.main.utils.sql_util import MySQLUtil
+
+# 回测只需要的列
+BACKTEST_COLUMNS = ['open_time', 'close', 'label']
+
+
+def iter_backtest_chunks(symbol, interval, start_date=None, end_date=None, columns=None, chunk_size=50000):
+    """
+    按 (open_time, id) 游标分块读取 complete_tech_indicators 中回测需要的列
+
+    参数：
+    - symbol / interval: 交易对和K线周期
+    - start_date / end_date: 时间范围（含两端），为None时不限制
+    - columns: 读取的列，默认 open_time, close, label
+    - chunk_size: 每次查询的行数
+
+    返回：
+    - 生成器，逐块产出按 (open_time, id) 升序的 DataFrame（只含 columns 中的列）
+    """
+    columns = list(columns or BACKTEST_COLUMNS)
+    if 'open_time' not in columns:
+        columns = ['open_time'] + columns
+    # 游标需要 id 作为同一 open_time 的次序键
+    select = columns if 'id' in columns else columns + ['id']
+    time_range = ('BETWEEN', pd.Timestamp(start_date or '1970-01-01').to_pydatetime(),
+                  pd.Timestamp(end_date or '2100-01-01').to_pydatetime())
+
+    last_key = None
+    while True:
+        conditions = {'symbol': ('=', symbol), '`interval`': ('=', interval), 'open_time': time_range}
+        # 游标分页：用上一块最后的 (open_time, id) 作为下界（行值比较），避免 OFFSET 越翻越慢，
+        # open_time 相同的记录也不会因跨块而丢失
+        if last_key is not None:
+            conditions['(`open_time`, `id`)'] = ('>', last_key)
+
+        chunk = MySQLUtil.fetch_dataframe('complete_tech_indicators', conditions=conditions,
+                                          columns=[f"`{c}`" for c in select], order_by='open_time, id',
+                                          limit=chunk_size)
+        if chunk.empty:
+            break
+        chunk['open_time'] = pd.to_datetime(chunk['open_time'])
+        last_key = (chunk['open_time'].iloc[-1].to_pydatetime(), int(chunk['id'].iloc[-1]))
+        yield chunk[columns]
+        if len(chunk) < chunk_size:
+            break
+
+
+def fetch_backtest_frame(symbol, interval, start_date=None, end_date=None, columns=None, chunk_size=50000):
+    """分块读取并拼接为一个 DataFrame（数值列转为 float）"""
+    chunks = list(iter_backtest_chunks(symbol, interval, start_date, end_date, columns, chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns or BACKTEST_COLUMNS))
+    df = pd.concat(chunks, ignore_index=True)
+    for column in df.columns:
+        if column != 'open_time':
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def _cache_path(cache_dir, symbol, interval):
+    return os.path.join(cache_dir, f"backtest_{symbol}_{interval}.npz")
+
+
+def load_backtest_data(symbol, interval, start_date=None, end_date=None, cache_dir=None,
+                       refresh=False, chunk_size=50000):
+    """
+    获取回测数据（open_time, close, label），支持本地列式缓存
+
+    缓存为 npz 文件（open_time 以 int64 纳秒存储），每次调用只从数据库增量拉取
+    缓存最后一条之后的新数据；refresh=True 时重建缓存。
+
+    参数：
+    - symbol / interval: 交易对和K线周期
+    - start_date / end_date: 返回数据的时间范围
+    - cache_dir: 缓存目录，为None时不使用缓存，直接按时间范围查询数据库
+
+    返回：
+    - 含 open_time, close, label 的 DataFrame，可直接传给 calculate_daily_pnl
+    """
+    if cache_dir is None:
+        return fetch_backtest_frame(symbol, interval, start_date, end_date, chunk_size=chunk_size)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, symbol, interval)
+    arrays = {'open_time': np.empty(0, dtype=np.int64), 'close': np.empty(0), 'label': np.empty(0)}
+    if os.path.exists(path) and not refresh:
+        with np.load(path) as cached:
+            arrays = {name: cached[name] for name in BACKTEST_COLUMNS}
+
+    fetch_from = None
+    if len(arrays['open_time']):
+        fetch_from = pd.Timestamp(int(arrays['open_time'][-1])) + pd.Timedelta(microseconds=1)
+    new_rows = fetch_backtest_frame(symbol, interval, fetch_from, chunk_size=chunk_size)
+    if not new_rows.empty:
+        arrays = {
+            'open_time': np.concatenate([arrays['open_time'],
+                                         new_rows['open_time'].to_numpy(dtype='datetime64[ns]').astype(np.int64)]),
+            'close': np.concatenate([arrays['close'], new_rows['close'].to_numpy(dtype=float)]),
+            'label': np.concatenate([arrays['label'], new_rows['label'].to_numpy(dtype=float)]),
+        }
+        np.savez(path, **arrays)
+        print(f"✅ 回测缓存已更新: {path}，新增 {len(new_rows)} 条，共 {len(arrays['close'])} 条")
+
+    open_time = arrays['open_time']
+    lo = np.searchsorted(open_time, pd.Timestamp(start_date).value, side='left') if start_date else 0
+    hi = np.searchsorted(open_time, pd.Timestamp(end_date).value, side='right') if end_date else len(open_time)
+    return pd.DataFrame({
+        'open_time': pd.to_datetime(open_time[lo:hi]),
+        'close': arrays['close'][lo:hi],
+        'label': arrays['label'][lo:hi],
+    })
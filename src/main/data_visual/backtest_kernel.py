@@ -0,0 +1,123 @@
+import numpy as np
+
+# numba 为可选依赖：安装后自动对回测内核做 JIT 编译，未安装时退回纯 Python 循环
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _position_loop(close, label, initial_btc, price_threshold, asset, daily_return,
+                   cumulative_return, cumulative_return_rate):
+    """
+    持仓状态机（与 calculate_daily_pnl 原逐行逻辑一致）
+
+    label规则：
+    0 - 持有，不操作
+    1 - 买入（用所有USDT买BTC；已有持仓且价格较买入价下跌超过阈值时补仓）
+    2 - 卖出（卖出所有BTC换USDT）
+
+    结果写入预分配的输出数组，返回成交次数
+    """
+    btc_qty = initial_btc
+    usdt_qty = 0.0
+    buy_price = 0.0
+    has_buy_price = False
+    trades = 0
+
+    initial_asset = initial_btc * close[0]
+    prev_asset = initial_asset
+    cum_return = 0.0
+
+    for i in range(len(close)):
+        price = close[i]
+        signal = label[i]
+
+        if signal == 1:
+            if usdt_qty > 0:
+                if btc_qty == 0:
+                    # 没有持仓，直接买入
+                    btc_qty += usdt_qty / price
+                    usdt_qty = 0.0
+                    buy_price = price
+                    has_buy_price = True
+                    trades += 1
+                elif has_buy_price:
+                    # 已有持仓，当前价格低于买入价超过阈值时补仓
+                    if (price - buy_price) / buy_price < -price_threshold:
+                        btc_qty += usdt_qty / price
+                        usdt_qty = 0.0
+                        buy_price = price
+                        trades += 1
+        elif signal == 2:
+            if btc_qty > 0:
+                usdt_qty += btc_qty * price
+                btc_qty = 0.0
+                has_buy_price = False
+                trades += 1
+
+        current_asset = btc_qty * price + usdt_qty
+        day_return = current_asset - prev_asset
+        cum_return += day_return
+
+        asset[i] = current_asset
+        daily_return[i] = day_return
+        cumulative_return[i] = cum_return
+        cumulative_return_rate[i] = cum_return / initial_asset
+
+        prev_asset = current_asset
+
+    return trades
+
+
+if NUMBA_AVAILABLE:
+    _position_kernel = njit(cache=True, nogil=True)(_position_loop)
+else:
+    _position_kernel = None
+
+
+def run_position_kernel(close, label, initial_btc=1.0, price_threshold=0.02, use_numba=True):
+    """
+    在连续数组上运行回测持仓状态机
+
+    参数：
+    - close: 收盘价数组（按时间升序）
+    - label: 信号数组（0持有 / 1买入 / 2卖出，NaN 视为持有）
+    - initial_btc: 初始持有的BTC数量
+    - price_threshold: 补仓的价格下跌阈值
+    - use_numba: numba 可用时是否使用 JIT 版本
+
+    返回：
+    - 包含 asset、daily_return、cumulative_return、cumulative_return_rate 数组及 trades 成交次数的字典
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    label = np.ascontiguousarray(label, dtype=np.float64)
+    if len(close) == 0:
+        raise ValueError("数据为空，无法回测。")
+    if len(label) != len(close):
+        raise ValueError("close 与 label 长度不一致。")
+
+    n = len(close)
+    asset = np.empty(n)
+    daily_return = np.empty(n)
+    cumulative_return = np.empty(n)
+    cumulative_return_rate = np.empty(n)
+
+    if use_numba and _position_kernel is not None:
+        trades = _position_kernel(close, label, float(initial_btc), float(price_threshold),
+                                  asset, daily_return, cumulative_return, cumulative_return_rate)
+    else:
+        # 纯 Python 回退：逐元素访问 list 比访问 ndarray 标量快得多，结果写回预分配数组
+        columns = [[0.0] * n for _ in range(4)]
+        trades = _position_loop(close.tolist(), label.tolist(), float(initial_btc), float(price_threshold),
+                                *columns)
+        asset[:], daily_return[:], cumulative_return[:], cumulative_return_rate[:] = columns
+
+    return {
+        'asset': asset,
+        'daily_return': daily_return,
+        'cumulative_return': cumulative_return,
+        'cumulative_return_rate': cumulative_return_rate,
+        'trades': int(trades),
+    }
@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.backtest_kernel import NUMBA_AVAILABLE
+
+if NUMBA_AVAILABLE:
+    from numba import njit
+
+# 默认回测配置
+DEFAULT_EVENT_BACKTEST_CONFIG = {
+    'initial_cash': 10000.0,        # 初始资金（USDT）
+    'fee_rate': 0.001,              # 手续费率（按成交额，双边收取）
+    'slippage_model': 'bps',        # 滑点模型: 'none' / 'bps'（固定基点） / 'atr'（ATR 比例）
+    'slippage_bps': 5.0,            # 'bps' 模型的滑点（万分之几）
+    'slippage_atr_mult': 0.05,      # 'atr' 模型的滑点 = ATR × 该系数
+    'fill_on': 'next_open',         # 成交价格: 'next_open'（下一根K线开盘） / 'close'（信号K线收盘）
+    'sizing': 'confidence',         # 仓位: 'confidence'（按置信度） / 'full'（全仓）
+    'max_position_fraction': 1.0,   # 单次开仓占可用资金的最大比例
+    'min_confidence': 0.0,          # 低于该置信度的买入信号忽略
+    'atr_stop_mult': 2.0,           # 止损 = 入场价 - ATR × 该系数，None 表示不设止损
+    'atr_take_profit_mult': None,   # 止盈 = 入场价 + ATR × 该系数，None 表示不设止盈
+    'close_at_end': True,           # 回测结束时是否按最后收盘价平掉持仓
+}
+
+SLIPPAGE_MODELS = {'none': 0, 'bps': 1, 'atr': 2}
+
+# 平仓原因
+EXIT_SIGNAL = 0
+EXIT_STOP_LOSS = 1
+EXIT_TAKE_PROFIT = 2
+EXIT_END = 3
+EXIT_REASONS = {EXIT_SIGNAL: '卖出信号', EXIT_STOP_LOSS: 'ATR止损', EXIT_TAKE_PROFIT: 'ATR止盈', EXIT_END: '回测结束'}
+
+# 成交记录字段（预分配为二维数组的列）
+TRADE_COLUMNS = ['entry_index', 'exit_index', 'entry_price', 'exit_price', 'quantity',
+                 'pnl', 'fees', 'exit_reason']
+
+
+def _slipped_price(price, atr, is_buy, slippage_model, slippage_bps, slippage_atr_mult):
+    """按滑点模型计算实际成交价（买入上滑、卖出下滑）"""
+    if slippage_model == 1:
+        slip = price * slippage_bps / 10000.0
+    elif slippage_model == 2:
+        slip = atr * slippage_atr_mult if atr == atr else 0.0
+    else:
+        slip = 0.0
+    return price + slip if is_buy else price - slip
+
+
+def _record_exit(trades, trade_count, exit_index, exit_price, qty, entry_index, entry_price,
+                 entry_fee, fee_rate, reason):
+    """写入一笔平仓记录，返回平仓后回笼的现金（已扣手续费）"""
+    exit_fee = qty * exit_price * fee_rate
+    trades[trade_count, 0] = entry_index
+    trades[trade_count, 1] = exit_index
+    trades[trade_count, 2] = entry_price
+    trades[trade_count, 3] = exit_price
+    trades[trade_count, 4] = qty
+    trades[trade_count, 5] = qty * (exit_price - entry_price) - entry_fee - exit_fee
+    trades[trade_count, 6] = entry_fee + exit_fee
+    trades[trade_count, 7] = reason
+    return qty * exit_price - exit_fee
+
+
+def _event_loop(open_, high, low, close, label, confidence, atr,
+                initial_cash, fee_rate, slippage_model, slippage_bps, slippage_atr_mult,
+                fill_next_open, size_by_confidence, max_position_fraction, min_confidence,
+                stop_mult, take_profit_mult, close_at_end,
+                equity, cash_out, position_out, trades):
+    """
+    事件驱动回测主循环（只访问预分配数组，可被 numba 编译）
+
+    每根K线依次处理: 挂单成交 -> 止损/止盈 -> 收盘信号 -> 按收盘价计算权益。
+    stop_mult / take_profit_mult 小于等于 0 表示不启用。
+
+    返回成交笔数
+    """
+    n = len(close)
+    cash = initial_cash
+    qty = 0.0
+    entry_price = 0.0
+    entry_index = -1
+    entry_fee = 0.0
+    stop_price = 0.0
+    take_profit_price = 0.0
+    pending = 0          # 0 无挂单, 1 买入, 2 卖出
+    pending_fraction = 0.0
+    pending_atr = 0.0
+    trade_count = 0
+
+    for i in range(n):
+        # 1. 上一根K线收盘产生的挂单，以本K线开盘价成交
+        if pending == 1 and qty == 0.0:
+            price = _slipped_price(open_[i], pending_atr, True, slippage_model, slippage_bps, slippage_atr_mult)
+            spend = cash * pending_fraction
+            qty = spend / (price * (1.0 + fee_rate))
+            entry_fee = qty * price * fee_rate
+            cash -= qty * price + entry_fee
+            entry_price = price
+            entry_index = i
+            stop_price = price - pending_atr * stop_mult if stop_mult > 0 and pending_atr == pending_atr else 0.0
+            take_profit_price = (price + pending_atr * take_profit_mult
+                                 if take_profit_mult > 0 and pending_atr == pending_atr else 0.0)
+        elif pending == 2 and qty > 0.0:
+            price = _slipped_price(open_[i], atr[i], False, slippage_model, slippage_bps, slippage_atr_mult)
+            cash += _record_exit(trades, trade_count, i, price, qty, entry_index, entry_price,
+                                 entry_fee, fee_rate, 0)
+            trade_count += 1
+            qty = 0.0
+        pending = 0
+
+        # 2. 持仓期间的 ATR 止损 / 止盈（跳空时按开盘价成交）
+        if qty > 0.0:
+            exit_price = -1.0
+            reason = 0
+            if stop_price > 0.0 and low[i] <= stop_price:
+                exit_price = min(open_[i], stop_price) if i > entry_index else stop_price
+                reason = 1
+            elif take_profit_price > 0.0 and high[i] >= take_profit_price:
+                exit_price = max(open_[i], take_profit_price) if i > entry_index else take_profit_price
+                reason = 2
+            if exit_price > 0.0:
+                price = _slipped_price(exit_price, atr[i], False, slippage_model, slippage_bps, slippage_atr_mult)
+                cash += _record_exit(trades, trade_count, i, price, qty, entry_index, entry_price,
+                                     entry_fee, fee_rate, reason)
+                trade_count += 1
+                qty = 0.0
+
+        # 3. 收盘时根据 label 产生订单
+        signal = label[i]
+        if signal == 1 and qty == 0.0:
+            fraction = max_position_fraction
+            if size_by_confidence:
+                conf = confidence[i]
+                fraction = max_position_fraction * min(max(conf, 0.0), 1.0) if conf == conf else 0.0
+            if fraction > 0.0 and confidence[i] >= min_confidence:
+                pending = 1
+                pending_fraction = fraction
+                pending_atr = atr[i]
+        elif signal == 2 and qty > 0.0:
+            pending = 2
+
+        if pending != 0 and (not fill_next_open or i == n - 1):
+            # 收盘价成交模式（或最后一根K线，没有下一根开盘价）
+            if not fill_next_open:
+                if pending == 1:
+                    price = _slipped_price(close[i], pending_atr, True, slippage_model, slippage_bps, slippage_atr_mult)
+                    qty = cash * pending_fraction / (price * (1.0 + fee_rate))
+                    entry_fee = qty * price * fee_rate
+                    cash -= qty * price + entry_fee
+                    entry_price = price
+                    entry_index = i
+                    stop_price = (price - pending_atr * stop_mult
+                                  if stop_mult > 0 and pending_atr == pending_atr else 0.0)
+                    take_profit_price = (price + pending_atr * take_profit_mult
+                                         if take_profit_mult > 0 and pending_atr == pending_atr else 0.0)
+                else:
+                    price = _slipped_price(close[i], atr[i], False, slippage_model, slippage_bps, slippage_atr_mult)
+                    cash += _record_exit(trades, trade_count, i, price, qty, entry_index, entry_price,
+                                         entry_fee, fee_rate, 0)
+                    trade_count += 1
+                    qty = 0.0
+            pending = 0
+
+        # 4. 按收盘价计算权益
+        if close_at_end and i == n - 1 and qty > 0.0:
+            price = _slipped_price(close[i], atr[i], False, slippage_model, slippage_bps, slippage_atr_mult)
+            cash += _record_exit(trades, trade_count, i, price, qty, entry_index, entry_price,
+                                 entry_fee, fee_rate, 3)
+            trade_count += 1
+            qty = 0.0
+
+        equity[i] = cash + qty * close[i]
+        cash_out[i] = cash
+        position_out[i] = qty
+
+    return trade_count
+
+
+if NUMBA_AVAILABLE:
+    _slipped_price = njit(cache=True)(_slipped_price)
+    _record_exit = njit(cache=True)(_record_exit)
+    _event_kernel = njit(cache=True, nogil=True)(_event_loop)
+else:
+    # 未安装 numba 时为纯 Python 循环，适合中小规模数据；逐笔级回放建议安装 numba
+    _event_kernel = _event_loop
+
+
+def run_event_backtest_arrays(open_, high, low, close, label, confidence=None, atr=None, config=None):
+    """
+    在原始数组上运行事件驱动回测（适用于逐笔/秒级回放，开高低收可传同一价格数组）
+
+    参数：
+    - open_ / high / low / close: 价格数组（按时间升序）
+    - label: 信号数组（0持有 / 1买入 / 2卖出）
+    - confidence: 信号置信度数组，缺省为 1
+    - atr: ATR 数组，缺省为 NaN（不设止损止盈、ATR滑点为0）
+    - config: 覆盖 DEFAULT_EVENT_BACKTEST_CONFIG 的配置字典
+
+    返回：
+    - 包含 equity、cash、position 数组，trades 成交矩阵（列见 TRADE_COLUMNS）的字典
+    """
+    cfg = {**DEFAULT_EVENT_BACKTEST_CONFIG, **(config or {})}
+    if cfg['slippage_model'] not in SLIPPAGE_MODELS:
+        raise ValueError(f"不支持的滑点模型: {cfg['slippage_model']}")
+    if cfg['fill_on'] not in ('next_open', 'close'):
+        raise ValueError(f"不支持的成交方式: {cfg['fill_on']}")
+
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    n = len(close)
+    if n == 0:
+        raise ValueError("数据为空，无法回测。")
+
+    def as_array(values, default):
+        if values is None:
+            return np.full(n, default, dtype=np.float64)
+        return np.ascontiguousarray(values, dtype=np.float64)
+
+    arrays = [as_array(open_, np.nan), as_array(high, np.nan), as_array(low, np.nan), close,
+              as_array(label, 0.0), as_array(confidence, 1.0), as_array(atr, np.nan)]
+
+    equity = np.empty(n)
+    cash = np.empty(n)
+    position = np.empty(n)
+    # 每根K线最多平仓一次（收盘成交模式下最后一根K线可能再平仓一次），成交记录上限为 n + 1
+    trades = np.empty((n + 1, len(TRADE_COLUMNS)))
+
+    trade_count = _event_kernel(
+        *arrays,
+        float(cfg['initial_cash']), float(cfg['fee_rate']), SLIPPAGE_MODELS[cfg['slippage_model']],
+        float(cfg['slippage_bps']), float(cfg['slippage_atr_mult']),
+        cfg['fill_on'] == 'next_open', cfg['sizing'] == 'confidence',
+        float(cfg['max_position_fraction']), float(cfg['min_confidence']),
+        float(cfg['atr_stop_mult'] or 0.0), float(cfg['atr_take_profit_mult'] or 0.0),
+        bool(cfg['close_at_end']),
+        equity, cash, position, trades,
+    )
+    return {'equity': equity, 'cash': cash, 'position': position, 'trades': trades[:trade_count],
+            'config': cfg}
+
+
+def summarize_event_backtest(result):
+    """汇总回测结果：最终权益、收益率、最大回撤、成交次数、胜率、手续费"""
+    equity = result['equity']
+    trades = result['trades']
+    initial_cash = result['config']['initial_cash']
+    running_max = np.maximum.accumulate(np.r_[initial_cash, equity])[1:]
+    pnl = trades[:, 5]
+    return {
+        'final_equity': float(equity[-1]),
+        'total_return': float(equity[-1] / initial_cash - 1),
+        'max_drawdown': float(np.min(equity / running_max - 1)),
+        'trades': int(len(trades)),
+        'win_rate': float(np.mean(pnl > 0)) if len(pnl) else 0.0,
+        'total_fees': float(trades[:, 6].sum()),
+        'exposure': float(np.mean(result['position'] > 0)),
+    }
+
+
+def run_event_backtest(df, config=None):
+    """
+    对 generate_smc_labels 输出的DataFrame运行事件驱动回测
+
+    参数：
+    - df: 需包含 open, high, low, close, label 字段，可选 confidence, ATR, open_time
+    - config: 覆盖 DEFAULT_EVENT_BACKTEST_CONFIG 的配置字典
+
+    返回：
+    - (逐K线结果DataFrame, 成交明细DataFrame, 汇总指标字典)
+    """
+    columns = {name: df[name].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close')}
+    label = pd.to_numeric(df['label'], errors='coerce').to_numpy(dtype=np.float64)
+    confidence = df['confidence'].to_numpy(dtype=np.float64) if 'confidence' in df else None
+    atr = df['ATR'].to_numpy(dtype=np.float64) if 'ATR' in df else None
+
+    result = run_event_backtest_arrays(columns['open'], columns['high'], columns['low'], columns['close'],
+                                       label, confidence, atr, config)
+
+    curve = pd.DataFrame({'equity': result['equity'], 'cash': result['cash'], 'position': result['position']})
+    if 'open_time' in df:
+        curve.insert(0, 'open_time', df['open_time'].to_numpy())
+
+    trades = pd.DataFrame(result['trades'], columns=TRADE_COLUMNS)
+    for column in ('entry_index', 'exit_index', 'exit_reason'):
+        trades[column] = trades[column].astype(int)
+    trades['exit_reason'] = trades['exit_reason'].map(EXIT_REASONS)
+    if 'open_time' in df:
+        open_time = df['open_time'].to_numpy()
+        trades.insert(0, 'entry_time', open_time[trades['entry_index'].to_numpy()])
+        trades.insert(1, 'exit_time', open_time[trades['exit_index'].to_numpy()])
+
+    return curve, trades, summarize_event_backtest(result)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签质量评估：检验 generate_smc_labels 的 label / confidence / signal_reason / risk_level
+对未来收益是否有预测力
+
+对每个前瞻周期计算未来收益率，并按 label、单条规则说明（如 '底部动能确认'）、risk_level 分组统计:
+- count: 样本数
+- mean_return: 平均未来收益率
+- mean_signed_return: 按信号方向（买入 +1 / 卖出 -1）调整后的平均收益率
+- hit_rate: 方向命中率（买入后上涨、卖出后下跌的比例）
+- ic: 信息系数，信号得分（方向 × confidence）与未来收益率的 Spearman 秩相关
+
+用法示例:
+    python -m src.main.data_visual.label_quality --csv complete_dataset_SUIUSDT_4h.csv --horizons 1 6 24
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_HORIZONS = (1, 6, 24)
+LABEL_COLUMNS = ['open_time', 'close', 'label', 'confidence', 'signal_reason', 'risk_level']
+
+
+def add_forward_returns(df, horizons=DEFAULT_HORIZONS, group_column='symbol'):
+    """
+    添加各前瞻周期的未来收益率列 fwd_ret_<h>（按币种分组向量化 shift，末尾不足 h 根时为 NaN）
+    """
+    df = df.sort_values([group_column, 'open_time'] if group_column in df else 'open_time', kind='stable')
+    close = df['close'].astype(float)
+    grouped = close.groupby(df[group_column], sort=False) if group_column in df else None
+    for horizon in horizons:
+        future = grouped.shift(-horizon) if grouped is not None else close.shift(-horizon)
+        df[f'fwd_ret_{horizon}'] = future / close - 1
+    return df
+
+
+def _signal_direction(label):
+    """label -> 方向：1 买入为 +1，2 卖出为 -1，其余为 0"""
+    label = pd.to_numeric(label, errors='coerce').fillna(0).to_numpy()
+    return np.where(label == 1, 1.0, np.where(label == 2, -1.0, 0.0))
+
+
+def _grouped_spearman(keys, x, y):
+    """分组 Spearman 秩相关：组内排名后用分组求和计算 Pearson 相关（不逐组循环）"""
+    frame = pd.DataFrame({'key': keys, 'x': x, 'y': y}).dropna()
+    ranks = frame.groupby('key', sort=False, observed=True)[['x', 'y']].rank()
+    frame = frame.assign(x=ranks['x'], y=ranks['y'])
+    frame = frame.assign(xy=frame['x'] * frame['y'], xx=frame['x'] ** 2, yy=frame['y'] ** 2)
+    sums = frame.groupby('key', sort=False, observed=True)[['x', 'y', 'xy', 'xx', 'yy']].mean()
+    cov = sums['xy'] - sums['x'] * sums['y']
+    var = (sums['xx'] - sums['x'] ** 2) * (sums['yy'] - sums['y'] ** 2)
+    return (cov / np.sqrt(var.where(var > 0))).rename('ic')
+
+
+def _summarize(keys, direction, score, forward, horizon, key_name):
+    """按分组键汇总一个前瞻周期的统计量"""
+    signed = forward * np.where(direction == 0, 1.0, direction)
+    frame = pd.DataFrame({
+        key_name: keys,
+        'return': forward,
+        'signed_return': signed,
+        'hit': np.where(np.isnan(forward), np.nan, (signed > 0).astype(float)),
+    })
+    stats = frame.groupby(key_name, sort=True, observed=True).agg(
+        count=('return', 'count'),
+        mean_return=('return', 'mean'),
+        mean_signed_return=('signed_return', 'mean'),
+        hit_rate=('hit', 'mean'),
+    )
+    stats = stats.join(_grouped_spearman(keys, score, forward))
+    stats.insert(0, 'horizon', horizon)
+    return stats.reset_index()
+
+
+def _parse_reason(reason):
+    """解析单条 signal_reason，返回 (方向, [带方向前缀的规则说明, ...])"""
+    if not isinstance(reason, str):
+        return 0.0, []
+    if reason.startswith('买入信号'):
+        direction, prefix = 1.0, '买入: '
+    elif reason.startswith('卖出信号'):
+        direction, prefix = -1.0, '卖出: '
+    else:
+        return 0.0, []
+    rules = [rule for rule in reason.partition(': ')[2].split(' | ') if rule]
+    return direction, [prefix + rule for rule in rules]
+
+
+def explode_rules(signal_reason):
+    """
+    把 signal_reason（如 '买入信号: 底部动能确认 | 支撑确认'）拆成单条规则
+
+    signal_reason 的取值组合很少，先 factorize 只解析不重复的取值，再用下标展开到每一行，
+    百万行数据也不需要逐行做字符串处理。
+
+    返回：
+    - 以原行号为索引的 (rule, rule_direction) DataFrame，每条规则一行
+    """
+    codes, uniques = pd.factorize(signal_reason)
+    parsed = [_parse_reason(reason) for reason in uniques]
+    directions = np.array([direction for direction, _ in parsed] + [0.0])
+    counts = np.array([len(rules) for _, rules in parsed] + [0])
+    flat_rules = np.array([rule for _, rules in parsed for rule in rules], dtype=object)
+    offsets = np.cumsum(counts) - counts
+
+    codes = np.where(codes < 0, len(parsed), codes)  # NaN 的 code 为 -1，映射到空规则
+    row_counts = counts[codes]
+    rows = np.repeat(np.arange(len(codes)), row_counts)
+    row_codes = codes[rows]
+    within = np.arange(len(rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+    return pd.DataFrame({
+        'rule': flat_rules[offsets[row_codes] + within] if len(rows) else np.empty(0, dtype=object),
+        'rule_direction': directions[row_codes],
+    }, index=signal_reason.index[rows])
+
+
+def evaluate_label_quality(df, horizons=DEFAULT_HORIZONS, group_column='symbol'):
+    """
+    评估标签的预测力
+
+    参数：
+    - df: 含 open_time, close, label 的数据，可选 confidence, signal_reason, risk_level, symbol（多币种）
+    - horizons: 前瞻周期（K线根数）
+    - group_column: 多币种数据的币种列，未来收益按该列分组计算
+
+    返回：
+    - 字典：by_label / by_rule / by_risk_level，均为 (分组, horizon) 一行的统计 DataFrame
+    """
+    df = add_forward_returns(df.reset_index(drop=True), horizons, group_column).reset_index(drop=True)
+    direction = _signal_direction(df['label'])
+    confidence = (pd.to_numeric(df['confidence'], errors='coerce').to_numpy()
+                  if 'confidence' in df else np.ones(len(df)))
+    score = direction * confidence
+    label_key = pd.to_numeric(df['label'], errors='coerce').fillna(0).astype(int).to_numpy()
+
+    rules = explode_rules(df['signal_reason']) if 'signal_reason' in df else None
+    result = {'by_label': [], 'by_rule': [], 'by_risk_level': []}
+    for horizon in horizons:
+        forward = df[f'fwd_ret_{horizon}'].to_numpy()
+        # 同一标签内 direction 相同，IC 反映 confidence 的排序能力
+        result['by_label'].append(_summarize(label_key, direction, score, forward, horizon, 'label'))
+        if 'risk_level' in df:
+            signal_rows = direction != 0
+            result['by_risk_level'].append(_summarize(
+                df['risk_level'].to_numpy()[signal_rows], direction[signal_rows], score[signal_rows],
+                forward[signal_rows], horizon, 'risk_level'))
+        if rules is not None and len(rules):
+            rows = rules.index.to_numpy()
+            rule_direction = rules['rule_direction'].to_numpy()
+            result['by_rule'].append(_summarize(rules['rule'].to_numpy(), rule_direction,
+                                                rule_direction * confidence[rows], forward[rows], horizon, 'rule'))
+
+    return {name: pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            for name, parts in result.items()}
+
+
+def main():
+    """对 init_complete_trading_system 输出的CSV评估标签质量"""
+    parser = argparse.ArgumentParser(description='标签质量评估')
+    parser.add_argument('--csv', required=True, help='含 open_time, close, label 等字段的CSV')
+    parser.add_argument('--horizons', nargs='+', type=int, default=list(DEFAULT_HORIZONS),
+                        help='前瞻周期（K线根数）')
+    args = parser.parse_args()
+
+    header = pd.read_csv(args.csv, nrows=0).columns
+    usecols = [column for column in LABEL_COLUMNS + ['symbol'] if column in header]
+    df = pd.read_csv(args.csv, usecols=usecols, parse_dates=['open_time'])
+    report = evaluate_label_quality(df, args.horizons)
+    for name, table in report.items():
+        if len(table):
+            print(f"📊 {name}:")
+            print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+            table.to_csv(f"{args.csv}_label_quality_{name}.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
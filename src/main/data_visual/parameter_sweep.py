@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测参数并行扫描
+
+把带 label 的CSV只读取一次（open_time / close / label 三列）放入共享内存，
+由进程池对 price_threshold × start_date × initial_btc 的参数网格并行回测，
+汇总最终收益率、最大回撤、夏普/索提诺/卡玛比率、成交次数到结果表。
+
+结果按批次追加写入结果CSV，中断后重新运行同一命令会跳过已完成的参数组合。
+
+用法示例:
+    python -m src.main.data_visual.parameter_sweep --csv complete_dataset_SUIUSDT_4h.csv \
+        --thresholds 0.01 0.02 0.03 --start-dates 2023-01-01 2024-01-01 --initial-btc 1
+"""
+
+import os
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.backtest_kernel import run_position_kernel
+from src.main.data_visual.performance_metrics import compute_metrics, periods_per_year_from_times
+
+# 结果表字段
+RESULT_COLUMNS = ['price_threshold', 'start_date', 'initial_btc', 'rows',
+                  'final_return', 'final_return_rate', 'max_drawdown', 'max_drawdown_duration',
+                  'sharpe', 'sortino', 'calmar', 'trades']
+PARAM_COLUMNS = ['price_threshold', 'start_date', 'initial_btc']
+
+# 工作进程中挂载的共享数组
+_worker_arrays = {}
+_worker_shms = []
+
+
+def load_backtest_arrays(csv_path):
+    """只读取回测需要的三列，返回按时间排序的连续数组"""
+    df = pd.read_csv(csv_path, usecols=['open_time', 'close', 'label'], parse_dates=['open_time'])
+    df.sort_values('open_time', inplace=True)
+    return {
+        'open_time': df['open_time'].to_numpy(dtype='datetime64[ns]').astype(np.int64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'label': pd.to_numeric(df['label'], errors='coerce').to_numpy(dtype=np.float64),
+    }
+
+
+def _to_shared_memory(arrays):
+    """把数组复制到共享内存，返回 (共享内存对象列表, 供子进程挂载的描述信息)"""
+    shms, specs = [], {}
+    for name, array in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        shms.append(shm)
+        specs[name] = (shm.name, array.shape, array.dtype.str)
+    return shms, specs
+
+
+def _attach_shared_memory(specs):
+    """工作进程初始化：挂载共享数组（只读，不复制）"""
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker_shms.append(shm)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        _worker_arrays[name] = array
+
+
+def evaluate_params(arrays, price_threshold, start_date, initial_btc):
+    """对单组参数回测并返回汇总指标"""
+    start = 0
+    if start_date:
+        start = int(np.searchsorted(arrays['open_time'], pd.Timestamp(start_date).value, side='left'))
+    close = arrays['close'][start:]
+    label = arrays['label'][start:]
+
+    record = {'price_threshold': price_threshold, 'start_date': start_date or '',
+              'initial_btc': initial_btc, 'rows': len(close)}
+    if len(close) == 0:
+        record.update({column: np.nan for column in RESULT_COLUMNS[4:]}, trades=0)
+        return record
+
+    periods_per_year = periods_per_year_from_times(arrays['open_time'][start:])
+
+    result = run_position_kernel(close, label, initial_btc, price_threshold)
+    metrics = compute_metrics(result['asset'], periods_per_year) if len(close) > 1 else {}
+    record.update(
+        final_return=float(result['cumulative_return'][-1]),
+        final_return_rate=float(result['cumulative_return_rate'][-1]),
+        max_drawdown=metrics.get('max_drawdown', 0.0),
+        max_drawdown_duration=metrics.get('max_drawdown_duration', 0),
+        sharpe=metrics.get('sharpe', np.nan),
+        sortino=metrics.get('sortino', np.nan),
+        calmar=metrics.get('calmar', np.nan),
+        trades=result['trades'],
+    )
+    return record
+
+
+def _run_batch(batch):
+    """工作进程：对一批参数组合回测"""
+    return [evaluate_params(_worker_arrays, *params) for params in batch]
+
+
+def _param_key(price_threshold, start_date, initial_btc):
+    return (round(float(price_threshold), 10), str(start_date or ''), round(float(initial_btc), 10))
+
+
+def _load_finished(output_path):
+    """读取已完成的参数组合（用于断点续跑）"""
+    if not output_path or not os.path.exists(output_path):
+        return set()
+    done = pd.read_csv(output_path, usecols=PARAM_COLUMNS, keep_default_na=False,
+                       dtype={'start_date': str})
+    return {_param_key(*row) for row in done.itertuples(index=False)}
+
+
+def run_parameter_sweep(csv_path, price_thresholds, start_dates=(None,), initial_btcs=(1.0,),
+                        output_path=None, max_workers=None, batch_size=16):
+    """
+    并行扫描参数网格
+
+    参数：
+    - csv_path: 带 open_time, close, label 字段的CSV文件路径
+    - price_thresholds / start_dates / initial_btcs: 各参数的候选值
+    - output_path: 结果CSV路径；已存在时跳过其中已完成的参数组合，新结果按批次追加
+    - max_workers: 进程数，默认使用全部CPU
+    - batch_size: 每个任务包含的参数组合数量
+
+    返回：
+    - 全部参数组合（含之前已完成部分）的结果DataFrame
+    """
+    grid = list(itertools.product(price_thresholds, start_dates, initial_btcs))
+    finished = _load_finished(output_path)
+    pending = [params for params in grid if _param_key(*params) not in finished]
+    print(f"📊 参数组合共 {len(grid)} 组，已完成 {len(grid) - len(pending)} 组，待运行 {len(pending)} 组")
+
+    collected = []
+    if pending:
+        arrays = load_backtest_arrays(csv_path)
+        print(f"✅ 已加载 {len(arrays['close'])} 条K线到共享内存")
+        shms, specs = _to_shared_memory(arrays)
+        del arrays
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        write_header = not (output_path and os.path.exists(output_path))
+        start_time = time.time()
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_shared_memory,
+                                     initargs=(specs,)) as executor:
+                futures = [executor.submit(_run_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    records = future.result()
+                    collected.extend(records)
+                    if output_path:
+                        # 每批结果立即落盘，中断后可续跑
+                        pd.DataFrame(records, columns=RESULT_COLUMNS).to_csv(
+                            output_path, mode='a', header=write_header, index=False)
+                        write_header = False
+                    elapsed = time.time() - start_time
+                    eta = elapsed / len(collected) * (len(pending) - len(collected))
+                    print(f"⏳ 进度 {len(collected)}/{len(pending)} ({len(collected) / len(pending):.1%})，"
+                          f"已用 {elapsed:.1f} 秒，预计剩余 {eta:.1f} 秒")
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+
+    if output_path:
+        return pd.read_csv(output_path, dtype={'start_date': str}, keep_default_na=False, na_values={
+            column: [''] for column in RESULT_COLUMNS if column != 'start_date'})
+    return pd.DataFrame(collected, columns=RESULT_COLUMNS)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='回测参数并行扫描')
+    parser.add_argument('--csv', required=True, help='带 open_time, close, label 字段的CSV文件')
+    parser.add_argument('--thresholds', nargs='+', type=float, default=[0.02],
+                        help='price_threshold 候选值 (默认: 0.02)')
+    parser.add_argument('--start-dates', nargs='+', default=[''],
+                        help="start_date 候选值，格式 YYYY-MM-DD，'' 表示从头开始")
+    parser.add_argument('--initial-btc', nargs='+', type=float, default=[1.0],
+                        help='initial_btc 候选值 (默认: 1.0)')
+    parser.add_argument('--output', help='结果CSV路径 (默认: <csv>_sweep_result.csv)')
+    parser.add_argument('--workers', type=int, help='进程数 (默认: CPU核数)')
+    parser.add_argument('--batch-size', type=int, default=16, help='每个任务的参数组合数 (默认: 16)')
+    args = parser.parse_args()
+
+    output_path = args.output or args.csv + "_sweep_result.csv"
+    results = run_parameter_sweep(args.csv, args.thresholds, args.start_dates, args.initial_btc,
+                                  output_path=output_path, max_workers=args.workers,
+                                  batch_size=args.batch_size)
+    print(results.sort_values('final_return_rate', ascending=False).head(10).to_string(index=False))
+    print("计算完成，结果已保存至  " + output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+# 一年的秒数（按365天计，加密货币全年交易）
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def periods_per_year_from_times(open_time):
+    """根据时间序列的中位间隔推算年化周期数，无法推算时返回None"""
+    seconds = pd.Series(pd.to_datetime(open_time)).diff().dt.total_seconds().median()
+    if seconds and seconds > 0:
+        return SECONDS_PER_YEAR / seconds
+    return None
+
+
+def returns_from_equity(equity):
+    """权益曲线（1维或 曲线数×时间 的2维）-> 单期收益率，长度减1"""
+    equity = np.asarray(equity, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[..., 1:] / equity[..., :-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def drawdown_curve(equity):
+    """回撤曲线：equity / 历史最高 - 1"""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity / np.maximum.accumulate(equity, axis=-1) - 1
+
+
+def max_drawdown(equity):
+    """最大回撤（负数，如 -0.35 表示最大回撤 35%）"""
+    return drawdown_curve(equity).min(axis=-1)
+
+
+def max_drawdown_duration(equity):
+    """最长水下持续时间（K线根数）：权益低于历史最高的最长连续区间"""
+    underwater = drawdown_curve(equity) < 0
+    index = np.arange(underwater.shape[-1])
+    # 每个位置最近一次回到新高的下标，当前连续水下长度 = 下标差
+    last_peak = np.maximum.accumulate(np.where(underwater, -1, index), axis=-1)
+    return (index - last_peak).max(axis=-1)
+
+
+def _annualize(values, periods_per_year, power=0.5):
+    return values * periods_per_year ** power if periods_per_year else values
+
+
+def sharpe_ratio(returns, periods_per_year=None):
+    """夏普比率（无风险利率取0），periods_per_year 为None时不年化"""
+    returns = np.asarray(returns, dtype=np.float64)
+    mean = returns.mean(axis=-1)
+    std = returns.std(axis=-1, ddof=1) if returns.shape[-1] > 1 else np.zeros_like(mean)
+    return _annualize(np.divide(mean, std, out=np.zeros_like(mean), where=std > 0), periods_per_year)
+
+
+def sortino_ratio(returns, periods_per_year=None):
+    """索提诺比率：只用下行波动（负收益的均方根）作分母"""
+    returns = np.asarray(returns, dtype=np.float64)
+    mean = returns.mean(axis=-1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2, axis=-1))
+    return _annualize(np.divide(mean, downside, out=np.zeros_like(mean), where=downside > 0), periods_per_year)
+
+
+def annualized_return(equity, periods_per_year):
+    """年化收益率（复利）"""
+    equity = np.asarray(equity, dtype=np.float64)
+    total = equity[..., -1] / equity[..., 0]
+    years = (equity.shape[-1] - 1) / periods_per_year
+    return np.power(np.maximum(total, 0.0), 1 / years) - 1 if years > 0 else total - 1
+
+
+def calmar_ratio(equity, periods_per_year):
+    """卡玛比率：年化收益 / |最大回撤|"""
+    drawdown = np.abs(max_drawdown(equity))
+    cagr = annualized_return(equity, periods_per_year)
+    return np.divide(cagr, drawdown, out=np.zeros_like(np.asarray(cagr, dtype=float)), where=drawdown > 0)
+
+
+def win_rate(returns):
+    """胜率：正收益期数 / 非零收益期数（传入逐笔交易盈亏时即为交易胜率）"""
+    returns = np.asarray(returns, dtype=np.float64)
+    active = (returns != 0).sum(axis=-1)
+    return np.divide((returns > 0).sum(axis=-1), active, out=np.zeros(np.shape(active)), where=active > 0)
+
+
+def profit_factor(returns):
+    """盈亏比：盈利总和 / 亏损总和的绝对值（无亏损时为 inf）"""
+    returns = np.asarray(returns, dtype=np.float64)
+    gains = np.where(returns > 0, returns, 0.0).sum(axis=-1)
+    losses = -np.where(returns < 0, returns, 0.0).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(losses > 0, gains / np.where(losses > 0, losses, 1.0), np.where(gains > 0, np.inf, 0.0))
+
+
+def exposure(returns=None, position=None):
+    """持仓时间占比：有 position 时按持仓量>0 计算，否则按收益非零的期数近似"""
+    if position is not None:
+        return (np.asarray(position) > 0).mean(axis=-1)
+    return (np.asarray(returns) != 0).mean(axis=-1)
+
+
+def compute_metrics(equity, periods_per_year=None, position=None):
+    """
+    一次性计算权益曲线的全部指标
+
+    参数：
+    - equity: 权益曲线，1维（单条）或 2维（曲线数×时间，如参数扫描的多条结果）
+    - periods_per_year: 年化周期数（夏普、索提诺、卡玛比率年化），为None时不年化、不计算卡玛比率
+    - position: 与 equity 同形状的持仓量，用于计算 exposure
+
+    返回：
+    - 指标字典；1维输入时值为标量，2维输入时值为每条曲线一个元素的数组
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    returns = returns_from_equity(equity)
+    metrics = {
+        'total_return': equity[..., -1] / equity[..., 0] - 1,
+        'sharpe': sharpe_ratio(returns, periods_per_year),
+        'sortino': sortino_ratio(returns, periods_per_year),
+        'max_drawdown': max_drawdown(equity),
+        'max_drawdown_duration': max_drawdown_duration(equity),
+        'win_rate': win_rate(returns),
+        'profit_factor': profit_factor(returns),
+        'exposure': exposure(returns, position),
+    }
+    if periods_per_year:
+        metrics['annualized_return'] = annualized_return(equity, periods_per_year)
+        metrics['calmar'] = calmar_ratio(equity, periods_per_year)
+    if equity.ndim == 1:
+        metrics = {name: float(value) for name, value in metrics.items()}
+    return metrics
+
+
+def _rolling_sum(values, window):
+    """沿最后一维的滑动窗口求和（前缀和相减，O(n)）；不足一个窗口的位置为 NaN"""
+    cumsum = np.cumsum(values, axis=-1)
+    result = np.full(values.shape, np.nan)
+    result[..., window - 1] = cumsum[..., window - 1]
+    result[..., window:] = cumsum[..., window:] - cumsum[..., :-window]
+    return result
+
+
+def rolling_metrics(equity, window, periods_per_year=None):
+    """
+    滚动窗口指标（每个窗口 O(1) 更新）
+
+    均值/方差/下行方差用前缀和相减，窗口内最高点用 pandas 的单调队列滚动最大值。
+
+    参数：
+    - equity: 1维或2维（曲线数×时间）权益曲线
+    - window: 窗口长度（收益率期数）
+
+    返回：
+    - 字典：rolling_return / rolling_sharpe / rolling_sortino / rolling_drawdown，
+      形状与 equity 相同，前 window 个位置为 NaN
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    squeeze = equity.ndim == 1
+    equity = np.atleast_2d(equity)
+    if window < 2 or window >= equity.shape[-1]:
+        raise ValueError(f"窗口长度 {window} 不合法，需在 2 与曲线长度之间")
+
+    returns = returns_from_equity(equity)
+    mean = _rolling_sum(returns, window) / window
+    square_mean = _rolling_sum(returns ** 2, window) / window
+    variance = np.maximum(square_mean - mean ** 2, 0.0) * window / (window - 1)
+    std = np.sqrt(variance)
+    downside = np.sqrt(_rolling_sum(np.minimum(returns, 0.0) ** 2, window) / window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = _annualize(np.where(std > 1e-12, mean / std, 0.0), periods_per_year)
+        sortino = _annualize(np.where(downside > 1e-12, mean / downside, 0.0), periods_per_year)
+    sharpe[..., :window - 1] = np.nan
+    sortino[..., :window - 1] = np.nan
+
+    rolling_peak = pd.DataFrame(equity.T).rolling(window + 1, min_periods=window + 1).max().to_numpy().T
+
+    pad = np.full((equity.shape[0], 1), np.nan)
+    result = {
+        'rolling_return': np.hstack([pad, np.full_like(returns, np.nan)]),
+        'rolling_sharpe': np.hstack([pad, sharpe]),
+        'rolling_sortino': np.hstack([pad, sortino]),
+        'rolling_drawdown': equity / rolling_peak - 1,
+    }
+    result['rolling_return'][:, window:] = equity[:, window:] / equity[:, :-window] - 1
+    if squeeze:
+        result = {name: value[0] for name, value in result.items()}
+    return result
+
+
+def metrics_frame(equity_matrix, periods_per_year=None, index=None):
+    """对多条权益曲线（如参数扫描结果）批量计算指标，返回每行一条曲线的DataFrame"""
+    return pd.DataFrame(compute_metrics(np.atleast_2d(equity_matrix), periods_per_year), index=index)
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# 默认组合回测配置
+DEFAULT_PORTFOLIO_CONFIG = {
+    'initial_capital': 10000.0,   # 初始资金（USDT）
+    'weighting': 'equal',         # 资金分配: 'equal'（持仓币种等权） / 'confidence'（按最近信号置信度加权）
+    'max_weight': 1.0,            # 单币种最大权重，超出部分留作现金
+    'fee_rate': 0.001,            # 按换手（权重变化绝对值之和）收取的手续费率
+}
+
+
+def align_symbol_frames(frames):
+    """
+    把多个币种的标签数据对齐到统一时间轴，得到 币种 × 时间 的列式矩阵
+
+    参数：
+    - frames: {symbol: DataFrame}，每个 DataFrame 需包含 open_time, close, label，可选 confidence
+
+    返回：
+    - 字典: symbols、open_time（统一时间轴）、close / label / confidence（S×T 矩阵）。
+      某币种在某时刻没有数据时 close 为 NaN（首条数据之前、最后一条数据之后，如下架）
+      或沿用上一收盘价（首尾之间的中途缺失），label 为 0
+    """
+    symbols = list(frames)
+    open_time = np.unique(np.concatenate([
+        pd.to_datetime(frames[s]['open_time']).to_numpy(dtype='datetime64[ns]') for s in symbols]))
+
+    shape = (len(symbols), len(open_time))
+    close = np.full(shape, np.nan)
+    label = np.zeros(shape)
+    confidence = np.ones(shape)
+    for row, symbol in enumerate(symbols):
+        df = frames[symbol]
+        position = np.searchsorted(open_time, pd.to_datetime(df['open_time']).to_numpy(dtype='datetime64[ns]'))
+        close[row, position] = df['close'].to_numpy(dtype=float)
+        label[row, position] = np.nan_to_num(pd.to_numeric(df['label'], errors='coerce').to_numpy(dtype=float))
+        if 'confidence' in df:
+            confidence[row, position] = df['confidence'].to_numpy(dtype=float)
+
+    # 中途缺失的收盘价沿用上一有效值（按行向量化前向填充），只填充到该币种最后一条数据为止
+    valid = ~np.isnan(close)
+    last_valid = shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    valid_index = np.where(valid, np.arange(shape[1]), 0)
+    np.maximum.accumulate(valid_index, axis=1, out=valid_index)
+    close = np.take_along_axis(close, valid_index, axis=1)
+    close[np.arange(shape[1]) > last_valid[:, None]] = np.nan
+    return {'symbols': symbols, 'open_time': open_time, 'close': close, 'label': label, 'confidence': confidence}
+
+
+def target_weights(label, confidence, close, weighting='equal', max_weight=1.0):
+    """
+    由标签矩阵计算每个时刻的目标权重（对全部币种、全部时刻一次性向量化）
+
+    持仓状态沿用 calculate_daily_pnl 的规则：最近一次信号为 1 则持有，为 2 则空仓；
+    close 为 NaN（首条数据之前、最后一条数据之后）时不持有，权重分给其余币种。
+    """
+    n_times = label.shape[1]
+    # 每个位置最近一次非零信号的下标
+    last_signal = np.where(label != 0, np.arange(n_times), 0)
+    np.maximum.accumulate(last_signal, axis=1, out=last_signal)
+    held = (np.take_along_axis(label, last_signal, axis=1) == 1) & ~np.isnan(close)
+
+    if weighting == 'confidence':
+        score = held * np.clip(np.nan_to_num(np.take_along_axis(confidence, last_signal, axis=1)), 0, None)
+    elif weighting == 'equal':
+        score = held.astype(float)
+    else:
+        raise ValueError(f"不支持的资金分配方式: {weighting}")
+
+    total = score.sum(axis=0)
+    weights = np.divide(score, total, out=np.zeros_like(score), where=total > 0)
+    return np.minimum(weights, max_weight)
+
+
+def run_portfolio_backtest(frames, config=None):
+    """
+    多币种组合回测
+
+    每根K线收盘时按信号调整到目标权重（与 calculate_daily_pnl 一样以收盘价成交），
+    下一根K线的组合收益 = Σ 权重 × 币种收益 - 换手 × 手续费率。
+
+    参数：
+    - frames: {symbol: DataFrame}，需包含 open_time, close, label，可选 confidence
+    - config: 覆盖 DEFAULT_PORTFOLIO_CONFIG 的配置字典
+
+    返回：
+    - (组合曲线DataFrame: open_time/equity/drawdown/exposure/positions, 权重DataFrame, 汇总字典)
+    """
+    cfg = {**DEFAULT_PORTFOLIO_CONFIG, **(config or {})}
+    aligned = align_symbol_frames(frames)
+    close = aligned['close']
+
+    weights = target_weights(aligned['label'], aligned['confidence'], close, cfg['weighting'], cfg['max_weight'])
+
+    # 币种收益矩阵（上市前及首根K线收益为0）
+    returns = np.zeros_like(close)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held_weights = np.zeros_like(weights)
+    held_weights[:, 1:] = weights[:, :-1]
+    turnover = np.abs(np.diff(weights, axis=1, prepend=0.0)).sum(axis=0)
+    portfolio_return = (held_weights * returns).sum(axis=0) - turnover * cfg['fee_rate']
+
+    equity = cfg['initial_capital'] * np.cumprod(1 + portfolio_return)
+    running_max = np.maximum.accumulate(np.r_[cfg['initial_capital'], equity])[1:]
+    drawdown = equity / running_max - 1
+    exposure = weights.sum(axis=0)
+
+    open_time = pd.to_datetime(aligned['open_time'])
+    curve = pd.DataFrame({
+        'open_time': open_time,
+        'equity': equity,
+        'return': portfolio_return,
+        'drawdown': drawdown,
+        'exposure': exposure,
+        'positions': (weights > 0).sum(axis=0),
+        'turnover': turnover,
+    })
+    weights_df = pd.DataFrame(weights.T, index=open_time, columns=aligned['symbols'])
+
+    summary = {
+        'final_equity': float(equity[-1]),
+        'total_return': float(equity[-1] / cfg['initial_capital'] - 1),
+        'max_drawdown': float(drawdown.min()),
+        'average_exposure': float(exposure.mean()),
+        'total_fees': float((turnover * cfg['fee_rate']).sum()),
+        'symbol_contribution': dict(zip(aligned['symbols'], (held_weights * returns).sum(axis=1).tolist())),
+    }
+    return curve, weights_df, summary
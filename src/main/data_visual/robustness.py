@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测结果稳健性检验（蒙特卡洛 / 自助法）
+
+- 收益序列块自助法（block bootstrap）：保留短期自相关，重采样 n_resamples 条收益路径
+- 交易序列自助法：对单笔交易收益有放回重采样，检验结果对交易顺序和运气的依赖
+- 每个分块生成 (分块大小 × 时间) 的矩阵一次性计算指标，分块控制内存，多进程并行
+
+用法示例:
+    python -m src.main.data_visual.robustness --csv complete_dataset_SUIUSDT_4h.csv_pnl_result.csv \
+        --resamples 10000 --block-size 30
+"""
+
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.performance_metrics import (sharpe_ratio, max_drawdown,
+                                                      periods_per_year_from_times)
+
+# 置信区间分位数
+DEFAULT_QUANTILES = (0.025, 0.5, 0.975)
+
+
+def block_bootstrap_indices(rng, n_resamples, length, block_size):
+    """
+    生成循环块自助法的下标矩阵
+
+    返回：
+    - (n_resamples, length) 的下标矩阵，每行由若干长度为 block_size 的连续块拼接而成
+    """
+    block_size = max(1, min(int(block_size), length))
+    n_blocks = -(-length // block_size)
+    starts = rng.integers(0, length, size=(n_resamples, n_blocks))
+    offsets = np.arange(block_size)
+    indices = (starts[:, :, None] + offsets) % length
+    return indices.reshape(n_resamples, -1)[:, :length]
+
+
+def path_metrics(returns, periods_per_year=None):
+    """
+    对收益矩阵（每行一条路径）计算总收益、夏普比率、最大回撤
+
+    参数：
+    - returns: (k, T) 单期收益率矩阵
+    - periods_per_year: 年化周期数，为None时夏普比率不年化
+    """
+    # 权益曲线以初始值 1 开头，回撤从初始资金起算
+    equity = np.hstack([np.ones((len(returns), 1)), np.cumprod(1 + returns, axis=1)])
+    return {
+        'total_return': equity[:, -1] - 1,
+        'sharpe': sharpe_ratio(returns, periods_per_year),
+        'max_drawdown': max_drawdown(equity),
+    }
+
+
+def _bootstrap_chunk(returns, block_size, periods_per_year, n_resamples, seed_sequence):
+    """单个分块：生成重采样矩阵并计算指标"""
+    rng = np.random.default_rng(seed_sequence)
+    indices = block_bootstrap_indices(rng, n_resamples, len(returns), block_size)
+    return path_metrics(returns[indices], periods_per_year)
+
+
+def _trade_chunk(trade_returns, n_resamples, seed_sequence):
+    """单个分块：对交易收益有放回重采样"""
+    rng = np.random.default_rng(seed_sequence)
+    indices = rng.integers(0, len(trade_returns), size=(n_resamples, len(trade_returns)))
+    return path_metrics(trade_returns[indices])
+
+
+def _run_chunks(task, n_resamples, chunk_size, seed, max_workers):
+    """
+    把 n_resamples 切成分块执行并合并结果
+
+    task(n, seed_sequence) 为可序列化的分块函数；每个分块使用 SeedSequence 派生的独立随机流，
+    因此结果只取决于 seed 和 chunk_size，与进程数无关
+    """
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if max_workers == 1 or len(sizes) == 1:
+        parts = [task(size, seed_sequence) for size, seed_sequence in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(task, sizes, seeds))
+    return pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in parts[0]})
+
+
+def confidence_intervals(samples, observed=None, quantiles=DEFAULT_QUANTILES):
+    """
+    汇总重采样结果的分位数置信区间
+
+    返回：
+    - DataFrame，行为指标，列为各分位数（以及 observed 实际值、重采样中劣于实际值的比例）
+    """
+    table = samples.quantile(list(quantiles)).T
+    table.columns = [f"p{q * 100:g}" for q in quantiles]
+    if observed is not None:
+        table['observed'] = pd.Series(observed)
+        table['prob_below_observed'] = [float(np.mean(samples[name] < observed[name])) for name in table.index]
+    return table
+
+
+def bootstrap_returns(returns, n_resamples=5000, block_size=20, chunk_size=500, seed=None,
+                      periods_per_year=None, max_workers=None):
+    """
+    收益序列块自助法
+
+    参数：
+    - returns: 单期收益率序列（如 asset 的逐K线收益率）
+    - n_resamples: 重采样次数
+    - block_size: 块长度（K线根数），用于保留收益的自相关
+    - chunk_size: 每个分块的重采样条数，分块矩阵大小为 chunk_size × len(returns)
+    - seed: 随机种子（结果与进程数无关、可复现）
+    - periods_per_year: 年化周期数（夏普比率年化）
+    - max_workers: 进程数，1 表示在当前进程内执行
+
+    返回：
+    - (每次重采样的指标DataFrame, 置信区间DataFrame)
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    if len(returns) < 2:
+        raise ValueError("收益序列过短，无法重采样。")
+    task = partial(_bootstrap_chunk, returns, block_size, periods_per_year)
+    samples = _run_chunks(task, n_resamples, chunk_size, seed, max_workers)
+    observed = {name: float(values[0]) for name, values in path_metrics(returns[None, :], periods_per_year).items()}
+    return samples, confidence_intervals(samples, observed)
+
+
+def bootstrap_trades(trade_returns, n_resamples=5000, chunk_size=1000, seed=None, max_workers=None):
+    """
+    交易序列自助法：对每笔交易的收益率有放回重采样，按复利拼接成权益路径
+
+    返回：
+    - (每次重采样的指标DataFrame, 置信区间DataFrame)；夏普比率为按笔计算、未年化
+    """
+    trade_returns = np.asarray(trade_returns, dtype=np.float64)
+    trade_returns = trade_returns[~np.isnan(trade_returns)]
+    if len(trade_returns) < 2:
+        raise ValueError("交易笔数过少，无法重采样。")
+    samples = _run_chunks(partial(_trade_chunk, trade_returns), n_resamples, chunk_size, seed, max_workers)
+    observed = {name: float(values[0]) for name, values in path_metrics(trade_returns[None, :]).items()}
+    return samples, confidence_intervals(samples, observed)
+
+
+def returns_from_pnl(df):
+    """
+    从 calculate_daily_pnl 的结果中提取逐K线收益率和年化周期数
+
+    返回：
+    - (收益率数组, periods_per_year)
+    """
+    asset = df['asset'].to_numpy(dtype=float)
+    returns = np.diff(asset) / asset[:-1]
+    periods_per_year = periods_per_year_from_times(df['open_time']) if 'open_time' in df else None
+    return returns, periods_per_year
+
+
+def trade_returns_from_pnl(df):
+    """
+    从 calculate_daily_pnl 的结果中按 label 还原每笔交易（持有BTC -> 卖出）的收益率
+
+    与回测规则一致：初始持有BTC，空仓时遇到 1 买入，持仓时遇到 2 卖出。
+    只遍历有信号的K线。
+    """
+    asset = df['asset'].to_numpy(dtype=float)
+    label = pd.to_numeric(df['label'], errors='coerce').fillna(0).to_numpy()
+    trade_returns = []
+    holding, entry = True, 0
+    for i in np.flatnonzero(label):
+        if label[i] == 2 and holding:
+            trade_returns.append(asset[i] / asset[entry] - 1)
+            holding = False
+        elif label[i] == 1 and not holding:
+            holding, entry = True, i
+    return np.asarray(trade_returns)
+
+
+def main():
+    """对 calculate_daily_pnl 的结果CSV做稳健性检验"""
+    parser = argparse.ArgumentParser(description='回测结果自助法稳健性检验')
+    parser.add_argument('--csv', required=True, help='calculate_daily_pnl 输出的结果CSV')
+    parser.add_argument('--resamples', type=int, default=5000, help='重采样次数 (默认: 5000)')
+    parser.add_argument('--block-size', type=int, default=20, help='块长度 (默认: 20)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='每个分块的重采样条数 (默认: 500)')
+    parser.add_argument('--workers', type=int, help='进程数 (默认: CPU核数)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, usecols=['open_time', 'asset', 'label'], parse_dates=['open_time'])
+    returns, periods_per_year = returns_from_pnl(df)
+    _, intervals = bootstrap_returns(returns, args.resamples, args.block_size, args.chunk_size,
+                                     args.seed, periods_per_year, args.workers)
+    print("📊 收益序列块自助法置信区间:")
+    print(intervals.to_string())
+
+    trade_returns = trade_returns_from_pnl(df)
+    if len(trade_returns) >= 2:
+        _, trade_intervals = bootstrap_trades(trade_returns, args.resamples, seed=args.seed,
+                                              max_workers=args.workers)
+        print("📊 交易序列自助法置信区间:")
+        print(trade_intervals.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+标签规则的滚动前推（walk-forward）评估
+
+流程:
+1. 用 CompleteTradingSystem.compute_feature_frame 对全部历史只计算一次特征（最耗时的部分）
+2. 按 train_size / test_size / step 切分滚动的训练、测试窗口
+3. 每个窗口各自归一化（与线上按窗口归一化一致）并缓存规则矩阵
+4. 在训练窗口上搜索 min_buy_score / min_sell_score 等门槛，每组参数只需重算标签得分
+5. 用训练窗口最优参数在测试窗口回测，拼接得到样本外权益曲线
+
+用法示例:
+    python -m src.main.data_visual.walk_forward --symbol SUIUSDT --interval 4h --limit 5000 \
+        --train-size 1500 --test-size 300
+"""
+
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.main.trade.label_rules import (compute_rule_masks, score_labels,
+                                        DEFAULT_MIN_BUY_SCORE, DEFAULT_MIN_SELL_SCORE)
+from src.main.data_visual.event_backtester import run_event_backtest_arrays, summarize_event_backtest
+
+# 默认搜索网格
+DEFAULT_PARAM_GRID = {
+    'min_buy_score': [9, 12, 15, 18, 21],
+    'min_sell_score': [6, 9, 12, 15, 18],
+}
+
+
+def split_walk_forward(n, train_size, test_size, step=None):
+    """
+    生成滚动窗口下标
+
+    返回：
+    - [(train_start, train_end, test_end), ...]，训练区间 [train_start, train_end)，测试区间 [train_end, test_end)
+    """
+    step = step or test_size
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n:
+        folds.append((start, start + train_size, start + train_size + test_size))
+        start += step
+    return folds
+
+
+class _SegmentCache:
+    """单个数据窗口的缓存：价格数组 + 规则矩阵（与参数无关）"""
+
+    def __init__(self, trading_system, feature_df):
+        label_df = trading_system._create_normalized_label_data(feature_df)
+        self.masks = compute_rule_masks(label_df)
+        self.arrays = {name: feature_df[name].to_numpy(dtype=np.float64)
+                       for name in ('open', 'high', 'low', 'close')}
+        self.atr = feature_df['ATR'].to_numpy(dtype=np.float64) if 'ATR' in feature_df else None
+
+    def evaluate(self, params, backtest_config=None):
+        label, confidence = score_labels(self.masks, **params)
+        result = run_event_backtest_arrays(self.arrays['open'], self.arrays['high'], self.arrays['low'],
+                                           self.arrays['close'], label, confidence, self.atr, backtest_config)
+        return result, summarize_event_backtest(result)
+
+
+def walk_forward(trading_system, feature_df, train_size, test_size, step=None, param_grid=None,
+                 backtest_config=None, objective='total_return'):
+    """
+    对缓存的特征数据做 walk-forward 参数搜索与样本外评估
+
+    参数：
+    - trading_system: CompleteTradingSystem 实例（用于归一化）
+    - feature_df: compute_feature_frame 的输出
+    - train_size / test_size / step: 训练窗口、测试窗口长度及滚动步长（K线根数）
+    - param_grid: {参数名: 候选值列表}，参数为 score_labels 的关键字参数
+    - backtest_config: 传给事件驱动回测的配置
+    - objective: 训练窗口上用于选参的指标（summarize_event_backtest 的键，越大越好）
+
+    返回：
+    - (每个窗口结果DataFrame, 样本外权益曲线DataFrame, 汇总字典)
+    """
+    param_grid = param_grid or DEFAULT_PARAM_GRID
+    names = list(param_grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    folds = split_walk_forward(len(feature_df), train_size, test_size, step)
+    if not folds:
+        raise ValueError(f"数据长度 {len(feature_df)} 不足以切分 train_size={train_size}, test_size={test_size}")
+
+    fold_rows = []
+    oos_curves = []
+    equity_scale = 1.0
+    for fold, (train_start, train_end, test_end) in enumerate(folds):
+        train = _SegmentCache(trading_system, feature_df.iloc[train_start:train_end].reset_index(drop=True))
+        test = _SegmentCache(trading_system, feature_df.iloc[train_end:test_end].reset_index(drop=True))
+
+        scores = [train.evaluate(params, backtest_config)[1][objective] for params in candidates]
+        best = candidates[int(np.nanargmax(scores))]
+        result, summary = test.evaluate(best, backtest_config)
+        _, baseline = test.evaluate({'min_buy_score': DEFAULT_MIN_BUY_SCORE,
+                                     'min_sell_score': DEFAULT_MIN_SELL_SCORE}, backtest_config)
+
+        # 样本外权益按窗口首尾相接（每个测试窗口从上一窗口结束时的权益继续）
+        initial_cash = result['config']['initial_cash']
+        curve = pd.DataFrame({'fold': fold, 'equity': result['equity'] / initial_cash * equity_scale})
+        if 'open_time' in feature_df:
+            curve.insert(0, 'open_time', feature_df['open_time'].iloc[train_end:test_end].to_numpy())
+        oos_curves.append(curve)
+        equity_scale = curve['equity'].iloc[-1]
+
+        fold_rows.append({
+            'fold': fold,
+            'train_start': train_start, 'train_end': train_end, 'test_end': test_end,
+            **best,
+            f'train_{objective}': float(np.nanmax(scores)),
+            'test_return': summary['total_return'],
+            'test_max_drawdown': summary['max_drawdown'],
+            'test_trades': summary['trades'],
+            'baseline_test_return': baseline['total_return'],
+        })
+        print(f"📈 窗口 {fold + 1}/{len(folds)}: 最优参数 {best}，"
+              f"样本外收益 {summary['total_return']:.2%}（默认参数 {baseline['total_return']:.2%}）")
+
+    folds_df = pd.DataFrame(fold_rows)
+    oos_df = pd.concat(oos_curves, ignore_index=True)
+    running_max = np.maximum.accumulate(np.r_[1.0, oos_df['equity'].to_numpy()])[1:]
+    summary = {
+        'folds': len(folds_df),
+        'oos_return': float(oos_df['equity'].iloc[-1] - 1),
+        'oos_max_drawdown': float(np.min(oos_df['equity'].to_numpy() / running_max - 1)),
+        'baseline_oos_return': float(np.prod(1 + folds_df['baseline_test_return']) - 1),
+        'fold_win_rate': float(np.mean(folds_df['test_return'] > 0)),
+    }
+    return folds_df, oos_df, summary
+
+
+def main():
+    """从数据库读取K线并运行 walk-forward"""
+    from src.main.utils.sql_util import MySQLUtil
+    from src.main.trade.complete_trading_system_v2_4_4h import CompleteTradingSystem
+
+    parser = argparse.ArgumentParser(description='标签规则 walk-forward 评估')
+    parser.add_argument('--symbol', default='SUIUSDT', help='交易对 (默认: SUIUSDT)')
+    parser.add_argument('--interval', default='4h', help='K线周期 (默认: 4h)')
+    parser.add_argument('--limit', type=int, default=5000, help='读取最近多少根K线 (默认: 5000)')
+    parser.add_argument('--train-size', type=int, default=1500, help='训练窗口K线数 (默认: 1500)')
+    parser.add_argument('--test-size', type=int, default=300, help='测试窗口K线数 (默认: 300)')
+    parser.add_argument('--step', type=int, help='滚动步长 (默认: 等于测试窗口)')
+    parser.add_argument('--output', help='窗口结果CSV路径 (默认: walk_forward_<symbol>_<interval>.csv)')
+    args = parser.parse_args()
+
+    MySQLUtil.init_pool()
+    trading_system = CompleteTradingSystem()
+    raw_df = trading_system._fetch_kline_window(args.symbol, args.interval, args.limit)
+    feature_df = trading_system.compute_feature_frame(raw_df)
+
+    folds_df, oos_df, summary = walk_forward(trading_system, feature_df, args.train_size, args.test_size, args.step)
+    output = args.output or f"walk_forward_{args.symbol}_{args.interval}.csv"
+    folds_df.to_csv(output, index=False)
+    oos_df.to_csv(output.replace('.csv', '_oos_equity.csv'), index=False)
+    print(folds_df.to_string(index=False))
+    print(f"样本外总收益: {summary['oos_return']:.2%}，最大回撤: {summary['oos_max_drawdown']:.2%}，"
+          f"默认参数样本外收益: {summary['baseline_oos_return']:.2%}")
+    print("计算完成，结果已保存至  " + output)
+
+
+if __name__ == "__main__":
+    main()
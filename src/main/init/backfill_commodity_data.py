@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品期货历史数据回填（可断点续跑）
+
+- 每个 品种×UTC自然月 一个任务，线程池并发执行，全部请求共享一个令牌桶限速器
+- 每完成一个月立即写入 CommodityCache（交易系统直接命中缓存），并更新该品种的断点文件
+- 断点文件记录每个月份的状态（done / partial / failed）、记录数和尝试次数；重新运行时跳过已完成且缓存有效的月份，
+  中途失败或被中断只需重跑，已获取的数据不会丢失
+- 尚未结束的当前月份记为 partial，缓存超过 ttl 或月份结束后重新请求
+- 不限制月份数，可以逐步构建多年的宏观历史数据：接口只提供最近 730 天的小时级K线，
+  更早的月份按 CommodityFetcher.window_interval 改用日线（history_interval）回填和缓存，交易系统按同样规则读取
+
+断点文件:
+    {checkpoint_dir}/CL_F_1h.json
+    {"symbol": "CL=F", "interval": "1h",
+     "months": {"2023-01": {"status": "done", "interval": "1d", "rows": 21, ...},
+                "2025-01": {"status": "done", "interval": "1h", "rows": 480, ...}}}
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from src.main.utils.commodity_cache import CommodityCache
+from src.main.utils.commodity_fetcher import COMMODITY_PREFIXES, DEFAULT_FETCHER_CONFIG, CommodityFetcher, parse_chart
+
+DEFAULT_BACKFILL_CONFIG = {
+    'interval': DEFAULT_FETCHER_CONFIG['interval'],  # K线间隔，与交易系统的 oil_batch_config 一致
+    'min_request_interval': 0.5,   # 令牌补充间隔(秒)，即长期平均请求间隔
+    'rate_burst': 4,               # 令牌桶容量，允许的突发请求数
+    'max_workers': 4,              # 并发线程数
+    'max_retries': 3,              # 单个请求的最大重试次数
+    'timeout': 60,                 # 请求超时时间(秒)
+    'cache_dir': '../trade/commodity_cache',  # 与交易系统共用的缓存目录（交易系统在 trade 目录下使用 commodity_cache）
+    'checkpoint_dir': '../trade/commodity_cache/_checkpoints',
+}
+
+
+class BackfillCheckpoint:
+    """单个 品种×K线间隔 的断点文件（多线程安全，每次更新原子写入）"""
+
+    def __init__(self, checkpoint_dir, symbol, interval):
+        self.symbol = symbol
+        self.interval = interval
+        safe_symbol = symbol.replace('=', '_').replace('^', '').replace('/', '_')
+        self.path = os.path.join(checkpoint_dir, f"{safe_symbol}_{interval}.json")
+        self._lock = threading.Lock()
+        self.months = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.months = json.load(f).get('months', {})
+            except json.JSONDecodeError as e:
+                print(f"⚠️ 断点文件 '{self.path}' 损坏，从头开始: {e}")
+
+    def status(self, month):
+        return self.months.get(month, {}).get('status')
+
+    def mark(self, month, status, rows=0, error=None, interval=None):
+        """记录一个月份的结果（interval 为该月实际请求的K线间隔）并立即落盘"""
+        with self._lock:
+            entry = self.months.get(month, {})
+            self.months[month] = {
+                'status': status,
+                'interval': interval or self.interval,
+                'rows': int(rows),
+                'attempts': entry.get('attempts', 0) + 1,
+                'error': error,
+                'updated': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'symbol': self.symbol, 'interval': self.interval,
+                       'months': dict(sorted(self.months.items()))}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class CommodityBackfill:
+    """商品期货历史数据回填任务"""
+
+    def __init__(self, config=None, session=None):
+        """
+        参数：
+        - config: 覆盖 DEFAULT_BACKFILL_CONFIG 的配置字典（相对路径相对本文件所在目录）
+        - session: 外部传入的 requests.Session（测试时使用）
+        """
+        self.config = {**DEFAULT_BACKFILL_CONFIG, **(config or {})}
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.cache_dir = os.path.join(base_dir, self.config['cache_dir'])
+        self.checkpoint_dir = os.path.join(base_dir, self.config['checkpoint_dir'])
+        self.cache = CommodityCache(self.cache_dir)
+        # 回填只按月请求，缓存由这里逐月写入，获取器本身不再读写缓存
+        self.fetcher = CommodityFetcher(self.config, session=session)
+
+    def plan(self, symbols, start, end, now=None):
+        """
+        列出需要请求的 (品种, 月份, 月初, 月末, K线间隔)、各品种的断点和跳过的月份数
+
+        已完成（done / partial）且缓存有效的月份跳过；partial 月份的缓存超过 ttl 或月份结束后重新请求。
+        超出日内数据范围的月份使用 history_interval（见 CommodityFetcher.window_interval）。
+        """
+        start_ts = pd.Timestamp(start).timestamp()
+        end_ts = pd.Timestamp(end).timestamp() if end else pd.Timestamp.now(tz='UTC').timestamp()
+        interval = self.config['interval']
+        windows = self.cache.month_windows(start_ts, end_ts)
+        checkpoints = {symbol: BackfillCheckpoint(self.checkpoint_dir, symbol, interval) for symbol in symbols}
+        tasks = []
+        for symbol in symbols:
+            for month, month_start, month_end in windows:
+                month_interval = self.fetcher.window_interval(month_start, now)
+                if (checkpoints[symbol].status(month) in ('done', 'partial')
+                        and any(self.cache.is_valid(symbol, candidate, month, now)
+                                for candidate in dict.fromkeys([interval, month_interval]))):
+                    continue
+                tasks.append((symbol, month, month_start, month_end, month_interval))
+        skipped = len(windows) * len(symbols) - len(tasks)
+        print(f"📋 共 {len(windows) * len(symbols)} 个 品种×月份，已完成 {skipped} 个，待回填 {len(tasks)} 个")
+        return tasks, checkpoints, skipped
+
+    def _backfill_month(self, task, checkpoint):
+        """请求一个 品种×月份，成功后写入缓存并更新断点，返回记录数（失败返回 None）"""
+        symbol, month, month_start, month_end, interval = task
+        prefix = COMMODITY_PREFIXES.get(symbol, symbol.split('=')[0].lower())
+        data = self.fetcher.fetch_chart(symbol, month_start, month_end, interval)
+        if data is None:
+            checkpoint.mark(month, 'failed', error='request failed', interval=interval)
+            return None
+        frame = parse_chart(data, prefix, month_start, month_end)
+        self.cache.save(symbol, interval, month, frame)
+        checkpoint.mark(month, 'done' if self.cache.is_closed(month) else 'partial', rows=len(frame),
+                        interval=interval)
+        return len(frame)
+
+    def run(self, symbols, start, end=None):
+        """
+        回填 symbols 在 [start, end] 内的全部月份
+
+        返回：
+        - {'done': 完成月份数, 'failed': 失败月份数, 'skipped': 跳过月份数, 'rows': 新写入记录数}
+        """
+        tasks, checkpoints, skipped = self.plan(symbols, start, end)
+        summary = {'done': 0, 'failed': 0, 'skipped': skipped, 'rows': 0}
+        if not tasks:
+            print("✅ 所有月份均已回填，无需请求")
+            return summary
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.config['max_workers'], len(tasks)))) as executor:
+            futures = {executor.submit(self._backfill_month, task, checkpoints[task[0]]): task for task in tasks}
+            for i, future in enumerate(as_completed(futures), 1):
+                symbol, month = futures[future][:2]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    checkpoints[symbol].mark(month, 'failed', error=str(e))
+                    rows = None
+                if rows is None:
+                    summary['failed'] += 1
+                    print(f"❌ [{i}/{len(tasks)}] {symbol} {month} 回填失败，下次运行时重试")
+                else:
+                    summary['done'] += 1
+                    summary['rows'] += rows
+                    print(f"✅ [{i}/{len(tasks)}] {symbol} {month}: {rows} 条记录")
+
+        print(f"🎉 回填结束: 完成 {summary['done']} 个月份，失败 {summary['failed']} 个，"
+              f"跳过 {summary['skipped']} 个，新写入 {summary['rows']} 条记录")
+        return summary
+
+
+if __name__ == '__main__':
+    try:
+        # 配置参数
+        symbols = ['CL=F', 'GC=F']  # 原油、黄金期货
+        start_date = '2023-01-01 00:00:00'  # 开始日期
+        end_date = None  # 结束日期（None表示到现在）
+
+        backfill = CommodityBackfill()
+        backfill.run(symbols, start_date, end_date)
+
+    except Exception as e:
+        print(f"❌ 回填过程中出错: {e}")
+        import traceback
+
+        traceback.print_exc()
@@ -4,12 +4,19 @@ import pandas as pd
 import numpy as np
 import io
 from datetime import datetime, timedelta, timezone
-from DrissionPage import SessionPage
 import json
 import time
 from scipy import stats
 import warnings
 from sklearn.preprocessing import MinMaxScaler
+from src.main.utils.commodity_fetcher import CommodityFetcher, COMMODITY_PREFIXES, DEFAULT_FETCHER_CONFIG, month_windows
+from src.main.utils.commodity_cache import CommodityCache
+from src.main.utils.exogenous_merger import merge_exogenous
+from src.main.utils.synthetic_market_data import generate_prefixed_ohlcv
+from src.main.utils.commodity_indicators import compute_commodity_indicators
+from src.main.utils.ohlcv_resampler import resample_ohlcv
+from src.main.utils.http_client import get_session
+from src.main.utils.exogenous_feature_store import DEFAULT_FEATURE_STORE_CONFIG, ExogenousFeatureStore
 
 warnings.filterwarnings('ignore')
 
@@ -17,11 +24,40 @@ warnings.filterwarnings('ignore')
 script_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(script_dir)
 
+# 模拟原油数据按K线间隔的 (收盘波动率, 影线波动率, 成交量区间)
+DUMMY_INTERVAL_PROFILES = {
+    '1m': (0.005, 0.002, (10000, 50000)),
+    '5m': (0.005, 0.002, (10000, 50000)),
+    '15m': (0.01, 0.003, (30000, 100000)),
+    '30m': (0.01, 0.003, (30000, 100000)),
+    '1h': (0.015, 0.005, (50000, 200000)),
+    '2h': (0.015, 0.005, (50000, 200000)),
+    '4h': (0.025, 0.008, (100000, 400000)),
+}
+DUMMY_DAILY_PROFILE = (0.03, 0.01, (200000, 800000))  # 日线或更长
+
+
+def _dummy_interval_profile(interval):
+    return DUMMY_INTERVAL_PROFILES.get(interval, DUMMY_DAILY_PROFILE)
+
+
+def _dummy_commodity_profile(name):
+    """模拟商品价格参数：原油 40-90 美元，黄金 1600-2000 美元"""
+    if name == 'oil':
+        return {'start_price': 65.0, 'volatility': 0.008, 'volume_range': (50000, 200000),
+                'price_bounds': (40.0, 90.0)}
+    return {'start_price': 1800.0, 'volatility': 0.003, 'volume_range': (10000, 50000),
+            'price_bounds': (1600.0, 2000.0)}
+
 
 class CompleteTradingSystem:
     """完整的数字货币量化交易系统"""
 
-    def __init__(self):
+    def __init__(self, feature_store_config=None):
+        """
+        参数：
+        - feature_store_config: 覆盖 DEFAULT_FEATURE_STORE_CONFIG 的外生特征存储配置（如 {'backend': 'mysql'}）
+        """
         self.base_url = 'https://api.binance.com/api/v3/klines'
 
         # 原油API优化配置 (Yahoo Finance)
@@ -30,8 +66,24 @@ class CompleteTradingSystem:
             'min_request_interval': 0.5,  # 最小请求间隔(秒) - Yahoo Finance相对宽松
             'max_retries': 3,  # 最大重试次数
             'max_batches': 100,  # 最大批次数限制
-            'timeout': 60  # 请求超时时间(秒)
+            'timeout': 60,  # 请求超时时间(秒)
+            'max_workers': 4,  # 并发请求线程数
+            'interval': DEFAULT_FETCHER_CONFIG['interval'],  # 商品K线间隔，与 init/backfill_commodity_data 回填的缓存一致
+            'history_interval': DEFAULT_FETCHER_CONFIG['history_interval'],  # 超出小时线可回溯范围(约730天)的月份使用日线
+            'cache_dir': 'commodity_cache',  # 商品行情本地缓存目录，为None时不缓存
+            'cache_ttl': 3600,  # 当前月份缓存有效期(秒)，已结束的月份永久有效
+            'max_months': None  # 单次最多获取的月份数，None表示不限制（多年历史先用 init/backfill_commodity_data 回填缓存）
         }
+        self.commodity_fetcher = self._create_commodity_fetcher()
+        # 外生特征块（oil_*、gld_*）单独存储，实盘和研究按需拼接
+        self.feature_store_config = {**DEFAULT_FEATURE_STORE_CONFIG, **(feature_store_config or {})}
+        self.feature_store = ExogenousFeatureStore.from_config(self.feature_store_config)
+
+    def _create_commodity_fetcher(self):
+        """按当前配置创建商品行情获取器（连接池、限速器、本地缓存）"""
+        config = self.oil_batch_config
+        cache = CommodityCache(config['cache_dir'], ttl=config['cache_ttl']) if config.get('cache_dir') else None
+        return CommodityFetcher(config, cache=cache)
 
     def update_oil_batch_config(self, **kwargs):
         """更新原油API批量获取配置
@@ -42,6 +94,12 @@ class CompleteTradingSystem:
             max_retries: 最大重试次数 (默认3)
             max_batches: 最大批次数限制 (默认100)
             timeout: 请求超时时间秒数 (默认60)
+            max_workers: 并发请求线程数 (默认4)
+            interval: 商品K线间隔 (默认1h，与回填任务共用)
+            history_interval: 超出小时线回溯范围的月份使用的K线间隔 (默认1d)
+            cache_dir: 本地缓存目录 (默认commodity_cache，None表示不缓存)
+            cache_ttl: 当前月份缓存有效期秒数 (默认3600)
+            max_months: 单次最多获取的月份数 (默认None，不限制)
         """
         for key, value in kwargs.items():
             if key in self.oil_batch_config:
@@ -51,6 +109,9 @@ class CompleteTradingSystem:
             else:
                 print(f"⚠️ 未知配置项: {key}")
 
+        # 限速器、连接池和缓存按新配置重建
+        self.commodity_fetcher = self._create_commodity_fetcher()
+
         print("🔧 当前原油API配置:")
         for key, value in self.oil_batch_config.items():
             print(f"   - {key}: {value}")
@@ -74,10 +135,6 @@ class CompleteTradingSystem:
                 params['endTime'] = end_time
 
             try:
-                proxies = {
-                    'http': 'socks5h://127.0.0.1:7890',
-                    'https': 'socks5h://127.0.0.1:7890'
-                }
                 headers = {
                     'User-Agent': 'PostmanRuntime/7.44.1',
                     'Accept': '*/*',
@@ -88,7 +145,7 @@ class CompleteTradingSystem:
                     'Cookie': 'B=1f3q7g2b0g8c5&b=3&s=4k; GUC=0; A1=20231030.01; A3=20231030.01; A2=20231030.01; A4=20231030.01; A5=20231030.01; A6=20231030.01; A7=20231030.01; A8=20231030.01; A9=20231030.01; A10=20231030.01; A11=20231030.01; A12=20231030.01'
                 }
 
-                response = requests.get(self.base_url, params=params, headers=headers, timeout=60, proxies=proxies)
+                response = get_session('binance').get(self.base_url, params=params, headers=headers, timeout=60)
                 response.raise_for_status()
                 klines = response.json()
 
@@ -166,16 +223,16 @@ class CompleteTradingSystem:
         )
 
     def get_oil_data_batch_optimized(self, start_str, end_str, crypto_interval='1h', max_records_per_request=None):
-        """优化的原油数据批量获取方法 - 使用Alpha Vantage API按月获取数据，支持大数据量分批获取"""
+        """优化的原油数据批量获取方法 - 按月分批，各月份请求并发执行，整体受最小请求间隔约束"""
         # 使用配置参数
         config = self.oil_batch_config
         if max_records_per_request is None:
             max_records_per_request = config['max_records_per_request']
 
         print(f"🚀 开始优化批量获取原油数据: {start_str} 到 {end_str}")
-        print(f"⚙️ 配置: 每次最多{max_records_per_request}条记录，请求间隔≥{config['min_request_interval']}秒")
+        print(f"⚙️ 配置: 每次最多{max_records_per_request}条记录，请求间隔≥{config['min_request_interval']}秒，"
+              f"并发数{config['max_workers']}")
 
-        import time
         start_timestamp = int(pd.to_datetime(start_str).timestamp())
         end_timestamp = int(pd.to_datetime(end_str).timestamp())
 
@@ -183,114 +240,23 @@ class CompleteTradingSystem:
         total_hours = (end_timestamp - start_timestamp) // 3600
         print(f"📊 预估数据时间跨度: {total_hours} 小时")
 
-        # Alpha Vantage API按月获取数据，需要生成月份列表
-        from datetime import datetime, timedelta
-        import calendar
-
-        start_date = datetime.fromtimestamp(start_timestamp)
-        end_date = datetime.fromtimestamp(end_timestamp)
-
-        # 生成需要获取的月份列表
-        month_list = []
-        current_date = datetime(start_date.year, start_date.month, 1)
-
-        while current_date <= end_date:
-            month_list.append(current_date.strftime('%Y-%m'))
-            # 跳转到下个月
-            if current_date.month == 12:
-                current_date = datetime(current_date.year + 1, 1, 1)
-            else:
-                current_date = datetime(current_date.year, current_date.month + 1, 1)
-
+        month_list = [month for month, _, _ in month_windows(start_timestamp, end_timestamp)]
         print(f"📋 需要获取的月份: {month_list}")
         print(f"📋 预计需要 {len(month_list)} 个月的数据")
 
-        all_oil_data = []
-        batch_count = 0
-
-        # 请求速率控制
-        last_request_time = 0
-        min_interval = config['min_request_interval']  # 从配置获取最小请求间隔
-
-        # 进度跟踪
-        successful_batches = 0
-        failed_batches = 0
-
-        for month in month_list:
-            batch_count += 1
-
-            # 计算当前月份的时间范围
-            year, month_num = map(int, month.split('-'))
-            month_start = datetime(year, month_num, 1)
-            if month_num == 12:
-                month_end = datetime(year + 1, 1, 1) - timedelta(seconds=1)
-            else:
-                month_end = datetime(year, month_num + 1, 1) - timedelta(seconds=1)
-
-            month_start_ts = month_start.timestamp()
-            month_end_ts = month_end.timestamp()
-
-            # 调整时间范围到实际需要的时间段
-            current_start = max(month_start_ts, start_timestamp)
-            current_end = min(month_end_ts, end_timestamp)
-
-            # 速率限制：确保请求间隔至少1秒
-            current_time = time.time()
-            time_since_last = current_time - last_request_time
-            if time_since_last < min_interval:
-                sleep_time = min_interval - time_since_last
-                print(f"⏳ 速率控制: 等待 {sleep_time:.2f} 秒...")
-                time.sleep(sleep_time)
-
-            # 计算和显示进度
-            progress_percent = (batch_count / len(month_list)) * 100
-            print(f"\n📦 月份 {batch_count}/{len(month_list)} ({progress_percent:.1f}%) - {month}")
-            print(f"📅 时间段: {pd.to_datetime(current_start, unit='s')} 到 {pd.to_datetime(current_end, unit='s')}")
-
-            # 获取当前月份的数据
-            batch_data = self._get_oil_data_single_batch(current_start, current_end)
-            last_request_time = time.time()
-
-            if batch_data is not None and len(batch_data) > 0:
-                all_oil_data.append(batch_data)
-                successful_batches += 1
-                print(f"✅ 月份 {month} 成功！获取 {len(batch_data)} 条记录")
-                print(f"📊 成功率: {successful_batches}/{batch_count} ({(successful_batches / batch_count) * 100:.1f}%)")
-            else:
-                failed_batches += 1
-                print(f"⚠️ 月份 {month} 获取失败，跳过")
-                print(f"📊 失败率: {failed_batches}/{batch_count} ({(failed_batches / batch_count) * 100:.1f}%)")
-
-                # 如果失败率过高，提供建议
-                if batch_count >= 3 and failed_batches / batch_count > 0.5:
-                    print(
-                        f"🚨 警告：失败率过高 ({(failed_batches / batch_count) * 100:.1f}%)，可能需要检查网络连接或API状态")
-
-            # 避免无限循环
-            if batch_count > 24:  # 最多获取24个月的数据
-                print(f"⚠️ 已达到最大月份限制 (24个月)，停止获取")
-                break
-
-        # 合并所有批次的数据
-        if all_oil_data:
-            print(f"\n🔄 合并 {len(all_oil_data)} 个批次的数据...")
-            final_oil_df = pd.concat(all_oil_data, ignore_index=True)
-
-            # 去重和排序
-            original_count = len(final_oil_df)
-            final_oil_df = final_oil_df.drop_duplicates(subset=['oil_timestamp']).reset_index(drop=True)
-            final_oil_df = final_oil_df.sort_values('oil_timestamp').reset_index(drop=True)
-            duplicates_removed = original_count - len(final_oil_df)
+        # 所有月份一次性提交到线程池，共享连接池和限速器
+        frames = self.commodity_fetcher.fetch_range(['CL=F'], start_timestamp, end_timestamp,
+                                                     max_months=config['max_months'])
+        final_oil_df = frames.get('oil')
 
+        if final_oil_df is not None and len(final_oil_df) > 0:
             print(f"🎉 批量获取完成！")
             print(f"📊 处理汇总:")
-            print(f"   - 成功批次: {successful_batches}/{batch_count}")
-            print(f"   - 原始记录: {original_count} 条")
-            print(f"   - 去重后: {len(final_oil_df)} 条 (删除重复: {duplicates_removed})")
+            print(f"   - 记录数: {len(final_oil_df)} 条")
             print(f"   - 数据完整性: {(len(final_oil_df) / max(1, total_hours)) * 100:.1f}% (基于时间跨度)")
             print(f"📅 时间范围: {final_oil_df['oil_timestamp'].min()} 至 {final_oil_df['oil_timestamp'].max()}")
             print(f"💰 价格范围: ${final_oil_df['oil_close'].min():.2f} - ${final_oil_df['oil_close'].max():.2f}")
-            print(f"⏱️ 请求间隔合规: 所有请求间隔 ≥ {min_interval} 秒")
+            print(f"⏱️ 请求间隔合规: 所有请求间隔 ≥ {config['min_request_interval']} 秒")
 
             return final_oil_df
         else:
@@ -333,11 +299,7 @@ class CompleteTradingSystem:
         }
 
         try:
-            # 发送请求
-            proxies = {
-                'http': 'socks5h://127.0.0.1:7890',
-                'https': 'socks5h://127.0.0.1:7890'
-            }
+            # 发送请求（复用商品行情获取器的连接池，代理取自 HTTP 配置）
             headers = {
                 'User-Agent': 'PostmanRuntime/7.44.1',
                 'Accept': '*/*',
@@ -347,7 +309,7 @@ class CompleteTradingSystem:
                 'Referer': 'https://finance.yahoo.com/quote/CL=F/history?p=CL%3DF',
                 'Cookie': 'B=1f3q7g2b0g8c5&b=3&s=4k; GUC=0; A1=20231030.01; A3=20231030.01; A2=20231030.01; A4=20231030.01; A5=20231030.01; A6=20231030.01; A7=20231030.01; A8=20231030.01; A9=20231030.01; A10=20231030.01; A11=20231030.01; A12=20231030.01'
             }
-            response = requests.get(url, params=params, timeout=60, headers=headers, proxies=proxies)
+            response = self.commodity_fetcher.session.get(url, params=params, timeout=60, headers=headers)
             response.raise_for_status()
 
             # 解析JSON数据
@@ -419,101 +381,26 @@ class CompleteTradingSystem:
 
     def _get_oil_data_single_batch(self, start_timestamp, end_timestamp):
         """获取单个批次的原油数据（使用Yahoo Finance API）"""
+        frames = self.get_commodity_data_single_batch(start_timestamp, end_timestamp, symbols=('CL=F',))
+        return frames.get('oil')
 
-        config = self.oil_batch_config
-        max_retries = config['max_retries']
-        interval = "1d"
-
-        # 获取合适的interval
-        time_diff = end_timestamp - start_timestamp
-        # if time_diff <= 86400 * 7:  # 小于等于7天，使用1小时数据
-        #     interval = "1h"
-        # elif time_diff <= 86400 * 30:  # 小于等于30天，使用4小时数据
-        #     interval = "4h"
-        # else:  # 大于30天，使用1天数据
-        #     interval = "1d"
-
-        print(
-            f"🔄 使用Yahoo Finance API获取原油数据，时间范围: {datetime.fromtimestamp(start_timestamp)} 到 {datetime.fromtimestamp(end_timestamp)}, 间隔: {interval}")
-
-        for retry in range(max_retries):
-            try:
-                if retry > 0:
-                    wait_time = 1.0 * (2 ** retry)
-                    print(f"🔄 重试 {retry + 1}/{max_retries}，等待 {wait_time:.1f} 秒...")
-                    time.sleep(wait_time)
-
-                # 使用新的Yahoo Finance API获取数据
-                raw_data = self.fetch_oil_price_data(
-                    symbol="CL=F",
-                    period1=int(start_timestamp),
-                    period2=int(end_timestamp),
-                    interval=interval
-                )
-                
-                # 同时获取黄金期货数据
-                gold_data = self.fetch_oil_price_data(
-                    symbol="GC=F",
-                    period1=int(start_timestamp),
-                    period2=int(end_timestamp),
-                    interval=interval
-                )
-
-                if not raw_data:
-                    print(f"❌ 获取原始数据失败")
-                    if retry == max_retries - 1:
-                        return None
-                    continue
-
-                # 解析数据
-                parsed_data = self.parse_oil_data(raw_data)
-
-                if not parsed_data or not parsed_data['historical_data']:
-                    print(f"❌ 解析数据失败或历史数据为空")
-                    if retry == max_retries - 1:
-                        return None
-                    continue
-
-                # 转换为DataFrame格式
-                oil_records = []
-                for data_point in parsed_data['historical_data']:
-                    if all(data_point[key] is not None for key in ['open', 'high', 'low', 'close', 'volume']):
-                        try:
-                            # 转换时间戳为datetime
-                            timestamp = pd.to_datetime(data_point['timestamp'], unit='s')
-
-                            # 过滤时间范围
-                            timestamp_unix = data_point['timestamp']
-                            if timestamp_unix < start_timestamp or timestamp_unix > end_timestamp:
-                                continue
-
-                            oil_records.append({
-                                'oil_timestamp': timestamp,
-                                'oil_open': float(data_point['open']),
-                                'oil_high': float(data_point['high']),
-                                'oil_low': float(data_point['low']),
-                                'oil_close': float(data_point['close']),
-                                'oil_volume': float(data_point['volume'])
-                            })
-                        except (ValueError, KeyError) as e:
-                            print(f"⚠️ 数据解析错误: {e} for timestamp {data_point['timestamp']}")
-                            continue
-
-                if oil_records:
-                    print(f"✅ 成功获取 {len(oil_records)} 条原油数据")
-                    return pd.DataFrame(oil_records).sort_values('oil_timestamp').reset_index(drop=True)
-                else:
-                    print(f"❌ 时间范围内无有效数据")
-                    if retry == max_retries - 1:
-                        return None
-                    continue
+    def get_commodity_data_single_batch(self, start_timestamp, end_timestamp, symbols=('CL=F', 'GC=F')):
+        """
+        并发获取同一时间窗口内多个商品期货的数据
 
-            except Exception as e:
-                print(f"❌ 请求处理错误: {e}")
-                if retry == max_retries - 1:
-                    return None
+        返回:
+        - {前缀: DataFrame}，如 {'oil': 原油数据, 'gld': 黄金数据}；获取失败的品种值为 None
+        """
+        print(f"🔄 使用Yahoo Finance API获取{', '.join(symbols)}数据，时间范围: "
+              f"{datetime.fromtimestamp(start_timestamp)} 到 {datetime.fromtimestamp(end_timestamp)}")
 
-        return None
+        frames = self.commodity_fetcher.fetch_window(list(symbols), start_timestamp, end_timestamp)
+        for prefix, frame in frames.items():
+            if len(frame) > 0:
+                print(f"✅ 成功获取 {len(frame)} 条{prefix}数据")
+            else:
+                print(f"❌ {prefix} 时间范围内无有效数据")
+        return {prefix: frame if len(frame) > 0 else None for prefix, frame in frames.items()}
 
     def get_oil_data(self, start_str, end_str=None, crypto_interval='1h'):
         """获取原油期货价格数据（使用Yahoo Finance API，自动选择合适的时间间隔）"""
@@ -526,128 +413,32 @@ class CompleteTradingSystem:
 
         return self.get_oil_data_batch_optimized(start_str, end_str, crypto_interval)
 
-    def _create_dummy_oil_data(self, start_str, end_str=None):
-        """创建示例原油数据"""
+    def _create_dummy_oil_data(self, start_str, end_str=None, seed=None):
+        """创建示例原油数据（1小时间隔，向量化生成；seed 为None时每次生成不同的数据）"""
         start_date = pd.Timestamp(start_str)
         end_date = pd.Timestamp(end_str) if end_str else pd.Timestamp.now()
 
-        # 创建时间序列（1分钟间隔）
-        date_range = pd.date_range(start=start_date, end=end_date, freq='1min')
-
-        # 生成模拟原油价格数据
-        # 使用当前时间作为随机种子，确保每次生成不同的数据
-        np.random.seed(int(pd.Timestamp.now().timestamp()) % 10000)
-        base_price = 70.0  # 基础油价70美元
-
-        oil_data = []
-        for i, timestamp in enumerate(date_range):
-            # 随机游走生成价格
-            if i == 0:
-                open_price = base_price
-            else:
-                # 使用上一个收盘价作为开盘价
-                open_price = oil_data[-1]['oil_close']
-
-            # 生成日内波动
-            daily_change = np.random.normal(0, 0.02)  # 2%日波动
-            intraday_volatility = 0.005  # 0.5%日内波动
-
-            high_price = open_price * (1 + abs(np.random.normal(0, intraday_volatility)))
-            low_price = open_price * (1 - abs(np.random.normal(0, intraday_volatility)))
-            close_price = open_price * (1 + daily_change + np.random.normal(0, intraday_volatility / 2))
-
-            # 确保high >= max(open, close) 和 low <= min(open, close)
-            high_price = max(high_price, open_price, close_price)
-            low_price = min(low_price, open_price, close_price)
-
-            volume = np.random.uniform(50000, 200000)
-
-            oil_data.append({
-                'oil_timestamp': timestamp,
-                'oil_open': round(open_price, 2),
-                'oil_high': round(high_price, 2),
-                'oil_low': round(low_price, 2),
-                'oil_close': round(close_price, 2),
-                'oil_volume': round(volume, 0)
-            })
-
-        oil_df = pd.DataFrame(oil_data)
+        # 创建时间序列（1小时间隔，与Yahoo Finance小时数据一致）
+        date_range = pd.date_range(start=start_date, end=end_date, freq='1h')
+        oil_df = generate_prefixed_ohlcv(date_range, 'oil', start_price=70.0, volatility=0.005,
+                                         intrabar_volatility=0.002, volume_range=(50000, 200000), seed=seed)
         print(
             f"✅ 生成了 {len(oil_df)} 条模拟原油数据，价格范围: ${oil_df['oil_close'].min():.2f} - ${oil_df['oil_close'].max():.2f}")
 
         return oil_df
 
-    def _create_dummy_oil_data_for_crypto(self, crypto_df, crypto_interval='1h'):
+    def _create_dummy_oil_data_for_crypto(self, crypto_df, crypto_interval='1h', seed=None):
         """根据数字货币数据创建匹配的模拟原油数据"""
         print("正在生成与数字货币数据匹配的模拟原油数据...")
 
         if len(crypto_df) == 0:
             return pd.DataFrame()
 
-        # 获取数字货币的时间戳
-        crypto_timestamps = crypto_df['open_time'].tolist()
-
-        # 生成模拟原油价格数据
-        # 使用当前时间作为随机种子，确保每次生成不同的数据
-        np.random.seed(int(pd.Timestamp.now().timestamp()) % 10000)
-        base_price = 70.0  # 基础油价70美元
-
-        oil_data = []
-        for i, timestamp in enumerate(crypto_timestamps):
-            # 随机游走生成价格
-            if i == 0:
-                open_price = base_price
-            else:
-                # 使用上一个收盘价作为开盘价
-                open_price = oil_data[-1]['oil_close']
-
-            # 根据时间间隔调整波动率
-            if crypto_interval in ['1m', '5m']:
-                daily_change = np.random.normal(0, 0.005)  # 0.5%波动
-                intraday_volatility = 0.002  # 0.2%日内波动
-            elif crypto_interval in ['15m', '30m']:
-                daily_change = np.random.normal(0, 0.01)  # 1%波动
-                intraday_volatility = 0.003  # 0.3%日内波动
-            elif crypto_interval in ['1h', '2h']:
-                daily_change = np.random.normal(0, 0.015)  # 1.5%波动
-                intraday_volatility = 0.005  # 0.5%日内波动
-            elif crypto_interval == '4h':
-                daily_change = np.random.normal(0, 0.025)  # 2.5%波动
-                intraday_volatility = 0.008  # 0.8%日内波动
-            else:  # 日线或更长
-                daily_change = np.random.normal(0, 0.03)  # 3%波动
-                intraday_volatility = 0.01  # 1%日内波动
-
-            high_price = open_price * (1 + abs(np.random.normal(0, intraday_volatility)))
-            low_price = open_price * (1 - abs(np.random.normal(0, intraday_volatility)))
-            close_price = open_price * (1 + daily_change + np.random.normal(0, intraday_volatility / 2))
-
-            # 确保high >= max(open, close) 和 low <= min(open, close)
-            high_price = max(high_price, open_price, close_price)
-            low_price = min(low_price, open_price, close_price)
-
-            # 根据时间间隔调整成交量
-            if crypto_interval in ['1m', '5m']:
-                volume = np.random.uniform(10000, 50000)
-            elif crypto_interval in ['15m', '30m']:
-                volume = np.random.uniform(30000, 100000)
-            elif crypto_interval in ['1h', '2h']:
-                volume = np.random.uniform(50000, 200000)
-            elif crypto_interval == '4h':
-                volume = np.random.uniform(100000, 400000)
-            else:  # 日线或更长
-                volume = np.random.uniform(200000, 800000)
-
-            oil_data.append({
-                'oil_timestamp': timestamp,
-                'oil_open': round(open_price, 2),
-                'oil_high': round(high_price, 2),
-                'oil_low': round(low_price, 2),
-                'oil_close': round(close_price, 2),
-                'oil_volume': round(volume, 0)
-            })
-
-        oil_df = pd.DataFrame(oil_data)
+        # 根据时间间隔调整波动率和成交量
+        volatility, intrabar_volatility, volume_range = _dummy_interval_profile(crypto_interval)
+        oil_df = generate_prefixed_ohlcv(crypto_df['open_time'], 'oil', start_price=70.0, volatility=volatility,
+                                         intrabar_volatility=intrabar_volatility, volume_range=volume_range,
+                                         seed=seed)
         print(f"✅ 生成了 {len(oil_df)} 条与数字货币匹配的模拟原油数据")
         print(f"时间范围: {oil_df['oil_timestamp'].min()} 至 {oil_df['oil_timestamp'].max()}")
         print(f"价格范围: ${oil_df['oil_close'].min():.2f} - ${oil_df['oil_close'].max():.2f}")
@@ -673,40 +464,13 @@ class CompleteTradingSystem:
 
         return oil_prepared
 
-    def resample_oil_data_to_match_crypto(self, oil_df, crypto_df, crypto_interval):
-        """将原油数据重采样以匹配数字货币数据的时间间隔（备用函数）"""
+    def resample_oil_data_to_match_crypto(self, oil_df, crypto_df, crypto_interval, session=None):
+        """将原油数据重采样以匹配数字货币数据的时间间隔（备用函数，支持全部 Binance K线间隔，session 见 ohlcv_resampler）"""
         print(f"正在将原油数据重采样到 {crypto_interval} 间隔...")
 
-        # 设置时间为索引
-        oil_df = oil_df.set_index('oil_timestamp')
-
-        # 根据crypto_interval确定重采样规则
-        if crypto_interval == '1h':
-            resample_rule = '1H'
-        elif crypto_interval == '4h':
-            resample_rule = '4H'
-        elif crypto_interval == '1d':
-            resample_rule = '1D'
-        elif crypto_interval == '1m':
-            resample_rule = '1min'
-        else:
-            resample_rule = '1H'  # 默认1小时
-
-        # 重采样原油数据
-        oil_resampled = oil_df.resample(resample_rule).agg({
-            'oil_open': 'first',
-            'oil_high': 'max',
-            'oil_low': 'min',
-            'oil_close': 'last',
-            'oil_volume': 'sum'
-        })
-
-        # 重置索引
-        oil_resampled = oil_resampled.reset_index()
-        oil_resampled = oil_resampled.rename(columns={'oil_timestamp': 'open_time'})
-
-        # 移除缺失值
-        oil_resampled = oil_resampled.dropna()
+        oil_resampled = resample_ohlcv(oil_df, crypto_interval, prefix='oil_', time_column='oil_timestamp',
+                                       session=session)
+        oil_resampled = oil_resampled.rename(columns={'oil_timestamp': 'open_time'}).dropna()
 
         print(f"✅ 原油数据重采样完成，共 {len(oil_resampled)} 条记录")
         return oil_resampled
@@ -719,76 +483,10 @@ class CompleteTradingSystem:
             print("⚠️ 原油数据为空，无法合并")
             return crypto_df
 
-        # 确保时间列为datetime类型
-        crypto_df['open_time'] = pd.to_datetime(crypto_df['open_time'])
-        oil_df['open_time'] = pd.to_datetime(oil_df['open_time'])
-
-        print(
-            f"数字货币数据: {len(crypto_df)} 条，时间范围: {crypto_df['open_time'].min()} 至 {crypto_df['open_time'].max()}")
-        print(f"原油数据: {len(oil_df)} 条，时间范围: {oil_df['open_time'].min()} 至 {oil_df['open_time'].max()}")
-
-        # 使用asof合并，找到最接近的原油数据
         crypto_df = crypto_df.sort_values('open_time').reset_index(drop=True)
-        oil_df = oil_df.sort_values('open_time').reset_index(drop=True)
-
-        # 先尝试精确匹配
-        merged_df = pd.merge(crypto_df, oil_df, on='open_time', how='left')
-
-        # 统计匹配情况
-        exact_matches = merged_df['oil_close'].notna().sum()
-        total_records = len(merged_df)
-        match_rate = exact_matches / total_records * 100
-
-        print(f"精确时间匹配: {exact_matches}/{total_records} ({match_rate:.1f}%)")
-
-        # 如果匹配率低于50%，使用近似匹配
-        if match_rate < 50:
-            print("精确匹配率较低，使用近似时间匹配...")
-            merged_df = pd.merge_asof(
-                crypto_df, oil_df,
-                on='open_time',
-                direction='nearest',
-                tolerance=pd.Timedelta(hours=2)  # 允许2小时的时间差
-            )
-
-            # 重新统计匹配情况
-            approx_matches = merged_df['oil_close'].notna().sum()
-            approx_match_rate = approx_matches / total_records * 100
-            print(f"近似时间匹配: {approx_matches}/{total_records} ({approx_match_rate:.1f}%)")
-
-        # 处理剩余的缺失值
-        oil_columns = ['oil_open', 'oil_high', 'oil_low', 'oil_close', 'oil_volume']
-
-        missing_before = merged_df[oil_columns].isna().sum().sum()
-
-        # 前向填充
-        merged_df[oil_columns] = merged_df[oil_columns].ffill()
-
-        # 后向填充（处理开头的缺失值）
-        merged_df[oil_columns] = merged_df[oil_columns].bfill()
-
-        # 如果还有缺失值，用均值填充
-        for col in oil_columns:
-            if merged_df[col].isna().any():
-                mean_value = merged_df[col].mean()
-                if pd.isna(mean_value):
-                    # 如果均值也是NaN，使用默认值
-                    default_values = {
-                        'oil_open': 70.0, 'oil_high': 71.0, 'oil_low': 69.0,
-                        'oil_close': 70.0, 'oil_volume': 100000.0
-                    }
-                    mean_value = default_values.get(col, 70.0)
-                merged_df[col] = merged_df[col].fillna(mean_value)
-
-        missing_after = merged_df[oil_columns].isna().sum().sum()
-
-        print(f"缺失值处理: {missing_before} → {missing_after}")
+        merged_df = merge_exogenous(crypto_df, [self._commodity_merge_source(oil_df, 'oil')])
         print(f"✅ 数据合并完成，共 {len(merged_df)} 条记录")
 
-        # 验证合并结果
-        if len(merged_df) != len(crypto_df):
-            print("⚠️ 警告：合并后数据量发生变化")
-
         # 显示原油数据范围
         if merged_df['oil_close'].notna().any():
             oil_min = merged_df['oil_close'].min()
@@ -798,272 +496,48 @@ class CompleteTradingSystem:
 
         return merged_df
 
+    @staticmethod
+    def _commodity_merge_source(commodity_df, name):
+        """商品数据的合并配置：最近时间匹配，最多允许2小时时间差，整列缺失时使用默认价格"""
+        default_price = 70.0 if name == 'oil' else 1800.0
+        return {
+            'name': name,
+            'frame': commodity_df,
+            'columns': [f"{name}_{field}" for field in ['open', 'high', 'low', 'close', 'volume']
+                        if f"{name}_{field}" in commodity_df.columns],
+            'direction': 'nearest',
+            'tolerance': pd.Timedelta(hours=2),  # 允许2小时的时间差
+            'defaults': {f"{name}_open": default_price, f"{name}_high": default_price,
+                         f"{name}_low": default_price, f"{name}_close": default_price,
+                         f"{name}_volume": 100000.0},
+        }
+
     def calculate_indicators(self, df, prefix='oil_'):
         """计算技术指标，支持原油和黄金
 
         参数:
         - df: 包含价格数据的DataFrame
-        - prefix: 指标前缀，默认为'oil_'（原油），可设置为'gld_'（黄金）
+        - prefix: 指标前缀，默认为'oil_'（原油），可设置为'gld_'（黄金），也可传入前缀列表并发计算
 
         返回:
         - 包含计算指标的DataFrame
         """
-        print(f"计算{prefix}技术指标...")
-
-        # 检查数据是否存在
-        columns = [f"{prefix}open", f"{prefix}high", f"{prefix}low", f"{prefix}close", f"{prefix}volume"]
-        missing_columns = [col for col in columns if col not in df.columns]
+        prefixes = [prefix] if isinstance(prefix, str) else list(prefix)
+        print(f"计算{'、'.join(prefixes)}技术指标...")
 
+        missing_columns = [f"{p}{field}" for p in prefixes for field in ['open', 'high', 'low', 'close', 'volume']
+                           if f"{p}{field}" not in df.columns]
         if missing_columns:
-            print(f"⚠️ 缺少{prefix}数据列: {missing_columns}")
-            print(f"将使用默认值填充{prefix}指标...")
-            # 创建默认的指标列
-            for col in columns:
-                if col not in df.columns:
-                    if 'close' in col:
-                        df[col] = 70.0  # 默认油价70美元
-                    elif 'volume' in col:
-                        df[col] = 100000.0  # 默认成交量
-                    else:
-                        df[col] = 70.0  # 其他价格列默认值
-
-        # 确保指标数据为数值类型
-        for col in columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # 基础指标 - 添加安全检查
-        try:
-            # 实体比例
-            high_low_diff = df[f"{prefix}high"] - df[f"{prefix}low"]
-            # 避免除零错误
-            high_low_diff = high_low_diff.replace(0, 1e-10)
-            df[f"{prefix}body_ratio"] = abs(df[f"{prefix}close"] - df[f"{prefix}open"]) / high_low_diff
-            df[f"{prefix}body_ratio"] = df[f"{prefix}body_ratio"].fillna(0).clip(0, 1)  # 限制在0-1之间
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}实体比例时出错: {e}")
-            df[f"{prefix}body_ratio"] = 0.5
-
-        # RSI指标 - 添加错误处理
-        try:
-            df[f"{prefix}RSI6"] = self._calculate_rsi(df[f"{prefix}close"], 6)
-            df[f"{prefix}RSI12"] = self._calculate_rsi(df[f"{prefix}close"], 12)
-            df[f"{prefix}RSI24"] = self._calculate_rsi(df[f"{prefix}close"], 24)
-
-            # 确保RSI值在合理范围内
-            for col in [f"{prefix}RSI6", f"{prefix}RSI12", f"{prefix}RSI24"]:
-                df[col] = df[col].fillna(50).clip(0, 100)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}RSI时出错: {e}")
-            df[f"{prefix}RSI6"] = 50
-            df[f"{prefix}RSI12"] = 50
-            df[f"{prefix}RSI24"] = 50
-
-        # 移动平均线 - 添加错误处理
-        try:
-            df[f"{prefix}MA_5"] = df[f"{prefix}close"].rolling(window=5, min_periods=1).mean()
-            df[f"{prefix}MA_10"] = df[f"{prefix}close"].rolling(window=10, min_periods=1).mean()
-            df[f"{prefix}MA_20"] = df[f"{prefix}close"].rolling(window=20, min_periods=1).mean()
-
-            # 填充缺失值
-            df[f"{prefix}MA_5"] = df[f"{prefix}MA_5"].fillna(df[f"{prefix}close"])
-            df[f"{prefix}MA_10"] = df[f"{prefix}MA_10"].fillna(df[f"{prefix}close"])
-            df[f"{prefix}MA_20"] = df[f"{prefix}MA_20"].fillna(df[f"{prefix}close"])
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}移动平均线时出错: {e}")
-            df[f"{prefix}MA_5"] = df[f"{prefix}close"]
-            df[f"{prefix}MA_10"] = df[f"{prefix}close"]
-            df[f"{prefix}MA_20"] = df[f"{prefix}close"]
-
-        # 布林带 - 添加错误处理
-        try:
-            std = df[f"{prefix}close"].rolling(window=20, min_periods=1).std()
-            std = std.fillna(df[f"{prefix}close"].std() if df[f"{prefix}close"].std() > 0 else 1.0)
-
-            df[f"{prefix}Bollinger_Upper"] = df[f"{prefix}MA_20"] + 2 * std
-            df[f"{prefix}Bollinger_Lower"] = df[f"{prefix}MA_20"] - 2 * std
-
-            # 确保布林带下轨不为负值
-            df[f"{prefix}Bollinger_Lower"] = df[f"{prefix}Bollinger_Lower"].clip(lower=0.1)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}布林带时出错: {e}")
-            df[f"{prefix}Bollinger_Upper"] = df[f"{prefix}close"] * 1.1
-            df[f"{prefix}Bollinger_Lower"] = df[f"{prefix}close"] * 0.9
-
-        # ROC和动量 - 添加错误处理
-        try:
-            # 避免除零错误
-            close_shift5 = df[f"{prefix}close"].shift(5).replace(0, 1e-10)
-            df[f"{prefix}ROC_5"] = (df[f"{prefix}close"] - df[f"{prefix}close"].shift(5)) / close_shift5
-            df[f"{prefix}ROC_5"] = df[f"{prefix}ROC_5"].fillna(0).clip(-1, 1)  # 限制在-100%到100%之间
-
-            df[f"{prefix}Momentum_10"] = df[f"{prefix}close"] - df[f"{prefix}close"].shift(10)
-            df[f"{prefix}Momentum_10"] = df[f"{prefix}Momentum_10"].fillna(0)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}ROC和动量时出错: {e}")
-            df[f"{prefix}ROC_5"] = 0
-            df[f"{prefix}Momentum_10"] = 0
-
-        # ATR指标 - 添加错误处理
-        try:
-            df[f"{prefix}H-L"] = df[f"{prefix}high"] - df[f"{prefix}low"]
-            df[f"{prefix}H-PC"] = abs(df[f"{prefix}high"] - df[f"{prefix}close"].shift(1))
-            df[f"{prefix}L-PC"] = abs(df[f"{prefix}low"] - df[f"{prefix}close"].shift(1))
-
-            # 填充缺失值
-            df[f"{prefix}H-PC"] = df[f"{prefix}H-PC"].fillna(df[f"{prefix}H-L"])
-            df[f"{prefix}L-PC"] = df[f"{prefix}L-PC"].fillna(df[f"{prefix}H-L"])
+            print(f"⚠️ 缺少数据列: {missing_columns}，将使用默认值填充")
+        if 'close' not in df.columns:
+            print(f"⚠️ 数字货币数据不存在，跳过相关性计算")
 
-            tr = df[[f"{prefix}H-L", f"{prefix}H-PC", f"{prefix}L-PC"]].max(axis=1)
-            df[f"{prefix}ATR"] = tr.rolling(window=14, min_periods=1).mean()
-            df[f"{prefix}ATR"] = df[f"{prefix}ATR"].fillna(tr.mean() if tr.mean() > 0 else 1.0)
+        # 每个商品的指标块独立计算、并发执行，最后一次性拼接
+        df = compute_commodity_indicators(df, prefixes)
 
-            # 删除临时列
-            df.drop(columns=[f"{prefix}H-L", f"{prefix}H-PC", f"{prefix}L-PC"], inplace=True)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}ATR时出错: {e}")
-            df[f"{prefix}ATR"] = 1.0
-
-        # 成交量指标 - 添加错误处理
-        try:
-            df[f"{prefix}Volume_MA_5"] = df[f"{prefix}volume"].rolling(window=5, min_periods=1).mean()
-            df[f"{prefix}Volume_MA_5"] = df[f"{prefix}Volume_MA_5"].fillna(
-                df[f"{prefix}volume"].mean() if df[f"{prefix}volume"].mean() > 0 else 100000.0)
-
-            volume_ma10 = df[f"{prefix}volume"].rolling(window=10, min_periods=1).mean()
-            volume_ma10 = volume_ma10.replace(0, 1e-10)  # 避免除零
-            df[f"{prefix}volume_spike"] = df[f"{prefix}volume"] > volume_ma10 * 1.5
-            df[f"{prefix}volume_spike"] = df[f"{prefix}volume_spike"].fillna(False)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}成交量指标时出错: {e}")
-            df[f"{prefix}Volume_MA_5"] = 100000.0
-            df[f"{prefix}volume_spike"] = False
-
-        # 价格位置指标 - 添加错误处理
-        try:
-            high_low_diff = df[f"{prefix}high"] - df[f"{prefix}low"]
-            high_low_diff = high_low_diff.replace(0, 1e-10)
-            df[f"{prefix}price_position"] = (df[f"{prefix}close"] - df[f"{prefix}low"]) / high_low_diff
-            df[f"{prefix}price_position"] = df[f"{prefix}price_position"].fillna(0.5).clip(0, 1)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}价格位置时出错: {e}")
-            df[f"{prefix}price_position"] = 0.5
-
-        # 相对位置 - 添加错误处理
-        try:
-            ma20 = df[f"{prefix}MA_20"].replace(0, 1e-10)
-            df[f"{prefix}relative_position"] = (df[f"{prefix}close"] - df[f"{prefix}MA_20"]) / ma20
-            df[f"{prefix}relative_position"] = df[f"{prefix}relative_position"].fillna(0).clip(-1, 1)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}相对位置时出错: {e}")
-            df[f"{prefix}relative_position"] = 0
-
-        # 波动率 - 添加错误处理
-        try:
-            close = df[f"{prefix}close"].replace(0, 1e-10)
-            df[f"{prefix}volatility_ratio"] = df[f"{prefix}ATR"] / close
-            df[f"{prefix}volatility_ratio"] = df[f"{prefix}volatility_ratio"].fillna(0.01).clip(0, 0.5)
-
-            close_rolling20 = df[f"{prefix}close"].rolling(20, min_periods=1)
-            std_20 = close_rolling20.std()
-            mean_20 = close_rolling20.mean()
-            mean_20 = mean_20.replace(0, 1e-10)
-            df[f"{prefix}price_volatility"] = std_20 / mean_20
-            df[f"{prefix}price_volatility"] = df[f"{prefix}price_volatility"].fillna(0.01).clip(0, 0.5)
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}波动率时出错: {e}")
-            df[f"{prefix}volatility_ratio"] = 0.01
-            df[f"{prefix}price_volatility"] = 0.01
-
-        # 相关性指标 - 添加错误处理
-        if 'close' in df.columns:
-            try:
-                # 价格相关性（滚动窗口）
-                df[f"{prefix}crypto_price_corr"] = df['close'].rolling(window=20, min_periods=5).corr(df[f"{prefix}close"])
-                df[f"{prefix}crypto_price_corr"] = df[f"{prefix}crypto_price_corr"].fillna(0).clip(-1, 1)
-
-                # 价格比率
-                close = df[f"{prefix}close"].replace(0, 1e-10)
-                df[f"{prefix}crypto_price_ratio"] = df['close'] / close
-                df[f"{prefix}crypto_price_ratio"] = df[f"{prefix}crypto_price_ratio"].fillna(1.0).clip(0.1, 10.0)
-
-                # 收益率相关性
-                crypto_returns = df['close'].pct_change().fillna(0)
-                close_returns = df[f"{prefix}close"].pct_change().fillna(0)
-                df[f"{prefix}crypto_returns_corr"] = crypto_returns.rolling(window=20, min_periods=5).corr(close_returns)
-                df[f"{prefix}crypto_returns_corr"] = df[f"{prefix}crypto_returns_corr"].fillna(0).clip(-1, 1)
-
-                # 波动率比率
-                crypto_vol = df['close'].rolling(20, min_periods=1).std()
-                close_vol = df[f"{prefix}close"].rolling(20, min_periods=1).std()
-                close_vol = close_vol.replace(0, 1e-10)
-                df[f"{prefix}crypto_vol_ratio"] = crypto_vol / close_vol
-                df[f"{prefix}crypto_vol_ratio"] = df[f"{prefix}crypto_vol_ratio"].fillna(1.0).clip(0.1, 10.0)
-
-                # 相对强度比较
-                df[f"{prefix}crypto_rsi_diff"] = df.get('RSI6', 50) - df[f"{prefix}RSI6"]
-                df[f"{prefix}crypto_rsi_diff"] = df[f"{prefix}crypto_rsi_diff"].fillna(0).clip(-100, 100)
-
-                # 趋势一致性
-                crypto_trend = df['close'] > df.get('MA_20', df['close'])
-                close_trend = df[f"{prefix}close"] > df[f"{prefix}MA_20"]
-                df[f"{prefix}crypto_trend_consistency"] = (crypto_trend == close_trend).astype(int)
-                df[f"{prefix}crypto_trend_consistency"] = df[f"{prefix}crypto_trend_consistency"].fillna(0)
-            except Exception as e:
-                print(f"⚠️ 计算{prefix}相关性指标时出错: {e}")
-                # 设置默认值
-                df[f"{prefix}crypto_price_corr"] = 0
-                df[f"{prefix}crypto_price_ratio"] = 1.0
-                df[f"{prefix}crypto_returns_corr"] = 0
-                df[f"{prefix}crypto_vol_ratio"] = 1.0
-                df[f"{prefix}crypto_rsi_diff"] = 0
-                df[f"{prefix}crypto_trend_consistency"] = 0
-        else:
-            print(f"⚠️ 数字货币数据不存在，跳过{prefix}相关性计算")
-            # 设置默认值
-            df[f"{prefix}crypto_price_corr"] = 0
-            df[f"{prefix}crypto_price_ratio"] = 1.0
-            df[f"{prefix}crypto_returns_corr"] = 0
-            df[f"{prefix}crypto_vol_ratio"] = 1.0
-            df[f"{prefix}crypto_rsi_diff"] = 0
-            df[f"{prefix}crypto_trend_consistency"] = 0
-
-        # 市场状态 - 添加错误处理
-        try:
-            df[f"{prefix}market_state"] = np.where(
-                (df[f"{prefix}close"] > df[f"{prefix}MA_20"]) & (df[f"{prefix}RSI6"] > 50),
-                '强势',
-                np.where(
-                    (df[f"{prefix}close"] < df[f"{prefix}MA_20"]) & (df[f"{prefix}RSI6"] < 50),
-                    '弱势',
-                    '震荡'
-                )
-            )
-            df[f"{prefix}market_state"] = df[f"{prefix}market_state"].fillna('震荡')
-        except Exception as e:
-            print(f"⚠️ 计算{prefix}市场状态时出错: {e}")
-            df[f"{prefix}market_state"] = '震荡'
-
-        # 最终检查：确保所有指标列都不包含无穷大或NaN值
-        indicator_columns = [col for col in df.columns if col.startswith(prefix)]
-        for col in indicator_columns:
-            if col in df.columns:
-                # 替换无穷大值
-                df[col] = df[col].replace([np.inf, -np.inf], np.nan)
-                # 根据列类型填充NaN
-                if 'ratio' in col or 'corr' in col or 'position' in col:
-                    df[col] = df[col].fillna(0.5)  # 比率类指标用0.5填充
-                elif 'RSI' in col:
-                    df[col] = df[col].fillna(50)  # RSI用50填充
-                elif 'MA' in col:
-                    df[col] = df[col].fillna(df[f"{prefix}close"])  # 均线用收盘价填充
-                elif 'volume' in col:
-                    df[col] = df[col].fillna(100000.0)  # 成交量用默认值填充
-                else:
-                    df[col] = df[col].fillna(0)  # 其他指标用0填充
-
-        print(f"✅ {prefix}技术指标计算完成")
-        print(f"📊 {prefix}指标列数: {len([col for col in df.columns if col.startswith(prefix)])}")
+        for p in prefixes:
+            print(f"✅ {p}技术指标计算完成")
+            print(f"📊 {p}指标列数: {len([col for col in df.columns if col.startswith(p)])}")
 
         return df
 
@@ -2385,11 +1859,8 @@ class CompleteTradingSystem:
         # 5. 计算基础技术指标（数字货币）
         df = self.calculate_basic_indicators(df)
 
-        # 6. 计算原油相关指标
-        df = self.calculate_indicators(df, prefix='oil_')
-
-        # 7. 计算黄金相关指标
-        df = self.calculate_indicators(df, prefix='gld_')
+        # 6-7. 并发计算原油和黄金相关指标
+        df = self.calculate_indicators(df, prefix=['oil_', 'gld_'])
 
         # 8. 识别SMC结构
         df = self.identify_smc_structure(df)
@@ -2883,193 +2354,72 @@ class CompleteTradingSystem:
         }
 
     def get_commodity_data_by_crypto_timerange(self, crypto_df, crypto_interval='1h', symbol='CL=F', name='原油'):
-        """根据数字货币数据的时间区间获取商品数据（使用Alpha Vantage API，固定使用1小时K线）"""
-        print(f"正在根据数字货币时间区间获取{name}期货价格数据（1小时K线）- 使用Alpha Vantage API...")
+        """根据数字货币数据的时间区间获取单个商品数据（见 get_commodity_frames_by_crypto_timerange）"""
+        prefix = COMMODITY_PREFIXES.get(symbol, symbol.split('=')[0].lower())
+        frames = self.get_commodity_frames_by_crypto_timerange(crypto_df, crypto_interval, {symbol: name})
+        return frames.get(prefix, pd.DataFrame())
+
+    def get_commodity_frames_by_crypto_timerange(self, crypto_df, crypto_interval='1h', symbols=None):
+        """
+        根据数字货币数据的时间区间获取多个商品数据（Yahoo Finance，一次 fetch_range 调用，
+        全部 品种×月份 并发请求，历史月份走本地缓存）
+
+        参数:
+        - crypto_df: 数字货币数据
+        - crypto_interval: 数字货币K线间隔
+        - symbols: {期货代码: 中文名称}，默认原油和黄金
+
+        返回:
+        - {前缀: DataFrame}，如 {'oil': ..., 'gld': ...}；获取失败的品种使用模拟数据
+        """
+        symbols = symbols or {'CL=F': '原油', 'GC=F': '黄金'}
+        names = '、'.join(symbols.values())
+        print(f"正在根据数字货币时间区间获取{names}期货价格数据 - 使用Yahoo Finance API...")
 
         if len(crypto_df) == 0:
-            print(f"❌ 数字货币数据为空，无法获取{name}数据")
-            return pd.DataFrame()
+            print(f"❌ 数字货币数据为空，无法获取{names}数据")
+            return {}
 
         # 获取时间范围
         start_str = crypto_df['open_time'].min().strftime('%Y-%m-%d %H:%M:%S')
         end_str = crypto_df['open_time'].max().strftime('%Y-%m-%d %H:%M:%S')
         print(f"时间范围: {start_str} 至 {end_str}")
 
-        # 计算时间跨度（小时）
-        start_dt = pd.to_datetime(start_str)
-        end_dt = pd.to_datetime(end_str)
-        total_hours = int((end_dt - start_dt).total_seconds() / 3600) + 1
-        print(f"总时间跨度: {total_hours} 小时")
-
-        # 确定批次大小（每批约5000小时，约7个月）
-        batch_hours = 5000
-        batch_count = max(1, (total_hours + batch_hours - 1) // batch_hours)
-        print(f"将数据分成 {batch_count} 个批次获取，每批约 {batch_hours} 小时")
-
-        all_data = []
-        successful_batches = 0
-        min_interval = 12  # API限制：每分钟5次请求，最小间隔12秒
-
-        # 记录每个批次的开始时间
-        batch_start_times = []
-
-        for i in range(batch_count):
-            batch_start = start_dt + pd.Timedelta(hours=batch_hours * i)
-            batch_end = min(batch_start + pd.Timedelta(hours=batch_hours - 1, minutes=59), end_dt)
-            batch_start_str = batch_start.strftime('%Y-%m-%d %H:%M:%S')
-            batch_end_str = batch_end.strftime('%Y-%m-%d %H:%M:%S')
-            print(f"正在获取第 {i+1}/{batch_count} 批 {name}数据: {batch_start_str} 至 {batch_end_str}")
-
-            # 记录批次请求开始时间
-            batch_start_times.append(pd.Timestamp.now())
-
-            # 检查与前一批的间隔时间，确保符合API限制
-            if i > 0:
-                time_since_last_batch = (batch_start_times[i] - batch_start_times[i-1]).total_seconds()
-                if time_since_last_batch < min_interval:
-                    wait_time = min_interval - time_since_last_batch
-                    print(f"⏳ API请求间隔保护: 距离上次请求仅 {time_since_last_batch:.1f} 秒，需等待 {wait_time:.1f} 秒")
-                    time.sleep(wait_time)
-                    batch_start_times[i] = pd.Timestamp.now()
-
-            # 获取该批次的数据
-            batch_data = self.get_historical_data(batch_start_str, batch_end_str, interval='1h', symbol=symbol, name=name)
-
-            if batch_data is not None and len(batch_data) > 0:
-                all_data.append(batch_data)
-                successful_batches += 1
-                print(f"✅ 第 {i+1} 批获取成功，获取 {len(batch_data)} 条数据")
+        fetched = self.commodity_fetcher.fetch_range(list(symbols), start_str, end_str)
+        frames = {}
+        for symbol, name in symbols.items():
+            prefix = COMMODITY_PREFIXES.get(symbol, symbol.split('=')[0].lower())
+            final_df = fetched.get(prefix)
+            if final_df is not None and len(final_df) > 0:
+                close_col = f"{prefix}_close"
+                print(f"🎉 {name}数据获取完成，共 {len(final_df)} 条")
+                print(f"📅 时间范围: {final_df[f'{prefix}_timestamp'].min()} 至 {final_df[f'{prefix}_timestamp'].max()}")
+                print(f"💰 价格范围: ${final_df[close_col].min():.2f} - ${final_df[close_col].max():.2f}")
+                frames[prefix] = final_df
             else:
-                print(f"❌ 第 {i+1} 批获取失败")
-
-            # 如果不是最后一批，添加额外延迟以避免触发API限制
-            if i < batch_count - 1:
-                wait_time = min_interval
-                print(f"⏳ 批次间等待 {wait_time} 秒以避免触发API限制...")
-                time.sleep(wait_time)
-
-        # 合并所有批次的数据
-        if all_data:
-            print(f"🔄 合并 {len(all_data)} 个批次的数据...")
-            final_df = pd.concat(all_data, ignore_index=True)
-
-            # 去重和排序
-            original_count = len(final_df)
-            timestamp_col = f"{name.lower()}_timestamp"
-            final_df = final_df.drop_duplicates(subset=[timestamp_col]).reset_index(drop=True)
-            final_df = final_df.sort_values(timestamp_col).reset_index(drop=True)
-            duplicates_removed = original_count - len(final_df)
+                print(f"❌ {name}所有批次都获取失败，使用模拟数据")
+                print(f"💡 建议: 检查网络连接、API密钥或稍后重试")
+                frames[prefix] = self._create_dummy_commodity_data(start_str, end_str, name=prefix)
+        return frames
 
-            print(f"🎉 批量获取完成！")
-            print(f"📊 处理汇总:")
-            print(f"   - 成功批次: {successful_batches}/{batch_count}")
-            print(f"   - 原始记录: {original_count} 条")
-            print(f"   - 去重后: {len(final_df)} 条 (删除重复: {duplicates_removed})")
-            print(f"   - 数据完整性: {(len(final_df) / max(1, total_hours)) * 100:.1f}% (基于时间跨度)")
-            print(f"📅 时间范围: {final_df[timestamp_col].min()} 至 {final_df[timestamp_col].max()}")
-            close_col = f"{name.lower()}_close"
-            print(f"💰 价格范围: ${final_df[close_col].min():.2f} - ${final_df[close_col].max():.2f}")
-            print(f"⏱️ 请求间隔合规: 所有请求间隔 ≥ {min_interval} 秒")
-
-            return final_df
-        else:
-            print(f"❌ 所有批次都获取失败，使用模拟数据")
-            print(f"💡 建议: 检查网络连接、API密钥或稍后重试")
-            return self._create_dummy_commodity_data(start_str, end_str, name=name.lower())
-
-    def _create_dummy_commodity_data(self, start_str, end_str, name='oil'):
-        """创建模拟商品数据"""
+    def _create_dummy_commodity_data(self, start_str, end_str, name='oil', seed=None):
+        """创建模拟商品数据（1小时间隔，向量化生成）"""
         print(f"正在生成模拟{name}数据...")
 
-        start_dt = pd.to_datetime(start_str)
-        end_dt = pd.to_datetime(end_str)
-        total_hours = int((end_dt - start_dt).total_seconds() / 3600) + 1
-
-        # 随机生成价格数据，原油价格范围在40-90之间，黄金价格范围在1600-2000之间
-        base_price = 65.0 if name == 'oil' else 1800.0
-        data = []
-
-        current_time = start_dt
-        for _ in range(total_hours):
-            if current_time > end_dt:
-                break
-
-            # 价格随机波动
-            price_change = np.random.normal(0, 0.5 if name == 'oil' else 5.0)
-            base_price += price_change
-            if name == 'oil':
-                base_price = max(40.0, min(90.0, base_price))  # 限制在40-90之间
-            else:
-                base_price = max(1600.0, min(2000.0, base_price))  # 限制在1600-2000之间
-
-            open_price = base_price + np.random.uniform(-0.5, 0.5 if name == 'oil' else 5.0)
-            high_price = max(open_price, base_price + np.random.uniform(0, 1.0 if name == 'oil' else 10.0))
-            low_price = min(open_price, base_price - np.random.uniform(0, 1.0 if name == 'oil' else 10.0))
-            close_price = base_price + np.random.uniform(-0.5, 0.5 if name == 'oil' else 5.0)
-            volume = np.random.randint(50000, 200000 if name == 'oil' else 10000, 50000)
-
-            data.append({
-                f"{name}_timestamp": current_time,
-                f"{name}_open": round(open_price, 2),
-                f"{name}_high": round(high_price, 2),
-                f"{name}_low": round(low_price, 2),
-                f"{name}_close": round(close_price, 2),
-                f"{name}_volume": round(volume, 0)
-            })
-
-            current_time += pd.Timedelta(hours=1)
-
-        df = pd.DataFrame(data)
+        date_range = pd.date_range(start=pd.to_datetime(start_str), end=pd.to_datetime(end_str), freq='1h')
+        df = generate_prefixed_ohlcv(date_range, name, seed=seed, **_dummy_commodity_profile(name))
         print(f"✅ 生成了 {len(df)} 条模拟{name}数据，价格范围: ${df[f'{name}_close'].min():.2f} - ${df[f'{name}_close'].max():.2f}")
 
         return df
 
-    def _create_dummy_commodity_data_for_crypto(self, crypto_df, crypto_interval='1h', name='oil'):
-        """根据数字货币数据创建匹配的模拟商品数据"""
+    def _create_dummy_commodity_data_for_crypto(self, crypto_df, crypto_interval='1h', name='oil', seed=None):
+        """根据数字货币数据创建匹配的模拟商品数据（时间戳与数字货币K线一致）"""
         print(f"正在生成与数字货币数据匹配的模拟{name}数据...")
 
         if len(crypto_df) == 0:
             return pd.DataFrame()
 
-        start_dt = crypto_df['open_time'].min()
-        end_dt = crypto_df['open_time'].max()
-        total_hours = int((end_dt - start_dt).total_seconds() / 3600) + 1
-
-        # 随机生成价格数据，原油价格范围在40-90之间，黄金价格范围在1600-2000之间
-        base_price = 65.0 if name == 'oil' else 1800.0
-        data = []
-
-        current_time = start_dt
-        for _ in range(total_hours):
-            if current_time > end_dt:
-                break
-
-            # 价格随机波动
-            price_change = np.random.normal(0, 0.5 if name == 'oil' else 5.0)
-            base_price += price_change
-            if name == 'oil':
-                base_price = max(40.0, min(90.0, base_price))  # 限制在40-90之间
-            else:
-                base_price = max(1600.0, min(2000.0, base_price))  # 限制在1600-2000之间
-
-            open_price = base_price + np.random.uniform(-0.5, 0.5 if name == 'oil' else 5.0)
-            high_price = max(open_price, base_price + np.random.uniform(0, 1.0 if name == 'oil' else 10.0))
-            low_price = min(open_price, base_price - np.random.uniform(0, 1.0 if name == 'oil' else 10.0))
-            close_price = base_price + np.random.uniform(-0.5, 0.5 if name == 'oil' else 5.0)
-            volume = np.random.randint(50000, 200000 if name == 'oil' else 10000, 50000)
-
-            data.append({
-                f"{name}_timestamp": current_time,
-                f"{name}_open": round(open_price, 2),
-                f"{name}_high": round(high_price, 2),
-                f"{name}_low": round(low_price, 2),
-                f"{name}_close": round(close_price, 2),
-                f"{name}_volume": round(volume, 0)
-            })
-
-            current_time += pd.Timedelta(hours=1)
-
-        df = pd.DataFrame(data)
+        df = generate_prefixed_ohlcv(crypto_df['open_time'], name, seed=seed, **_dummy_commodity_profile(name))
         print(f"✅ 生成了 {len(df)} 条与数字货币匹配的模拟{name}数据")
         print(f"时间范围: {df[f'{name}_timestamp'].min()} 至 {df[f'{name}_timestamp'].max()}")
         print(f"价格范围: ${df[f'{name}_close'].min():.2f} - ${df[f'{name}_close'].max():.2f}")
@@ -3097,123 +2447,45 @@ class CompleteTradingSystem:
 
         return commodity_prepared
 
-    def resample_commodity_data_to_match_crypto(self, commodity_df, crypto_df, crypto_interval, name='oil'):
-        """将商品数据重采样以匹配数字货币数据的时间间隔（备用函数）"""
+    def resample_commodity_data_to_match_crypto(self, commodity_df, crypto_df, crypto_interval, name='oil',
+                                                session=None):
+        """将商品数据重采样以匹配数字货币数据的时间间隔（备用函数，支持全部 Binance K线间隔，session 见 ohlcv_resampler）"""
         print(f"正在将{name}数据重采样到 {crypto_interval} 间隔...")
 
-        # 设置时间为索引
-        commodity_df = commodity_df.set_index(f"{name}_timestamp")
-
-        # 根据crypto_interval确定重采样规则
-        if crypto_interval == '1h':
-            resample_rule = '1H'
-        elif crypto_interval == '4h':
-            resample_rule = '4H'
-        elif crypto_interval == '1d':
-            resample_rule = '1D'
-        elif crypto_interval == '1m':
-            resample_rule = '1min'
-        else:
-            resample_rule = '1H'  # 默认1小时
-
-        # 重采样商品数据
-        commodity_resampled = commodity_df.resample(resample_rule).agg({
-            f"{name}_open": 'first',
-            f"{name}_high": 'max',
-            f"{name}_low": 'min',
-            f"{name}_close": 'last',
-            f"{name}_volume": 'sum'
-        })
-
-        # 重置索引
-        commodity_resampled = commodity_resampled.reset_index()
-        commodity_resampled = commodity_resampled.dropna()
+        commodity_resampled = resample_ohlcv(commodity_df, crypto_interval, prefix=f"{name}_",
+                                             time_column=f"{name}_timestamp", session=session).dropna()
 
         print(f"✅ {name}数据重采样完成，共 {len(commodity_resampled)} 条记录")
         return commodity_resampled
 
     def merge_crypto_commodity_data(self, crypto_df, commodity_df, name='oil'):
         """优化的数字货币数据和商品数据合并"""
-        print(f"正在合并数字货币和{name}数据...")
-
-        if len(commodity_df) == 0:
-            print(f"⚠️ {name}数据为空，无法合并")
-            return crypto_df
+        return self.merge_crypto_commodity_frames(crypto_df, {name: commodity_df})
 
-        # 确保时间列为datetime类型
-        crypto_df['open_time'] = pd.to_datetime(crypto_df['open_time'])
-        commodity_df['open_time'] = pd.to_datetime(commodity_df['open_time'])
+    def merge_crypto_commodity_frames(self, crypto_df, commodity_frames):
+        """
+        一次性合并多个商品数据（searchsorted as-of 匹配，所有商品列最后统一拼接）
 
-        print(f"数字货币数据: {len(crypto_df)} 条，时间范围: {crypto_df['open_time'].min()} 至 {crypto_df['open_time'].max()}")
-        print(f"{name}数据: {len(commodity_df)} 条，时间范围: {commodity_df['open_time'].min()} 至 {commodity_df['open_time'].max()}")
+        参数:
+        - crypto_df: 数字货币数据
+        - commodity_frames: {前缀: 已准备好的商品数据（含 open_time）}，如 {'oil': oil_df, 'gld': gold_df}
+        """
+        names = '、'.join(commodity_frames)
+        print(f"正在合并数字货币和{names}数据...")
 
-        # 使用asof合并，找到最接近的商品数据
         crypto_df = crypto_df.sort_values('open_time').reset_index(drop=True)
-        commodity_df = commodity_df.sort_values('open_time').reset_index(drop=True)
-
-        # 先尝试精确匹配
-        merged_df = pd.merge(crypto_df, commodity_df, on='open_time', how='left')
-
-        # 统计匹配情况
-        close_col = f"{name}_close"
-        exact_matches = merged_df[close_col].notna().sum()
-        total_records = len(merged_df)
-        match_rate = exact_matches / total_records * 100
-        print(f"精确匹配率: {match_rate:.1f}% ({exact_matches}/{total_records} 条记录)")
-
-        # 如果匹配率低于50%，使用近似匹配
-        if match_rate < 50:
-            print("精确匹配率较低，使用近似时间匹配...")
-            merged_df = pd.merge_asof(
-                crypto_df, commodity_df,
-                on='open_time',
-                direction='nearest',
-                tolerance=pd.Timedelta(hours=2)  # 允许2小时的时间差
-            )
-
-            # 重新计算匹配率
-            exact_matches = merged_df[close_col].notna().sum()
-            match_rate = exact_matches / total_records * 100
-            print(f"近似匹配后匹配率: {match_rate:.1f}% ({exact_matches}/{total_records} 条记录)")
-
-        # 填充缺失值
-        commodity_columns = [f"{name}_open", f"{name}_high", f"{name}_low", f"{name}_close", f"{name}_volume"]
-
-        missing_before = merged_df[commodity_columns].isna().sum().sum()
-
-        # 前向填充
-        merged_df[commodity_columns] = merged_df[commodity_columns].ffill()
-
-        # 后向填充（处理开头的缺失值）
-        merged_df[commodity_columns] = merged_df[commodity_columns].bfill()
-
-        # 如果还有缺失值，用均值填充
-        for col in commodity_columns:
-            if merged_df[col].isna().any():
-                mean_value = merged_df[col].mean()
-                if not np.isnan(mean_value):
-                    merged_df[col] = merged_df[col].fillna(mean_value)
-                else:
-                    # 如果均值不可用，使用默认值
-                    if 'volume' in col:
-                        merged_df[col] = merged_df[col].fillna(100000.0)
-                    elif 'close' in col:
-                        merged_df[col] = merged_df[col].fillna(70.0 if name == 'oil' else 1800.0)
-                    else:
-                        merged_df[col] = merged_df[col].fillna(0.0)
-
-        missing_after = merged_df[commodity_columns].isna().sum().sum()
-        print(f"缺失值处理: 处理前 {missing_before} 个缺失值，处理后 {missing_after} 个缺失值")
+        sources = [self._commodity_merge_source(frame, name) for name, frame in commodity_frames.items()]
+        merged_df = merge_exogenous(crypto_df, sources)
 
         if len(merged_df) != len(crypto_df):
             print("⚠️ 警告：合并后数据量发生变化")
 
         # 显示商品数据范围
-        if merged_df[close_col].notna().any():
-            commodity_min = merged_df[close_col].min()
-            commodity_max = merged_df[close_col].max()
-            commodity_mean = merged_df[close_col].mean()
-            print(f"合并后{name}价格范围: ${commodity_min:.2f} - ${commodity_max:.2f}，均值: ${commodity_mean:.2f}")
+        for name in commodity_frames:
+            close_col = f"{name}_close"
+            if close_col in merged_df and merged_df[close_col].notna().any():
+                print(f"合并后{name}价格范围: ${merged_df[close_col].min():.2f} - ${merged_df[close_col].max():.2f}，"
+                      f"均值: ${merged_df[close_col].mean():.2f}")
 
         return merged_df
 
@@ -3238,13 +2510,12 @@ class CompleteTradingSystem:
         print(f"✅ 数字货币数据获取完成，共 {len(df)} 条记录")
         print(f"数字货币时间范围: {df['open_time'].min()} 至 {df['open_time'].max()}")
 
-        # 2. 根据数字货币数据的时间区间获取原油数据
-        print("\n开始根据数字货币时间区间获取原油数据...")
-        oil_df = self.get_commodity_data_by_crypto_timerange(df, interval, symbol='CL=F', name='原油')
-
-        # 3. 根据数字货币数据的时间区间获取黄金数据
-        print("\n开始根据数字货币时间区间获取黄金数据...")
-        gold_df = self.get_commodity_data_by_crypto_timerange(df, interval, symbol='GC=F', name='黄金')
+        # 2-3. 根据数字货币数据的时间区间并发获取原油和黄金数据
+        print("\n开始根据数字货币时间区间获取原油和黄金数据...")
+        commodity_frames = self.get_commodity_frames_by_crypto_timerange(df, interval,
+                                                                         {'CL=F': '原油', 'GC=F': '黄金'})
+        oil_df = commodity_frames.get('oil', pd.DataFrame())
+        gold_df = commodity_frames.get('gld', pd.DataFrame())
 
         # 4. 准备原油数据以便合并
         if len(oil_df) > 0:
@@ -3262,22 +2533,15 @@ class CompleteTradingSystem:
             gold_resampled = self._create_dummy_commodity_data_for_crypto(df, interval, name='gld')
             gold_resampled = self.prepare_commodity_data_for_merge(gold_resampled, df, name='gld')
 
-        # 6. 合并数字货币和原油数据
-        print("\n开始合并数字货币和原油数据...")
-        df = self.merge_crypto_commodity_data(df, oil_resampled, name='oil')
-
-        # 7. 合并数字货币和黄金数据
-        print("\n开始合并数字货币和黄金数据...")
-        df = self.merge_crypto_commodity_data(df, gold_resampled, name='gld')
+        # 6-7. 一次性合并数字货币、原油和黄金数据
+        print("\n开始合并数字货币、原油和黄金数据...")
+        df = self.merge_crypto_commodity_frames(df, {'oil': oil_resampled, 'gld': gold_resampled})
 
         # 8. 计算基础技术指标（数字货币）
         df = self.calculate_basic_indicators(df)
 
-        # 9. 计算原油相关指标
-        df = self.calculate_indicators(df, prefix='oil_')
-
-        # 10. 计算黄金相关指标
-        df = self.calculate_indicators(df, prefix='gld_')
+        # 9-10. 并发计算原油和黄金相关指标
+        df = self.calculate_indicators(df, prefix=['oil_', 'gld_'])
 
         # 11. 识别SMC结构
         df = self.identify_smc_structure(df)
@@ -3319,6 +2583,7 @@ class CompleteTradingSystem:
         # 18. 保存结果
         output_file = f"complete_dataset_{symbol}_{interval}_with_commodity_data.csv"
         df.to_csv(output_file, index=False)
+        self.feature_store.save(df, symbol, interval, assets=self.feature_store_config['assets'])
 
         # 19. 输出统计信息
         self._print_statistics(df, output_file)
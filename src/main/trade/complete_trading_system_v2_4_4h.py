@@ -1,5 +1,4 @@
 import os
-import requests
 import pandas as pd
 import numpy as np
 import decimal
@@ -8,6 +7,9 @@ import logging
 import warnings
 from sklearn.preprocessing import MinMaxScaler
 from src.main.utils.sql_util import MySQLUtil
+from src.main.utils.synthetic_market_data import generate_ohlcv
+from src.main.utils.http_client import get_session
+from src.main.utils.exogenous_feature_store import DEFAULT_FEATURE_STORE_CONFIG, ExogenousFeatureStore
 
 warnings.filterwarnings('ignore')
 
@@ -25,8 +27,19 @@ logger = logging.getLogger(__name__)
 class CompleteTradingSystem:
     """完整的数字货币量化交易系统"""
 
-    def __init__(self):
+    def __init__(self, feature_store_config=None):
+        """
+        参数：
+        - feature_store_config: 覆盖 DEFAULT_FEATURE_STORE_CONFIG 的外生特征存储配置，
+          须与离线写入特征的 01_complete_trading_system_v2.4_4h_oil_gold 一致
+        """
         self.base_url = 'https://api.binance.com/api/v3/klines'
+        # 实盘预热后的内存状态: (symbol, interval) -> {'raw', 'indicators', 'window'}
+        self.live_state = {}
+        # 外生特征（oil_*、gld_*）由离线流程写入特征存储，实盘收盘后按需拼接
+        self.feature_store_config = {**DEFAULT_FEATURE_STORE_CONFIG, **(feature_store_config or {})}
+        self.feature_store = (ExogenousFeatureStore.from_config(self.feature_store_config)
+                              if self.feature_store_config['enabled'] else None)
 
     def get_historical_data(self, symbol, interval, start_str, end_str=None, limit=1000):
         """获取历史K线数据"""
@@ -47,11 +60,7 @@ class CompleteTradingSystem:
                 params['endTime'] = end_time
 
             try:
-                proxies = {
-                    'http': 'socks5h://127.0.0.1:7890',
-                    'https': 'socks5h://127.0.0.1:7890'
-                }
-                response = requests.get(self.base_url, params=params, timeout=60, proxies=proxies)
+                response = get_session('binance').get(self.base_url, params=params, timeout=60)
                 response.raise_for_status()
                 klines = response.json()
 
@@ -72,24 +81,8 @@ class CompleteTradingSystem:
 
         if not all_klines:
             print("❌ 未能获取到数据，使用示例数据")
-            # 创建示例数据
-            dates = pd.date_range(start=start_str, periods=1000, freq='4H')
-            np.random.seed(42)
-            base_price = 2000
-            prices = []
-            for i in range(1000):
-                change = np.random.normal(0, 0.02)
-                base_price *= (1 + change)
-                prices.append(base_price)
-
-            df = pd.DataFrame({
-                'open_time': dates,
-                'open': prices,
-                'high': [p * (1 + abs(np.random.normal(0, 0.01))) for p in prices],
-                'low': [p * (1 - abs(np.random.normal(0, 0.01))) for p in prices],
-                'close': [p * (1 + np.random.normal(0, 0.005)) for p in prices],
-                'volume': [np.random.uniform(1000, 10000) for _ in range(1000)]
-            })
+            # 创建示例数据（固定 seed 的合成行情，含状态切换和波动率聚集）
+            df = generate_ohlcv(1000, start=start_str, freq='4h', start_price=2000, seed=42)
         else:
             df = pd.DataFrame(all_klines, columns=[
                 'open_time', 'open', 'high', 'low', 'close', 'volume',
@@ -1431,57 +1424,26 @@ class CompleteTradingSystem:
 
         return df
 
-    def process_complete_system(self, symbol, interval, kline_info):
-        """完整的交易系统处理流程"""
-        logger.info(f"🚀 开始处理 {symbol} {interval} 完整交易系统...")
-        start_time = time.time()
-        last_row = MySQLUtil.fetch_dataframe('kline_data',
+    def _fetch_kline_window(self, symbol, interval, limit=2000):
+        """从数据库获取最近 limit 条K线（按时间正序，Decimal 转为 float）"""
+        df = MySQLUtil.fetch_dataframe('kline_data',
                                        conditions={'symbol': ('=', symbol), '`interval`': ('=', interval)},
-                                       order_by='open_time desc', limit=1)
+                                       order_by='open_time desc', limit=limit)
         # 把所有 Decimal 类型的列转换为 float
-        last_row = last_row.applymap(lambda x: float(x) if isinstance(x, decimal.Decimal) else x)
-
-        # 获取最后一条
-        if not last_row.empty:
-            new_id = last_row['id'].iloc[-1] + 1
-        else:
-            new_id = 1  # 如果df为空，默认从1开始
-
-        new_row = {
-            'symbol': {symbol},
-            'interval': {interval},
-            'id': {new_id},
-            'open_time': kline_info['open_time'],
-            'open': kline_info['open'],
-            'close': kline_info['close'],
-            'high': kline_info['high'],
-            'low': kline_info['low'],
-            'volume': kline_info['volume'],
-            'create_datetime': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-
+        df = df.map(lambda x: float(x) if isinstance(x, decimal.Decimal) else x)
+        # 按 datetime 正序排序,防止时序错误
+        return df[::-1].reset_index(drop=True)  # 反转为正序
 
-        insert_status=MySQLUtil.insert('kline_data', {k: new_row[k] for k in
-                                        ['id', 'symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close',
-                                         'volume', 'create_datetime']
-                                        })
+    def _run_indicator_pipeline(self, df):
+        """在K线窗口上执行完整的指标计算与标签生成流程"""
+        df = self.compute_feature_frame(df)
 
-        logger.info(f"插入最新一条K线数据成功: {insert_status}, detl：{new_row}")
-        #1.从新拉取写入后的所有数据，原有数据+1条新增
-        df = MySQLUtil.fetch_dataframe('kline_data',
-                                             conditions={'symbol': ('=', symbol), '`interval`': ('=', interval)},
-                                             order_by='open_time desc', limit=2000)
-        # 把所有 Decimal 类型的列转换为 float
-        df = df.applymap(lambda x: float(x) if isinstance(x, decimal.Decimal) else x)
-        # 按 datetime 正序排序,防止时序错误
-        #df = df.sort_values(by='open_time', ascending=True)
-        df = df[::-1].reset_index(drop=True)  # 反转为正序
+        # 9. 生成标签
+        df = self.generate_smc_labels(df)
+        return df
 
-        if len(df) == 0:
-            logger.error("❌ 没有获取到数据，无法继续处理")
-            return None
-        else:
-            logger.info(f"从数据库获取数据总条数：{len(df)}, start:{df.iloc[0]['open_time']},  end: {df.iloc[-1]['open_time']}")
+    def compute_feature_frame(self, df):
+        """计算生成标签前的全部特征（步骤2~8），结果可缓存后反复用于标签评估"""
         # 2. 计算基础技术指标
         df = self.calculate_basic_indicators(df)
 
@@ -1508,9 +1470,115 @@ class CompleteTradingSystem:
         # 8. 删除前50行（确保所有指标计算完整）
         if len(df) > 50:
             df = df.iloc[50:].reset_index(drop=True)
+        return df
 
-        # 9. 生成标签
-        df = self.generate_smc_labels(df)
+    def join_exogenous_features(self, df, symbol, interval):
+        """把特征存储中的外生特征拼回指标宽表（未开启或读取失败时原样返回）"""
+        if self.feature_store is None:
+            return df
+        try:
+            return self.feature_store.join(df, symbol, interval, assets=self.feature_store_config['assets'],
+                                           columns=self.feature_store_config['columns'])
+        except Exception as e:
+            logger.warning(f"⚠️ {symbol} {interval} 拼接外生特征失败，只使用数字货币特征: {e}")
+            return df
+
+    def _next_kline_id(self, symbol, interval):
+        """新K线的ID：每次都以数据库中该交易对最新一条为准，避免多个写入方时ID冲突"""
+        last_row = MySQLUtil.fetch_dataframe('kline_data',
+                                             conditions={'symbol': ('=', symbol), '`interval`': ('=', interval)},
+                                             columns=['id'], order_by='open_time desc', limit=1)
+        return int(last_row['id'].iloc[-1]) + 1 if not last_row.empty else 1
+
+    def warm_up(self, symbol, interval, window=2000):
+        """
+        启动预热：一次性加载最近 window 条K线并计算指标，结果常驻内存。
+
+        预热后 process_complete_system 不再每根K线都回查整个K线窗口，只把新K线追加到内存窗口；
+        indicators 供盘中信号评估（IntrabarSignalEvaluator）使用。
+        收盘后的指标仍在整个内存窗口上重算：SMC结构、LuxAlgo、标签等依赖整段窗口，
+        逐根增量计算与全量结果不一致，这里只省去数据库往返。
+
+        返回:
+        - 预热耗时（秒）
+        """
+        start_time = time.time()
+        raw_df = self._fetch_kline_window(symbol, interval, window)
+        if len(raw_df) == 0:
+            logger.warning(f"⚠️ {symbol} {interval} 数据库中没有K线数据，跳过预热")
+            return time.time() - start_time
+
+        indicator_df = self._run_indicator_pipeline(raw_df.copy())
+        self.live_state[(symbol, interval)] = {
+            'window': window,
+            'raw': raw_df,
+            'indicators': indicator_df,
+        }
+
+        elapsed = time.time() - start_time
+        logger.info(f"🔥 {symbol} {interval} 预热完成: 加载 {len(raw_df)} 条K线，"
+                    f"{raw_df.iloc[0]['open_time']} ~ {raw_df.iloc[-1]['open_time']}，耗时 {elapsed:.3f} 秒")
+        return elapsed
+
+    def process_complete_system(self, symbol, interval, kline_info):
+        """完整的交易系统处理流程"""
+        logger.info(f"🚀 开始处理 {symbol} {interval} 完整交易系统...")
+        start_time = time.time()
+        state = self.live_state.get((symbol, interval))
+
+        new_id = self._next_kline_id(symbol, interval)
+
+        new_row = {
+            'symbol': {symbol},
+            'interval': {interval},
+            'id': {new_id},
+            'open_time': kline_info['open_time'],
+            'open': kline_info['open'],
+            'close': kline_info['close'],
+            'high': kline_info['high'],
+            'low': kline_info['low'],
+            'volume': kline_info['volume'],
+            'create_datetime': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+        insert_status=MySQLUtil.insert('kline_data', {k: new_row[k] for k in
+                                        ['id', 'symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close',
+                                         'volume', 'create_datetime']
+                                        })
+
+        logger.info(f"插入最新一条K线数据成功: {insert_status}, detl：{new_row}")
+        if state is not None:
+            #1.已预热：把新K线追加到内存窗口，超出窗口的旧K线丢弃
+            appended = pd.DataFrame([{
+                'id': new_id,
+                'symbol': symbol,
+                'interval': interval,
+                'open_time': kline_info['open_time'],
+                'open': kline_info['open'],
+                'high': kline_info['high'],
+                'low': kline_info['low'],
+                'close': kline_info['close'],
+                'volume': kline_info['volume'],
+                'create_datetime': new_row['create_datetime']
+            }])
+            raw_df = pd.concat([state['raw'], appended], ignore_index=True)
+            state['raw'] = raw_df.iloc[-state['window']:].reset_index(drop=True)
+            df = state['raw'].copy()
+        else:
+            #1.从新拉取写入后的所有数据，原有数据+1条新增
+            df = self._fetch_kline_window(symbol, interval, 2000)
+
+        if len(df) == 0:
+            logger.error("❌ 没有获取到数据，无法继续处理")
+            return None
+        else:
+            logger.info(f"K线窗口数据总条数：{len(df)}, start:{df.iloc[0]['open_time']},  end: {df.iloc[-1]['open_time']}")
+
+        # 2-9. 计算指标并生成标签
+        df = self._run_indicator_pipeline(df)
+        if state is not None:
+            state['indicators'] = df
 
         # 显示所有列
         pd.set_option('display.max_columns', None)
@@ -1534,6 +1602,9 @@ class CompleteTradingSystem:
             f"{result[columns].to_string(index=False)}"
         )
 
+        # 外生特征单独存储，不写入 complete_tech_indicators，只拼到返回的宽表上
+        df = self.join_exogenous_features(df, symbol, interval)
+
         # 10. 保存结果
         #output_file = f"complete_dataset_{symbol}_{interval}_squeeze_luxalgo_advanced1_chk.csv"
         # df.dropna(inplace=True)
@@ -0,0 +1,116 @@
+import numpy as np
+
+# 与 generate_smc_labels 中的动态阈值保持一致（归一化后的RSI6）
+RSI_LOWER_BOUND = 0.3
+RSI_UPPER_BOUND = 0.65
+
+
+class IntrabarSignalEvaluator:
+    """
+    盘中（未完成K线）信号评估器。
+
+    基于最近一根已完成K线时的指标状态（CMACD 的 EMA、最近的 MACD 值、RSI6 的平滑涨跌幅）
+    做 O(1) 的增量推算，只评估 CMACD 金叉/死叉、RSI6 阈值这类廉价信号，
+    不触发完整的指标流水线。实例创建后不会被修改，评估结果也不会写回已提交的状态。
+    """
+
+    CMACD_FAST = 12
+    CMACD_SLOW = 26
+    CMACD_SIGNAL = 9
+    RSI_PERIOD = 6
+
+    def __init__(self, last_close, fast_ema, slow_ema, recent_macd, prev_macd, prev_signal,
+                 avg_gain, avg_loss, rsi_min, rsi_max, open_time=None):
+        self.last_close = float(last_close)
+        self.fast_ema = float(fast_ema)
+        self.slow_ema = float(slow_ema)
+        # 最近 CMACD_SIGNAL - 1 根已完成K线的 MACD 值，用于计算盘中 SMA 信号线
+        self.recent_macd = np.asarray(recent_macd, dtype=float)
+        self.prev_macd = float(prev_macd)
+        self.prev_signal = float(prev_signal)
+        self.avg_gain = float(avg_gain)
+        self.avg_loss = float(avg_loss)
+        self.rsi_min = float(rsi_min)
+        self.rsi_max = float(rsi_max)
+        self.open_time = open_time
+
+    @classmethod
+    def from_indicator_frame(cls, df):
+        """从 process_complete_system / warm_up 产出的指标DataFrame构建已提交状态的快照"""
+        if df is None or len(df) < cls.CMACD_SIGNAL:
+            return None
+
+        close = df['close'].astype(float)
+        # 与 _calculate_rsi 相同的平滑方式；窗口足够长时 ewm(adjust=True) 与递推形式一致
+        delta = close.diff()
+        alpha = 1 / cls.RSI_PERIOD
+        avg_gain = delta.where(delta > 0, 0).ewm(alpha=alpha, min_periods=cls.RSI_PERIOD).mean()
+        avg_loss = (-delta.where(delta < 0, 0)).ewm(alpha=alpha, min_periods=cls.RSI_PERIOD).mean()
+
+        last = df.iloc[-1]
+        macd = df['CMACD_macd'].astype(float).to_numpy()
+        return cls(
+            last_close=last['close'],
+            fast_ema=last['CMACD_fast_ema'],
+            slow_ema=last['CMACD_slow_ema'],
+            recent_macd=macd[-(cls.CMACD_SIGNAL - 1):],
+            prev_macd=last['CMACD_macd'],
+            prev_signal=last['CMACD_signal'],
+            avg_gain=avg_gain.iloc[-1],
+            avg_loss=avg_loss.iloc[-1],
+            rsi_min=df['RSI6'].min(),
+            rsi_max=df['RSI6'].max(),
+            open_time=last.get('open_time'),
+        )
+
+    def evaluate(self, price, rsi_lower=RSI_LOWER_BOUND, rsi_upper=RSI_UPPER_BOUND):
+        """
+        用未完成K线的最新价格推算临时指标并评估预警信号
+
+        参数:
+        - price: 当前未完成K线的最新价格（收盘价）
+        - rsi_lower / rsi_upper: 归一化RSI6的超卖/超买阈值
+
+        返回:
+        - 包含临时指标值和预警列表的字典
+        """
+        price = float(price)
+
+        # CMACD：EMA 增量递推 + SMA 信号线
+        fast_alpha = 2 / (self.CMACD_FAST + 1)
+        slow_alpha = 2 / (self.CMACD_SLOW + 1)
+        fast_ema = self.fast_ema + fast_alpha * (price - self.fast_ema)
+        slow_ema = self.slow_ema + slow_alpha * (price - self.slow_ema)
+        macd = fast_ema - slow_ema
+        signal = float((self.recent_macd.sum() + macd) / (len(self.recent_macd) + 1))
+
+        # RSI6：Wilder 平滑增量递推
+        delta = price - self.last_close
+        rsi_alpha = 1 / self.RSI_PERIOD
+        avg_gain = self.avg_gain + rsi_alpha * (max(delta, 0.0) - self.avg_gain)
+        avg_loss = self.avg_loss + rsi_alpha * (max(-delta, 0.0) - self.avg_loss)
+        rsi6 = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+        # 与 _create_normalized_label_data 一致：按窗口（含临时K线）做 Min-Max 归一化
+        rsi_min = min(self.rsi_min, rsi6)
+        rsi_max = max(self.rsi_max, rsi6)
+        rsi6_norm = (rsi6 - rsi_min) / (rsi_max - rsi_min) if rsi_max > rsi_min else 0.0
+
+        warnings = []
+        if macd > signal and self.prev_macd <= self.prev_signal:
+            warnings.append('CMACD金叉(盘中)')
+        elif macd < signal and self.prev_macd >= self.prev_signal:
+            warnings.append('CMACD死叉(盘中)')
+        if rsi6_norm < rsi_lower:
+            warnings.append('RSI6超卖(盘中)')
+        elif rsi6_norm > rsi_upper:
+            warnings.append('RSI6超买(盘中)')
+
+        return {
+            'price': price,
+            'CMACD_macd': macd,
+            'CMACD_signal': signal,
+            'RSI6': rsi6,
+            'RSI6_norm': rsi6_norm,
+            'warnings': warnings,
+        }
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+# 与 generate_smc_labels 中 determine_label 的规则顺序、说明和权重一一对应
+BUY_RULES = [
+    ('底部动能确认', 13),
+    ('底部动能确认', 10),
+    ('底部bos确认', 8),
+    ('结构突破+动能确认', 5),
+    ('CMACD金叉+动能增强', 6),
+    ('超跌反弹确认', 4),
+    ('支撑确认', 3),
+    ('低位资金流入', 4),
+    ('大阳线反转', 4),
+]
+SELL_RULES = [
+    ('顶部动能确认', 10),
+    ('结构破坏', 4),
+    ('动量衰竭', 5),
+    ('RSI-CMACD背离', 6),
+    ('价格顶部', 5),
+    ('成交量萎缩', 4),
+    ('趋势反转', 4),
+    ('支撑破位', 3),
+    ('超买区域', 5),
+]
+
+# determine_label 中的默认得分门槛
+DEFAULT_MIN_BUY_SCORE = 15
+DEFAULT_MIN_SELL_SCORE = 12
+
+# determine_label 中用 row[...] 直接取值的列，缺失时整行走异常分支（标签为0）
+_REQUIRED_COLUMNS = [
+    'SMC_is_CHoCH_High', 'SMC_swept_prev_low', 'RSI6', 'momentum_ratio', 'volume_ratio',
+    'CMACD_macd', 'CMACD_signal', 'high', 'MA_20', 'body_ratio', 'close', 'open', 'MA_5', 'MA_10',
+    'trend_strength', 'support_distance', 'K', 'drawdown_ratio', 'volatility_ratio', 'volume_volatility',
+]
+
+
+def _column(label_df, name, default=np.nan):
+    """等价于 row.get(name, default) 的列取值（转为 float，None 视为 NaN）"""
+    if name not in label_df.columns:
+        return np.full(len(label_df), np.nan if default is None else default, dtype=float)
+    return pd.to_numeric(label_df[name], errors='coerce').to_numpy(dtype=float)
+
+
+def _is_true(label_df, name):
+    """等价于 row.get(name) == True"""
+    if name not in label_df.columns:
+        return np.zeros(len(label_df), dtype=bool)
+    return (label_df[name] == True).to_numpy(dtype=bool)
+
+
+def compute_rule_masks(label_df):
+    """
+    向量化计算 determine_label 中每条买入/卖出规则是否成立
+
+    参数：
+    - label_df: _create_normalized_label_data 输出的归一化数据框
+
+    返回：
+    - 字典: buy（n×9 布尔矩阵）、sell（n×9 布尔矩阵）、risk_score（风险因子个数）、
+      error（原逐行实现中会进入异常分支的行，标签固定为0）
+    """
+    def col(name, default=0):
+        return _column(label_df, name, default)
+
+    open_ = col('open')
+    close = col('close')
+    high = col('high')
+    rsi6 = col('RSI6')
+    rsi24 = col('RSI24')
+    macd = col('CMACD_macd')
+    signal = col('CMACD_signal')
+    histogram = col('CMACD_histogram')
+    volume_ratio = col('volume_ratio')
+    body_ratio = col('body_ratio')
+    bos_low = _is_true(label_df, 'SMC_is_BOS_Low')
+    bos_low_value = col('SMC_BOS_Low_Value')
+    bos_high_value = col('SMC_BOS_High_Value')
+    low_gap = np.abs(open_ - bos_low_value)
+
+    with np.errstate(invalid='ignore'):
+        buy = np.column_stack([
+            bos_low & (low_gap <= bos_low_value * 0.04) & (macd < signal) & (rsi6 < rsi24) & (col('J') < col('K')),
+            bos_low & (low_gap <= bos_low_value * 0.02),
+            bos_low & (histogram < 0.5) & (rsi6 < rsi24) & (macd < signal),
+            bos_low & (histogram < 0.5) & (rsi6 < 0.5),
+            _is_true(label_df, 'CMACD_cross_up') & (col('CMACD_histogram', -1) > col('CMACD_histogram_prev', -2))
+            & (col('CMACD_histogram', -1) > 0) & (rsi6 < 0.55),
+            (rsi6 < 0.4) & (volume_ratio > 1.2) & (body_ratio > 0.6) & (close > open_),
+            (close > col('MA_10')) & (col('support_distance', 1) < 0.25) & (rsi6 < 0.6),
+            (col('money_flow_volume') > 0.5) & (volume_ratio > 1.2) & (rsi6 < 0.5),
+            (body_ratio > 0.8) & (close > open_) & (rsi6 < 0.6),
+        ])
+
+        momentum_ratio = col('momentum_ratio')
+        ma_20 = col('MA_20')
+        sell = np.column_stack([
+            _is_true(label_df, 'SMC_is_BOS_High') & (np.abs(open_ - bos_high_value) <= bos_high_value * 0.02),
+            _is_true(label_df, 'SMC_is_CHoCH_High') | _is_true(label_df, 'SMC_swept_prev_low'),
+            (rsi6 > 0.8) & (momentum_ratio < -0.3) & (volume_ratio < 0.6),
+            (rsi6 > 0.75) & (macd < signal) & (volume_ratio < 0.7),
+            (high > ma_20 * 1.05) & (body_ratio < 0.4) & (volume_ratio < 0.8),
+            (volume_ratio < 0.5) & (close < open_) & (rsi6 > 0.7),
+            (col('MA_5') < col('MA_10')) & (momentum_ratio < -0.2) & (col('trend_strength') < 0.3),
+            (close < ma_20) & (col('support_distance') > 0.5),
+            (rsi6 > 0.85) & (col('K') > 0.8) & (volume_ratio < 0.6),
+        ])
+
+        risk_score = ((col('drawdown_ratio') > 0.5).astype(int) + (col('volatility_ratio') > 0.6).astype(int)
+                      + (col('volume_volatility') > 0.7).astype(int))
+
+    missing = [name for name in _REQUIRED_COLUMNS if name not in label_df.columns]
+    error = np.full(len(label_df), bool(missing))
+    return {'buy': buy, 'sell': sell, 'risk_score': risk_score, 'error': error}
+
+
+def score_labels(masks, min_buy_score=DEFAULT_MIN_BUY_SCORE, min_sell_score=DEFAULT_MIN_SELL_SCORE,
+                 buy_weights=None, sell_weights=None):
+    """
+    根据缓存的规则矩阵和门槛生成标签（每次调参只需重算这一步）
+
+    返回：
+    - (label 整数数组, confidence 数组)，与 determine_label 的 label / confidence 一致
+    """
+    buy_weights = np.asarray(buy_weights if buy_weights is not None else [w for _, w in BUY_RULES], dtype=float)
+    sell_weights = np.asarray(sell_weights if sell_weights is not None else [w for _, w in SELL_RULES], dtype=float)
+    buy_score = masks['buy'] @ buy_weights
+    sell_score = masks['sell'] @ sell_weights
+
+    is_buy = (buy_score >= min_buy_score) & (buy_score > sell_score) & ~masks['error']
+    is_sell = ~is_buy & (sell_score >= min_sell_score) & (sell_score > buy_score) & ~masks['error']
+
+    label = np.where(is_buy, 1, np.where(is_sell, 2, 0))
+    confidence = np.where(is_buy, np.minimum(buy_score / 30, 1.0),
+                          np.where(is_sell, np.minimum(sell_score / 30, 1.0), 0.5))
+    return label, confidence
@@ -21,6 +21,22 @@ def main():
                        help='是否保存数据到CSV文件')
     parser.add_argument('--test', action='store_true',
                        help='运行测试模式')
+    parser.add_argument('--bar-type', choices=['time', 'volume', 'dollar'],
+                       help='基于逐笔成交(@aggTrade)在本地构建K线的类型，不设置则直接订阅币安K线')
+    parser.add_argument('--bar-interval', default='1m',
+                       help='本地时间K线周期，支持秒级，如 15s (默认: 1m)')
+    parser.add_argument('--bar-threshold', type=float,
+                       help='成交量/成交额K线的阈值')
+    parser.add_argument('--intrabar', action='store_true',
+                       help='开启盘中信号评估（未完成K线）')
+    parser.add_argument('--intrabar-throttle', type=float, default=1.0,
+                       help='盘中信号评估的最小间隔秒数 (默认: 1.0)')
+    parser.add_argument('--record', metavar='PATH',
+                       help='录制收到的原始WebSocket帧到指定文件，用于离线回放')
+    parser.add_argument('--ws-url',
+                       help='WebSocket地址，回放测试时指向本地回放服务，如 ws://127.0.0.1:8765')
+    parser.add_argument('--no-proxy', action='store_true',
+                       help='不通过本地HTTP代理连接')
     
     args = parser.parse_args()
     
@@ -36,7 +52,14 @@ def main():
     
     try:
         # 创建WebSocket客户端
-        client = SimpleBinanceWebSocket(args.symbols, args.interval)
+        trade_bars = None
+        if args.bar_type:
+            trade_bars = {'bar_type': args.bar_type, 'interval': args.bar_interval, 'threshold': args.bar_threshold}
+
+        client = SimpleBinanceWebSocket(args.symbols, args.interval,
+                                        intrabar=args.intrabar, intrabar_throttle=args.intrabar_throttle,
+                                        trade_bars=trade_bars, websocket_url=args.ws_url,
+                                        use_proxy=not args.no_proxy, record_path=args.record)
         
         if args.test:
             # 测试模式：运行5分钟
@@ -44,9 +67,13 @@ def main():
             import threading
             import time
             
+            # 连接前先完成指标预热
+            client.warm_up()
+
             ws_thread = threading.Thread(target=client.connect)
             ws_thread.daemon = True
             ws_thread.start()
+            client.start_bar_flush_timer()
             
             # 等待连接建立
             time.sleep(5)
@@ -70,6 +97,15 @@ def main():
                         print(f"{symbol}: 价格 {current_kline['close']}, 已接收 {len(klines)} 条K线")
             
             print("测试完成！")
+            stats = client.latency_stats.summary()
+            print(f"消息数: {stats['messages']}, K线信号数: {stats['signals']}, "
+                  f"吞吐: {stats['throughput_msg_per_s']:.1f} 条/秒")
+            for name, latency in (('消息处理延迟', stats['message_latency']), ('信号计算延迟', stats['signal_latency'])):
+                if latency:
+                    print(f"{name} p50/p95/p99/max: {latency['p50_ms']:.2f}/{latency['p95_ms']:.2f}/"
+                          f"{latency['p99_ms']:.2f}/{latency['max_ms']:.2f} ms")
+            if client.recorder:
+                client.recorder.close()
             
             if args.save:
                 for symbol in args.symbols:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品期货行情本地缓存：按 (品种, K线间隔) 分目录，每个自然月（UTC）一个文件
+
+- 已结束的月份（超过结算宽限期）且在结束后写入的缓存视为不可变，命中后永不重新请求；
+  月中写入的部分数据在月份结束后重新请求一次
+- 当前月份的数据仍在增长，文件超过 ttl 秒后重新请求
+- 安装了 pyarrow 时存 Parquet，否则退化为 pickle
+
+目录结构:
+    {cache_dir}/CL_F_1d/2024-01.parquet
+    {cache_dir}/CL_F_1d/2024-02.parquet
+"""
+
+import os
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 月份结束后再等待的时间，避免缓存接口尚未补齐的最后一根K线
+CLOSED_MONTH_GRACE = pd.Timedelta(days=1)
+DEFAULT_CACHE_TTL = 3600
+
+
+def utc_month_windows(start_ts, end_ts):
+    """覆盖 [start_ts, end_ts] 的完整 UTC 自然月，返回 [(月份, 月初时间戳, 月末时间戳), ...]"""
+    start = pd.Timestamp(start_ts, unit='s')
+    end = pd.Timestamp(end_ts, unit='s')
+    windows = []
+    for period in pd.period_range(start.to_period('M'), end.to_period('M'), freq='M'):
+        month_start = period.start_time
+        month_end = (period + 1).start_time
+        windows.append((str(period), int(month_start.timestamp()), int(month_end.timestamp()) - 1))
+    return windows
+
+
+class CommodityCache:
+    """按月分区的商品行情缓存"""
+
+    def __init__(self, cache_dir, ttl=DEFAULT_CACHE_TTL, file_format=None):
+        """
+        参数：
+        - cache_dir: 缓存根目录
+        - ttl: 当前（未结束）月份的缓存有效期（秒）
+        - file_format: 'parquet' 或 'pickle'，默认有 pyarrow 时用 parquet
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.file_format = file_format or ('parquet' if PARQUET_AVAILABLE else 'pickle')
+
+    month_windows = staticmethod(utc_month_windows)
+
+    def month_path(self, symbol, interval, month):
+        safe_symbol = symbol.replace('=', '_').replace('^', '').replace('/', '_')
+        extension = 'parquet' if self.file_format == 'parquet' else 'pkl'
+        return os.path.join(self.cache_dir, f"{safe_symbol}_{interval}", f"{month}.{extension}")
+
+    @staticmethod
+    def is_closed(month, now=None):
+        """月份是否已经结束（含宽限期）"""
+        now = pd.Timestamp.now(tz='UTC').tz_localize(None) if now is None else pd.Timestamp(now)
+        return now >= CommodityCache.month_complete_time(month)
+
+    @staticmethod
+    def month_complete_time(month):
+        """月份结束（含宽限期）的时间，晚于该时间写入的缓存才包含整月数据"""
+        return (pd.Period(month, freq='M') + 1).start_time + CLOSED_MONTH_GRACE
+
+    def is_valid(self, symbol, interval, month, now=None):
+        """
+        缓存文件是否可直接使用
+
+        - 已结束的月份：文件在月份结束（含宽限期）之后写入时视为完整、永久有效；
+          月中写入的文件只有部分数据，月份结束后需要重新请求
+        - 当前月份：要求文件未超过 ttl
+        """
+        path = self.month_path(symbol, interval, month)
+        if not os.path.exists(path):
+            return False
+        modified_ts = os.path.getmtime(path)
+        if self.is_closed(month, now):
+            return modified_ts >= self.month_complete_time(month).tz_localize('UTC').timestamp()
+        now_ts = time.time() if now is None else pd.Timestamp(now).timestamp()
+        return now_ts - modified_ts < self.ttl
+
+    def load(self, symbol, interval, month):
+        path = self.month_path(symbol, interval, month)
+        if self.file_format == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def save(self, symbol, interval, month, frame):
+        """写入临时文件后原子替换，避免并发读到写了一半的文件"""
+        path = self.month_path(symbol, interval, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if self.file_format == 'parquet':
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, symbol, interval, month=None):
+        """删除某个月份（month=None 时删除该品种该间隔的全部月份）的缓存"""
+        directory = os.path.dirname(self.month_path(symbol, interval, '0000-00'))
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            if month is None or name.startswith(f"{month}."):
+                os.remove(os.path.join(directory, name))
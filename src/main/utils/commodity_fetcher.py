@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品期货行情并发获取（Yahoo Finance chart 接口）
+
+- 所有请求共用一个 http_client 创建的 Session（连接池复用 TCP/TLS 连接，代理取自 HTTP 配置）
+- 同一时间窗口的多个品种（原油 CL=F、黄金 GC=F 等）并发请求，各自解析成带前缀的 DataFrame
+- 按月分批的长区间同样并发提交，全局受 RateLimiter 约束（相邻请求间隔 ≥ min_request_interval）
+- chart 接口只提供最近 730 天的小时级（及更细）K线：起点早于 intraday_max_age_days 的时间窗口改用
+  history_interval（日线）请求和缓存，多年历史不会因接口拒绝而反复失败重试
+
+用法示例:
+    fetcher = CommodityFetcher()
+    frames = fetcher.fetch_range(['CL=F', 'GC=F'], '2024-01-01', '2024-06-30')
+    oil_df, gold_df = frames['oil'], frames['gld']
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.main.utils.http_client import create_session
+from src.main.utils.rate_limiter import RateLimiter
+
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}'
+
+# 期货代码 -> 列名前缀
+COMMODITY_PREFIXES = {
+    'CL=F': 'oil',
+    'GC=F': 'gld',
+}
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+DEFAULT_FETCHER_CONFIG = {
+    'min_request_interval': 0.5,  # 最小请求间隔(秒)，所有线程共享
+    'rate_burst': 1,              # 限速器允许的突发请求数（令牌桶容量）
+    'max_retries': 3,             # 最大重试次数
+    'timeout': 60,                # 请求超时时间(秒)
+    'max_workers': 4,             # 并发请求线程数
+    'interval': '1h',             # K线间隔（交易系统与回填任务共用，缓存按间隔分目录）
+    'history_interval': '1d',     # 起点超出日内数据范围的时间窗口使用的K线间隔
+    'intraday_max_age_days': 720,  # 日内K线的最大回溯天数（接口上限 730 天，留出余量）
+    'proxies': None,              # 代理，None 表示使用 http_client 配置；{} 表示不走代理
+    'headers': {},                # 追加的请求头
+}
+
+
+def month_windows(start_ts, end_ts):
+    """把 [start_ts, end_ts]（秒级时间戳）按自然月切分，返回 [(月份, 开始, 结束), ...]"""
+    windows = []
+    current = datetime.fromtimestamp(start_ts)
+    current = datetime(current.year, current.month, 1)
+    end_date = datetime.fromtimestamp(end_ts)
+    while current <= end_date:
+        following = datetime(current.year + (current.month == 12), current.month % 12 + 1, 1)
+        windows.append((current.strftime('%Y-%m'),
+                        max(current.timestamp(), start_ts),
+                        min(following.timestamp() - 1, end_ts)))
+        current = following
+    return windows
+
+
+def parse_chart(data, prefix, start_ts=None, end_ts=None):
+    """
+    把 chart 接口的 JSON 解析为带前缀的 OHLCV DataFrame（向量化，不逐行构造字典）
+
+    返回：
+    - 列为 {prefix}_timestamp, {prefix}_open, ..., {prefix}_volume 的 DataFrame；无有效数据时返回空表
+    """
+    columns = [f'{prefix}_timestamp'] + [f'{prefix}_{field}' for field in OHLCV_FIELDS]
+    result = (data or {}).get('chart', {}).get('result') or []
+    if not result:
+        return pd.DataFrame(columns=columns)
+
+    chart = result[0]
+    timestamps = np.asarray(chart.get('timestamp') or [], dtype=np.int64)
+    quotes = chart.get('indicators', {}).get('quote') or [{}]
+    n = len(timestamps)
+    values = {}
+    for field in OHLCV_FIELDS:
+        raw = (quotes[0].get(field) or [])[:n]
+        column = np.full(n, np.nan)
+        # None 转为 NaN；长度不足的部分保持 NaN
+        column[:len(raw)] = np.array(raw, dtype=float)
+        values[field] = column
+
+    valid = np.ones(n, dtype=bool)
+    for column in values.values():
+        valid &= ~np.isnan(column)
+    if start_ts is not None:
+        valid &= timestamps >= start_ts
+    if end_ts is not None:
+        valid &= timestamps <= end_ts
+
+    frame = pd.DataFrame({f'{prefix}_timestamp': pd.to_datetime(timestamps[valid], unit='s')})
+    for field in OHLCV_FIELDS:
+        frame[f'{prefix}_{field}'] = values[field][valid]
+    return frame.sort_values(f'{prefix}_timestamp').reset_index(drop=True)
+
+
+def is_intraday_interval(interval):
+    """是否为日内K线间隔（如 1m、15m、1h），chart 接口对这类间隔限制回溯范围"""
+    return str(interval)[-1] in ('m', 'h')
+
+
+class CommodityFetcher:
+    """商品期货行情并发获取器"""
+
+    def __init__(self, config=None, session=None, cache=None):
+        """
+        参数：
+        - config: 覆盖 DEFAULT_FETCHER_CONFIG 的配置字典
+        - session: 外部传入的 requests.Session（测试或共享连接池时使用）
+        - cache: CommodityCache 实例，为None时不使用本地缓存
+        """
+        self.config = {**DEFAULT_FETCHER_CONFIG, **(config or {})}
+        self.cache = cache
+        self.session = session or self._create_session()
+        self.rate_limiter = RateLimiter.from_min_interval(self.config['min_request_interval'],
+                                                         self.config['rate_burst'])
+
+    def _create_session(self):
+        """创建带连接池的 Session，连接池大小与并发线程数一致"""
+        return create_session(pool_size=self.config['max_workers'], proxies=self.config.get('proxies'),
+                              headers=self.config.get('headers'))
+
+    def window_interval(self, window_start, now=None):
+        """
+        时间窗口实际使用的K线间隔：日内间隔的窗口起点早于 intraday_max_age_days 时改用 history_interval
+
+        参数：
+        - window_start: 窗口起点（秒级时间戳）
+        - now: 当前时间，None 表示 time.time()（测试时传入）
+        """
+        interval = self.config['interval']
+        if not is_intraday_interval(interval):
+            return interval
+        now_ts = time.time() if now is None else pd.Timestamp(now).timestamp()
+        if window_start >= now_ts - self.config['intraday_max_age_days'] * 86400:
+            return interval
+        return self.config['history_interval']
+
+    def fetch_chart(self, symbol, period1, period2, interval=None):
+        """请求单个品种单个时间窗口的 chart 数据（限速 + 指数退避重试），失败返回 None"""
+        params = {
+            'period1': int(period1),
+            'period2': int(period2),
+            'interval': interval or self.config['interval'],
+            'includePrePost': 'true',
+            'events': 'div|split|earn',
+            'lang': 'en-US',
+            'region': 'US',
+            'source': 'cosaic'
+        }
+        max_retries = self.config['max_retries']
+        for retry in range(max_retries):
+            if retry > 0:
+                wait_time = 1.0 * (2 ** retry)
+                print(f"🔄 {symbol} 重试 {retry + 1}/{max_retries}，等待 {wait_time:.1f} 秒...")
+                time.sleep(wait_time)
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(YAHOO_CHART_URL.format(symbol=symbol), params=params,
+                                            timeout=self.config['timeout'])
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                print(f"❌ {symbol} 请求错误: {e}")
+            except json.JSONDecodeError as e:
+                print(f"❌ {symbol} JSON解析错误: {e}")
+        return None
+
+    def _fetch_parsed(self, symbol, start_ts, end_ts, interval=None):
+        """请求并解析一个 品种×时间窗口，返回 (前缀, DataFrame, 是否请求成功)"""
+        prefix = COMMODITY_PREFIXES.get(symbol, symbol.split('=')[0].lower())
+        data = self.fetch_chart(symbol, start_ts, end_ts, interval)
+        return prefix, parse_chart(data, prefix, start_ts, end_ts), data is not None
+
+    def fetch_window(self, symbols, start_ts, end_ts):
+        """同一时间窗口并发获取多个品种，返回 {前缀: DataFrame}"""
+        return self.fetch_range(symbols, start_ts, end_ts, split_months=False)
+
+    def fetch_range(self, symbols, start, end, split_months=True, max_months=None):
+        """
+        获取多个品种在一段时间内的数据
+
+        参数：
+        - symbols: 期货代码列表，如 ['CL=F', 'GC=F']
+        - start / end: 时间字符串、Timestamp 或秒级时间戳
+        - split_months: 是否按自然月分批（每个 品种×月份 一个请求，全部并发提交）；
+          配置了缓存时按完整 UTC 月请求并写入缓存，命中缓存的月份不再请求
+        - max_months: 最多获取的月份数（从起始月开始），None 表示不限制
+
+        每个窗口按 window_interval 选择K线间隔；已缓存的 interval 数据即使超出日内范围也继续使用。
+
+        返回：
+        - {前缀: DataFrame}，每个品种的各批次已合并、去重、按时间排序；全部失败的品种为空表
+        """
+        start_ts = start if isinstance(start, (int, float)) else pd.Timestamp(start).timestamp()
+        end_ts = end if isinstance(end, (int, float)) else pd.Timestamp(end).timestamp()
+        use_cache = self.cache is not None and split_months
+        if use_cache:
+            windows = self.cache.month_windows(start_ts, end_ts)
+        elif split_months:
+            windows = month_windows(start_ts, end_ts)
+        else:
+            windows = [('', start_ts, end_ts)]
+        if max_months is not None and len(windows) > max_months:
+            print(f"⚠️ 已达到最大月份限制 ({max_months}个月)，只获取前 {max_months} 个月")
+            windows = windows[:max_months]
+
+        interval = self.config['interval']
+        frames = {}
+        tasks = []
+        for month, window_start, window_end in windows:
+            window_interval = self.window_interval(window_start)
+            for symbol in symbols:
+                cached = None
+                if use_cache:
+                    cached = next((candidate for candidate in dict.fromkeys([interval, window_interval])
+                                   if self.cache.is_valid(symbol, candidate, month)), None)
+                if cached:
+                    prefix = COMMODITY_PREFIXES.get(symbol, symbol.split('=')[0].lower())
+                    frames.setdefault(prefix, []).append(self.cache.load(symbol, cached, month))
+                else:
+                    tasks.append((symbol, month, window_start, window_end, window_interval))
+        if use_cache:
+            print(f"📦 缓存命中 {len(windows) * len(symbols) - len(tasks)}/{len(windows) * len(symbols)} 个月份，"
+                  f"需请求 {len(tasks)} 个")
+
+        if tasks:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.config['max_workers'], len(tasks)))) as executor:
+                results = list(executor.map(lambda task: self._fetch_parsed(task[0], task[2], task[3], task[4]),
+                                            tasks))
+            for (symbol, month, _, _, window_interval), (prefix, frame, ok) in zip(tasks, results):
+                if use_cache and ok:
+                    self.cache.save(symbol, window_interval, month, frame)
+                frames.setdefault(prefix, []).append(frame)
+
+        merged = {}
+        for prefix, parts in frames.items():
+            timestamp_col = f'{prefix}_timestamp'
+            frame = pd.concat(parts, ignore_index=True)
+            if use_cache:
+                # 缓存按整月存取，这里截回请求的时间范围
+                frame = frame[frame[timestamp_col].between(pd.Timestamp(start_ts, unit='s'),
+                                                           pd.Timestamp(end_ts, unit='s'))]
+            merged[prefix] = (frame.drop_duplicates(subset=[timestamp_col])
+                              .sort_values(timestamp_col).reset_index(drop=True))
+            print(f"✅ {prefix}: {sum(len(part) > 0 for part in parts)}/{len(parts)} 个批次有数据，"
+                  f"共 {len(merged[prefix])} 条记录")
+        return merged
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品（原油、黄金等）技术指标引擎
+
+每个商品的指标块只依赖自己的 OHLCV 列和数字货币的 close / RSI6 / MA_20，
+在独立的小 DataFrame 上计算，不往主表里逐列写入；多个商品的指标块在进程池里并行计算
+（指标块主要是 pandas 滚动/逐元素运算，持有 GIL，线程池无法并行），最后一次性拼接回主表。与数字货币的滚动相关性、波动率比由 cross_asset_correlation 对全部商品一次算出。
+指标定义与 CompleteTradingSystem.calculate_indicators 原实现一致。
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.main.utils.cross_asset_correlation import rolling_cross_stats, rolling_std
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+# 商品数据列缺失时的默认值
+DEFAULT_OHLCV_VALUES = {'open': 70.0, 'high': 70.0, 'low': 70.0, 'close': 70.0, 'volume': 100000.0}
+CRYPTO_INPUT_COLUMNS = ['close', 'RSI6', 'MA_20']
+
+
+def calculate_rsi(series, period=14):
+    """RSI（Wilder 平滑），与 CompleteTradingSystem._calculate_rsi 相同"""
+    delta = series.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.ewm(alpha=1 / period, min_periods=period).mean()
+    avg_loss = loss.ewm(alpha=1 / period, min_periods=period).mean()
+    rs = avg_gain / (avg_loss + 1e-10)
+    return 100 - (100 / (1 + rs))
+
+
+def _clean_block(block, prefix):
+    """替换无穷大并按列类型填充 NaN（比率类 0.5、RSI 50、均线用收盘价、成交量默认值、其他 0）"""
+    close = block[f"{prefix}close"]
+    for col in block.columns:
+        values = block[col]
+        if values.dtype == object or values.dtype == bool:
+            continue
+        values = values.replace([np.inf, -np.inf], np.nan)
+        if not values.isna().any():
+            block[col] = values
+            continue
+        if 'ratio' in col or 'corr' in col or 'position' in col:
+            block[col] = values.fillna(0.5)
+        elif 'RSI' in col:
+            block[col] = values.fillna(50)
+        elif 'MA' in col:
+            block[col] = values.fillna(close)
+        elif 'volume' in col:
+            block[col] = values.fillna(100000.0)
+        else:
+            block[col] = values.fillna(0)
+    return block
+
+
+def cross_asset_indicators(crypto_close, closes):
+    """
+    一次计算数字货币与全部商品的滚动相关性和波动率比（20 根窗口）
+
+    参数：
+    - crypto_close: 数字货币收盘价 Series
+    - closes: 各商品收盘价 DataFrame（每列一个商品）
+
+    返回：
+    - {'price_corr', 'returns_corr', 'vol_ratio'}，每个值为 n×k 数组（列顺序同 closes）
+    """
+    crypto_close = crypto_close.astype(float)
+    closes = closes.astype(float)
+    price_corr = rolling_cross_stats(crypto_close, closes, windows=(20,), min_periods=5)[20]['corr']
+    returns_corr = rolling_cross_stats(crypto_close.pct_change().fillna(0), closes.pct_change().fillna(0),
+                                       windows=(20,), min_periods=5)[20]['corr']
+    close_vol = rolling_std(closes, 20, min_periods=1)
+    close_vol[close_vol == 0] = 1e-10
+    vol_ratio = rolling_std(crypto_close, 20, min_periods=1)[:, None] / close_vol
+    return {'price_corr': price_corr, 'returns_corr': returns_corr, 'vol_ratio': vol_ratio}
+
+
+def commodity_indicator_block(ohlcv, prefix, crypto=None, cross=None):
+    """
+    计算单个商品的指标块
+
+    参数：
+    - ohlcv: 含 {prefix}open/high/low/close/volume 的 DataFrame（缺失的列用默认值）
+    - prefix: 列名前缀，如 'oil_'
+    - crypto: 含数字货币 close（可选 RSI6, MA_20）的 DataFrame，None 时相关性指标取默认值
+    - cross: cross_asset_indicators 结果中该商品的一列（price_corr / returns_corr / vol_ratio），None 时现算
+
+    返回：
+    - 与 ohlcv 同索引的 DataFrame：数值化后的 OHLCV 列 + 全部指标列
+    """
+    index = ohlcv.index
+    raw = {}
+    for field in OHLCV_FIELDS:
+        col = f"{prefix}{field}"
+        if col in ohlcv.columns:
+            raw[field] = pd.to_numeric(ohlcv[col], errors='coerce')
+        else:
+            raw[field] = pd.Series(DEFAULT_OHLCV_VALUES[field], index=index, dtype=float)
+    open_, high, low, close, volume = (raw[field] for field in OHLCV_FIELDS)
+
+    out = {f"{prefix}{field}": raw[field] for field in OHLCV_FIELDS}
+    high_low_diff = (high - low).replace(0, 1e-10)
+
+    # 实体比例
+    out[f"{prefix}body_ratio"] = ((close - open_).abs() / high_low_diff).fillna(0).clip(0, 1)
+
+    # RSI
+    rsi = {}
+    for period in (6, 12, 24):
+        rsi[period] = calculate_rsi(close, period).fillna(50).clip(0, 100)
+        out[f"{prefix}RSI{period}"] = rsi[period]
+
+    # 移动平均线
+    close_rolling20 = close.rolling(window=20, min_periods=1)
+    ma20 = close_rolling20.mean().fillna(close)
+    out[f"{prefix}MA_5"] = close.rolling(window=5, min_periods=1).mean().fillna(close)
+    out[f"{prefix}MA_10"] = close.rolling(window=10, min_periods=1).mean().fillna(close)
+    out[f"{prefix}MA_20"] = ma20
+
+    # 布林带
+    std_20 = close_rolling20.std()
+    close_std = close.std()
+    band_std = std_20.fillna(close_std if close_std > 0 else 1.0)
+    out[f"{prefix}Bollinger_Upper"] = ma20 + 2 * band_std
+    out[f"{prefix}Bollinger_Lower"] = (ma20 - 2 * band_std).clip(lower=0.1)
+
+    # ROC 和动量
+    close_shift5 = close.shift(5)
+    out[f"{prefix}ROC_5"] = ((close - close_shift5) / close_shift5.replace(0, 1e-10)).fillna(0).clip(-1, 1)
+    out[f"{prefix}Momentum_10"] = (close - close.shift(10)).fillna(0)
+
+    # ATR
+    prev_close = close.shift(1)
+    high_low = high - low
+    tr = pd.concat([high_low, (high - prev_close).abs().fillna(high_low),
+                    (low - prev_close).abs().fillna(high_low)], axis=1).max(axis=1)
+    tr_mean = tr.mean()
+    atr = tr.rolling(window=14, min_periods=1).mean().fillna(tr_mean if tr_mean > 0 else 1.0)
+    out[f"{prefix}ATR"] = atr
+
+    # 成交量指标
+    volume_mean = volume.mean()
+    out[f"{prefix}Volume_MA_5"] = volume.rolling(window=5, min_periods=1).mean().fillna(
+        volume_mean if volume_mean > 0 else 100000.0)
+    volume_ma10 = volume.rolling(window=10, min_periods=1).mean().replace(0, 1e-10)
+    out[f"{prefix}volume_spike"] = volume > volume_ma10 * 1.5
+
+    # 价格位置、相对位置
+    out[f"{prefix}price_position"] = ((close - low) / high_low_diff).fillna(0.5).clip(0, 1)
+    out[f"{prefix}relative_position"] = ((close - ma20) / ma20.replace(0, 1e-10)).fillna(0).clip(-1, 1)
+
+    # 波动率
+    out[f"{prefix}volatility_ratio"] = (atr / close.replace(0, 1e-10)).fillna(0.01).clip(0, 0.5)
+    out[f"{prefix}price_volatility"] = (std_20 / close_rolling20.mean().replace(0, 1e-10)).fillna(0.01).clip(0, 0.5)
+
+    # 与数字货币的相关性指标（滚动相关性、波动率比由跨资产引擎批量计算，单独调用时现算）
+    if crypto is not None and 'close' in crypto.columns:
+        crypto_close = crypto['close']
+        if cross is None:
+            cross = {key: values[:, 0] for key, values in
+                     cross_asset_indicators(crypto_close, close.to_frame()).items()}
+        out[f"{prefix}crypto_price_corr"] = pd.Series(cross['price_corr'], index=index).fillna(0).clip(-1, 1)
+        out[f"{prefix}crypto_price_ratio"] = (crypto_close / close.replace(0, 1e-10)).fillna(1.0).clip(0.1, 10.0)
+        out[f"{prefix}crypto_returns_corr"] = pd.Series(cross['returns_corr'], index=index).fillna(0).clip(-1, 1)
+        out[f"{prefix}crypto_vol_ratio"] = pd.Series(cross['vol_ratio'], index=index).fillna(1.0).clip(0.1, 10.0)
+        crypto_rsi = crypto['RSI6'] if 'RSI6' in crypto.columns else 50
+        out[f"{prefix}crypto_rsi_diff"] = (crypto_rsi - rsi[6]).fillna(0).clip(-100, 100)
+        crypto_ma20 = crypto['MA_20'] if 'MA_20' in crypto.columns else crypto_close
+        out[f"{prefix}crypto_trend_consistency"] = ((crypto_close > crypto_ma20) == (close > ma20)).astype(int)
+    else:
+        for name, value in (('crypto_price_corr', 0), ('crypto_price_ratio', 1.0), ('crypto_returns_corr', 0),
+                            ('crypto_vol_ratio', 1.0), ('crypto_rsi_diff', 0), ('crypto_trend_consistency', 0)):
+            out[f"{prefix}{name}"] = pd.Series(value, index=index)
+
+    # 市场状态
+    out[f"{prefix}market_state"] = pd.Series(np.where(
+        (close > ma20) & (rsi[6] > 50), '强势',
+        np.where((close < ma20) & (rsi[6] < 50), '弱势', '震荡')), index=index)
+
+    return _clean_block(pd.DataFrame(out, index=index), prefix)
+
+
+def compute_commodity_indicators(df, prefixes=('oil_', 'gld_'), max_workers=None):
+    """
+    并发计算多个商品的指标块，并一次性拼接回主表
+
+    参数：
+    - df: 主数据（数字货币列 + 各商品 OHLCV 列）
+    - prefixes: 商品前缀列表
+    - max_workers: 进程数，默认每个商品一个进程；1 表示在当前进程串行计算
+      （每个进程只接收该商品自己的列和数字货币的 close / RSI6 / MA_20，数据量小时进程启动开销可能超过收益）
+
+    返回：
+    - 新的 DataFrame：原有列（商品 OHLCV 列已数值化）+ 各商品指标列
+    """
+    prefixes = list(prefixes)
+    crypto_columns = [col for col in CRYPTO_INPUT_COLUMNS if col in df.columns]
+    crypto = df[crypto_columns].copy() if 'close' in crypto_columns else None
+    # 每个商品只取自己的列，传给子进程的只有这部分数据
+    inputs = [(df[[f"{prefix}{field}" for field in OHLCV_FIELDS if f"{prefix}{field}" in df.columns]].copy(), prefix)
+              for prefix in prefixes]
+
+    # 跨资产相关性对全部商品一次性计算（2维前缀和），再按列分发给各商品的指标块
+    crosses = [None] * len(inputs)
+    if crypto is not None:
+        closes = pd.DataFrame({prefix: pd.to_numeric(ohlcv[f"{prefix}close"], errors='coerce')
+                               if f"{prefix}close" in ohlcv.columns else DEFAULT_OHLCV_VALUES['close']
+                               for ohlcv, prefix in inputs}, index=df.index)
+        cross_values = cross_asset_indicators(crypto['close'], closes)
+        crosses = [{key: values[:, i] for key, values in cross_values.items()} for i in range(len(inputs))]
+
+    tasks = [(ohlcv, prefix, crypto, cross) for (ohlcv, prefix), cross in zip(inputs, crosses)]
+    if len(tasks) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers or len(tasks), len(tasks))) as executor:
+            blocks = list(executor.map(commodity_indicator_block, *zip(*tasks)))
+    else:
+        blocks = [commodity_indicator_block(*task) for task in tasks]
+
+    result = df.copy()
+    new_columns = []
+    for block in blocks:
+        for col in block.columns:
+            if col in result.columns:
+                result[col] = block[col]
+            else:
+                new_columns.append(block[col])
+    if new_columns:
+        result = pd.concat([result, pd.concat(new_columns, axis=1)], axis=1)
+    return result
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨资产滚动相关性引擎：一条数字货币序列 vs 多条外生序列（原油、黄金、美元指数等）
+
+把外生序列排成2维数组，用前缀和（cumsum）相减得到每个窗口的
+Σx、Σy、Σx²、Σy²、Σxy 和有效样本数，一次得到全部资产、全部窗口的:
+- corr: 滚动相关系数
+- beta: 数字货币对外生序列的回归系数 cov(base, other) / var(other)
+- vol_ratio: 滚动标准差之比 std(base) / std(other)
+
+统计口径与 pandas rolling().corr() / rolling().std() 一致（ddof=1；相关性、beta、波动率比只使用
+两条序列同时有效的样本）。计算前先减去各列均值，降低前缀和相减的精度损失。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 方差小于 列整体方差 × 该比例 时视为0（前缀和相减残留的舍入误差）
+VARIANCE_EPSILON = 1e-10
+
+
+def _window_sums(cumsum, window):
+    """前缀和（首列补0，长度 n+1）-> 每个位置向前 window 个的窗口和（不足 window 个时为已有部分）"""
+    sums = cumsum[..., 1:].copy()
+    if window < sums.shape[-1]:
+        sums[..., window:] -= cumsum[..., 1:-window]
+    return sums
+
+
+def _prefix_sums(values):
+    """
+    沿最后一维（时间）计算 [有效数, Σx, Σx²] 的前缀和，以及减均值后的值（NaN 视为缺失，置0）
+
+    内部统一使用 资产×时间 的布局，时间维连续存放，cumsum 比沿第0维快数倍。
+    """
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=-1, keepdims=True)
+    mean = np.where(valid, values, 0.0).sum(axis=-1, keepdims=True) / np.maximum(count, 1)
+    centered = np.where(valid, values - mean, 0.0)
+    zero = np.zeros(values.shape[:-1] + (1,))
+    return (np.concatenate([zero, np.cumsum(valid, axis=-1)], axis=-1),
+            np.concatenate([zero, np.cumsum(centered, axis=-1)], axis=-1),
+            np.concatenate([zero, np.cumsum(centered ** 2, axis=-1)], axis=-1),
+            centered)
+
+
+def _column_variance(values):
+    """各序列整体方差（忽略NaN，全为NaN时为0），作为判断窗口方差是否为0的尺度"""
+    valid = ~np.isnan(values)
+    count = np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+    mean = np.where(valid, values, 0.0).sum(axis=-1, keepdims=True) / count
+    return (np.where(valid, values - mean, 0.0) ** 2).sum(axis=-1, keepdims=True) / count
+
+
+def _rolling_moments(prefix, window, min_periods, scale):
+    """窗口内的 (样本数, 均值, 方差ddof=1)；样本不足 min_periods 的位置为 NaN"""
+    count_cum, sum_cum, square_cum = prefix[:3]
+    count = _window_sums(count_cum, window)
+    total = _window_sums(sum_cum, window)
+    square = _window_sums(square_cum, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        variance = (square - total * mean) / (count - 1)
+    variance[variance < scale * VARIANCE_EPSILON] = 0.0
+    mean[count < max(min_periods, 1)] = np.nan
+    variance[count < max(min_periods, 2)] = np.nan
+    return count, mean, variance
+
+
+def _as_series_matrix(values):
+    """n 或 n×k 的输入 -> k×n 的连续数组（资产×时间）"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.ascontiguousarray(values.reshape(len(values), -1).T)
+
+
+def rolling_std(values, window, min_periods=None):
+    """按列滚动标准差（与 pandas rolling(window, min_periods).std() 一致）"""
+    squeeze = np.ndim(values) == 1
+    values = _as_series_matrix(values)
+    min_periods = window if min_periods is None else min_periods
+    _, _, variance = _rolling_moments(_prefix_sums(values), window, min_periods, _column_variance(values))
+    std = np.sqrt(variance).T
+    return std[:, 0] if squeeze else std
+
+
+def rolling_cross_stats(base, others, windows=(20,), min_periods=None):
+    """
+    计算一条基准序列与多条外生序列的滚动相关系数、beta 和波动率比
+
+    参数：
+    - base: 基准序列（如数字货币收盘价或收益率），长度 n
+    - others: 外生序列，n×k 的数组或 DataFrame（每列一个资产）
+    - windows: 窗口长度列表，多个窗口共用一次前缀和
+    - min_periods: 最少有效样本数，None 表示等于窗口长度
+
+    返回：
+    - {window: {'corr': n×k, 'beta': n×k, 'vol_ratio': n×k}}
+    """
+    base = _as_series_matrix(base)
+    others = _as_series_matrix(others)
+    if base.shape[-1] != others.shape[-1]:
+        raise ValueError(f"序列长度不一致: {base.shape[-1]} vs {others.shape[-1]}")
+
+    # 两条序列同时有效的样本才参与计算（与 pandas 相同），基准序列按每个资产的有效位置分别屏蔽
+    pair_valid = ~np.isnan(base) & ~np.isnan(others)
+    if pair_valid.all():
+        base_masked, others_masked = base, others
+    else:
+        base_masked = np.where(pair_valid, base, np.nan)
+        others_masked = np.where(pair_valid, others, np.nan)
+
+    base_prefix = _prefix_sums(base_masked)
+    other_prefix = _prefix_sums(others_masked)
+    base_scale = _column_variance(base_masked)
+    other_scale = _column_variance(others_masked)
+    zero = np.zeros((others.shape[0], 1))
+    product_cum = np.concatenate([zero, np.cumsum(base_prefix[3] * other_prefix[3], axis=-1)], axis=-1)
+
+    results = {}
+    for window in windows:
+        periods = window if min_periods is None else min_periods
+        pair_count, base_mean, base_var = _rolling_moments(base_prefix, window, periods, base_scale)
+        _, other_mean, other_var = _rolling_moments(other_prefix, window, periods, other_scale)
+        product = _window_sums(product_cum, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 原地运算，减少 资产×时间 大小的临时数组
+            covariance = product
+            covariance /= pair_count
+            covariance -= base_mean * other_mean
+            covariance *= pair_count / (pair_count - 1)
+            covariance[np.broadcast_to(pair_count < max(periods, 1), covariance.shape)] = np.nan
+            denominator = base_var * other_var
+            np.sqrt(denominator, out=denominator)
+            corr = covariance / denominator
+            corr[denominator <= 0] = np.nan
+            np.clip(corr, -1.0, 1.0, out=corr)
+            beta = covariance / other_var
+            vol_ratio = base_var / other_var
+            np.sqrt(vol_ratio, out=vol_ratio)
+            beta[other_var <= 0] = np.nan
+            vol_ratio[other_var <= 0] = np.nan
+        results[window] = {'corr': corr.T, 'beta': beta.T, 'vol_ratio': vol_ratio.T}
+    return results
+
+
+def cross_asset_features(base, others, windows=(20,), min_periods=None, use_returns=True):
+    """
+    生成可直接并入特征表的跨资产特征
+
+    参数：
+    - base: 数字货币价格序列（Series）
+    - others: 外生价格 DataFrame（每列一个资产，列名作为特征前缀）
+    - use_returns: True 时基于 pct_change 收益率计算，否则基于价格水平
+
+    返回：
+    - 与 base 同索引的 DataFrame，列名为 {资产}_corr_{窗口}、{资产}_beta_{窗口}、{资产}_vol_ratio_{窗口}
+    """
+    base_values = pd.Series(base).astype(float)
+    other_values = pd.DataFrame(others).astype(float)
+    if use_returns:
+        base_values = base_values.pct_change()
+        other_values = other_values.pct_change()
+    stats = rolling_cross_stats(base_values.to_numpy(), other_values.to_numpy(), windows, min_periods)
+
+    columns = {}
+    for window, values in stats.items():
+        for stat_name, matrix in values.items():
+            for i, asset in enumerate(other_values.columns):
+                columns[f"{asset}_{stat_name}_{window}"] = matrix[:, i]
+    return pd.DataFrame(columns, index=base_values.index)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外生特征块存储：原油 oil_*、黄金 gld_* 等特征与数字货币宽表分开保存，按需拼接
+
+- 每个外生资产一行，键为 (asset, symbol, interval, open_time)，列为去掉前缀的特征名（close、RSI6、crypto_price_corr ...）；
+  新增资产只增加行，complete_tech_indicators 宽表不再变宽
+- 两种后端：
+  - 'file'：按 {symbol}_{interval}/{asset} 分文件的列式存储（有 pyarrow 时存 Parquet，否则退化为 pickle），
+    读取时只读需要的资产文件和列
+  - 'mysql'：exogenous_features 表（见 db_scripts/V20261019_exogenous_features_script_before.sql），通过 MySQLUtil 读写
+- 离线流程（01_complete_trading_system_v2.4_4h_oil_gold）计算后 save，实盘（complete_trading_system_v2_4_4h）
+  每根K线收盘后通过 join 把选中的资产拼回带前缀的宽表；两边用同一份 DEFAULT_FEATURE_STORE_CONFIG 配置后端
+
+用法示例:
+    store = ExogenousFeatureStore.from_config({'backend': 'mysql'})
+    store.save(df, 'SUIUSDT', '4h')
+    df = store.join(crypto_df, 'SUIUSDT', '4h', assets=['oil'], columns=['close', 'crypto_price_corr'])
+"""
+
+import os
+
+import pandas as pd
+
+from src.main.utils.commodity_cache import PARQUET_AVAILABLE
+
+EXOGENOUS_FEATURE_TABLE = 'exogenous_features'
+KEY_COLUMNS = ['asset', 'symbol', 'interval', 'open_time']
+
+# 与 exogenous_features 表一致的特征列（commodity_indicators 生成的指标块去掉前缀后的列名）
+EXOGENOUS_FEATURE_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume',
+    'body_ratio', 'RSI6', 'RSI12', 'RSI24', 'MA_5', 'MA_10', 'MA_20',
+    'Bollinger_Upper', 'Bollinger_Lower', 'ROC_5', 'Momentum_10', 'ATR', 'Volume_MA_5', 'volume_spike',
+    'price_position', 'relative_position', 'volatility_ratio', 'price_volatility',
+    'crypto_price_corr', 'crypto_price_ratio', 'crypto_returns_corr', 'crypto_vol_ratio',
+    'crypto_rsi_diff', 'crypto_trend_consistency', 'market_state',
+]
+DEFAULT_ASSETS = ('oil', 'gld')
+
+# 存储配置（离线写入与实盘读取共用；相对路径相对 src/main/trade，交易系统运行时的工作目录）
+DEFAULT_FEATURE_STORE_CONFIG = {
+    'enabled': True,               # 实盘是否拼接外生特征
+    'backend': 'file',             # 'file' 或 'mysql'
+    'base_dir': 'exogenous_features',  # 文件后端的根目录
+    'file_format': None,           # 'parquet' / 'pickle'，None 时有 pyarrow 用 parquet
+    'assets': list(DEFAULT_ASSETS),  # 读写的资产
+    'columns': None,               # 实盘拼接的特征列（去掉前缀），None 表示全部
+}
+
+
+def split_exogenous_features(df, assets=DEFAULT_ASSETS, symbol=None, interval=None, columns=None):
+    """
+    宽表 -> 特征块：每个资产的 {asset}_* 列去掉前缀后纵向拼接
+
+    参数：
+    - df: 含 open_time 和带前缀特征列的宽表
+    - assets: 资产前缀列表（不带下划线）
+    - symbol / interval: 数字货币交易对和K线周期，写入键列
+    - columns: 保存的特征列（去掉前缀），默认 EXOGENOUS_FEATURE_COLUMNS
+
+    返回：
+    - 列为 KEY_COLUMNS + 特征列 的 DataFrame；宽表中缺失的特征列为 NaN
+    """
+    columns = list(columns or EXOGENOUS_FEATURE_COLUMNS)
+    open_time = pd.to_datetime(df['open_time']).reset_index(drop=True)
+    blocks = []
+    for asset in assets:
+        present = [col for col in columns if f"{asset}_{col}" in df.columns]
+        if not present:
+            continue
+        block = df[[f"{asset}_{col}" for col in present]].reset_index(drop=True)
+        block.columns = present
+        keys = pd.DataFrame({'asset': asset, 'symbol': symbol, 'interval': interval, 'open_time': open_time})
+        blocks.append(pd.concat([keys, block.reindex(columns=columns)], axis=1))
+    if not blocks:
+        return pd.DataFrame(columns=KEY_COLUMNS + columns)
+    return pd.concat(blocks, ignore_index=True)
+
+
+def join_exogenous_features(crypto_df, features, assets=None, columns=None):
+    """
+    特征块 -> 宽表：按 open_time 把选中资产的特征加上前缀拼回数字货币数据（所有新列一次性拼接）
+
+    参数：
+    - crypto_df: 含 open_time 的数字货币数据
+    - features: split_exogenous_features 格式的特征块
+    - assets: 需要的资产，默认特征块中的全部资产
+    - columns: 需要的特征列（去掉前缀），默认全部
+
+    返回：
+    - 新的 DataFrame，行顺序与 crypto_df 相同；没有对应特征的时间点为 NaN
+    """
+    assets = list(features['asset'].unique()) if assets is None else list(assets)
+    columns = [col for col in (columns or EXOGENOUS_FEATURE_COLUMNS) if col in features.columns]
+    target = pd.to_datetime(crypto_df['open_time'])
+    blocks = []
+    for asset in assets:
+        block = features.loc[features['asset'] == asset, ['open_time'] + columns]
+        block = block.assign(open_time=pd.to_datetime(block['open_time'])).drop_duplicates('open_time', keep='last')
+        block = block.set_index('open_time').reindex(target.to_numpy())
+        block.columns = [f"{asset}_{col}" for col in columns]
+        blocks.append(block.set_axis(crypto_df.index))
+
+    result = crypto_df.drop(columns=[col for block in blocks for col in block.columns if col in crypto_df.columns])
+    return pd.concat([result] + blocks, axis=1) if blocks else result
+
+
+class ExogenousFeatureStore:
+    """外生特征块的读写（文件或 MySQL）"""
+
+    def __init__(self, backend='file', base_dir='exogenous_features', file_format=None):
+        """
+        参数：
+        - backend: 'file' 或 'mysql'（需先调用 MySQLUtil.init_pool()）
+        - base_dir: 文件后端的根目录
+        - file_format: 'parquet' 或 'pickle'，默认有 pyarrow 时用 parquet
+        """
+        if backend not in ('file', 'mysql'):
+            raise ValueError(f"不支持的存储后端: {backend}，可选: file / mysql")
+        self.backend = backend
+        self.base_dir = base_dir
+        self.file_format = file_format or ('parquet' if PARQUET_AVAILABLE else 'pickle')
+
+    @classmethod
+    def from_config(cls, config=None):
+        """按 DEFAULT_FEATURE_STORE_CONFIG（可被 config 覆盖）创建存储"""
+        config = {**DEFAULT_FEATURE_STORE_CONFIG, **(config or {})}
+        return cls(config['backend'], base_dir=config['base_dir'], file_format=config['file_format'])
+
+    def asset_path(self, symbol, interval, asset):
+        extension = 'parquet' if self.file_format == 'parquet' else 'pkl'
+        return os.path.join(self.base_dir, f"{symbol}_{interval}", f"{asset}.{extension}")
+
+    def save(self, df, symbol, interval, assets=DEFAULT_ASSETS):
+        """
+        从宽表中拆出各资产的特征块并保存（同一 open_time 的已有记录被覆盖）
+
+        返回：
+        - 写入的记录数
+        """
+        features = split_exogenous_features(df, assets, symbol, interval)
+        if features.empty:
+            print("⚠️ 宽表中没有外生特征列，未保存")
+            return 0
+        if self.backend == 'mysql':
+            from src.main.utils.sql_util import MySQLUtil
+            MySQLUtil.upsert_from_dataframe(EXOGENOUS_FEATURE_TABLE, features, KEY_COLUMNS)
+        else:
+            for asset, block in features.groupby('asset', sort=False):
+                self._save_file(symbol, interval, asset, block.drop(columns=['asset', 'symbol', 'interval']))
+        print(f"✅ 外生特征已保存: {symbol} {interval} {list(features['asset'].unique())}，共 {len(features)} 条记录")
+        return len(features)
+
+    def _save_file(self, symbol, interval, asset, block):
+        path = self.asset_path(symbol, interval, asset)
+        if os.path.exists(path):
+            block = pd.concat([self._read_file(path), block], ignore_index=True)
+        block = (block.drop_duplicates('open_time', keep='last')
+                 .sort_values('open_time').reset_index(drop=True))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换，避免中断时留下损坏的文件
+        temp_path = f"{path}.tmp"
+        if self.file_format == 'parquet':
+            block.to_parquet(temp_path, index=False)
+        else:
+            block.to_pickle(temp_path)
+        os.replace(temp_path, path)
+
+    def _read_file(self, path, columns=None):
+        if self.file_format == 'parquet':
+            return pd.read_parquet(path, columns=columns)
+        frame = pd.read_pickle(path)
+        return frame[columns] if columns else frame
+
+    def load(self, symbol, interval, assets=DEFAULT_ASSETS, columns=None, start=None, end=None):
+        """
+        读取选中资产的特征块
+
+        参数：
+        - assets: 需要的资产
+        - columns: 需要的特征列（去掉前缀），默认全部
+        - start / end: open_time 范围（含两端），None 表示不限
+
+        返回：
+        - split_exogenous_features 格式的 DataFrame
+        """
+        columns = [col for col in (columns or EXOGENOUS_FEATURE_COLUMNS) if col in EXOGENOUS_FEATURE_COLUMNS]
+        if self.backend == 'mysql':
+            features = self._load_mysql(symbol, interval, assets, columns, start, end)
+        else:
+            blocks = []
+            for asset in assets:
+                path = self.asset_path(symbol, interval, asset)
+                if not os.path.exists(path):
+                    continue
+                block = self._read_file(path, ['open_time'] + columns)
+                blocks.append(block.assign(asset=asset, symbol=symbol, interval=interval))
+            features = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=KEY_COLUMNS + columns)
+            features['open_time'] = pd.to_datetime(features['open_time'])
+            if start is not None:
+                features = features[features['open_time'] >= pd.Timestamp(start)]
+            if end is not None:
+                features = features[features['open_time'] <= pd.Timestamp(end)]
+        return features[KEY_COLUMNS + columns].reset_index(drop=True)
+
+    @staticmethod
+    def _load_mysql(symbol, interval, assets, columns, start, end):
+        from src.main.utils.sql_util import MySQLUtil
+        # interval 是 MySQL 保留字，列名需要反引号
+        conditions = {'symbol': symbol, '`interval`': interval, 'asset': list(assets)}
+        if start is not None or end is not None:
+            conditions['open_time'] = ('BETWEEN', pd.Timestamp(start or '1970-01-01').to_pydatetime(),
+                                       pd.Timestamp(end or '2100-01-01').to_pydatetime())
+        select = ', '.join(f"`{col}`" for col in KEY_COLUMNS + columns)
+        features = MySQLUtil.fetch_dataframe(EXOGENOUS_FEATURE_TABLE, conditions, select, order_by='open_time')
+        if features.empty:
+            return pd.DataFrame(columns=KEY_COLUMNS + columns)
+        features['open_time'] = pd.to_datetime(features['open_time'])
+        return features
+
+    def join(self, crypto_df, symbol, interval, assets=DEFAULT_ASSETS, columns=None):
+        """读取 crypto_df 时间范围内选中资产的特征，并拼回带前缀的宽表"""
+        open_time = pd.to_datetime(crypto_df['open_time'])
+        features = self.load(symbol, interval, assets, columns, open_time.min(), open_time.max())
+        return join_exogenous_features(crypto_df, features, assets, columns)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多资产外生数据合并：把任意多个外部序列（原油、黄金、美元指数、其他币种等）一次性对齐到数字货币的 open_time
+
+每个来源只做一次排序 + np.searchsorted 的 as-of 匹配，按下标取值生成新列，
+所有来源的新列最后一次性拼接到主表，不做逐来源的 merge / 全表复制。
+
+来源配置（字典）:
+    {
+        'name': 'oil',                     # 来源名称，用于日志
+        'frame': oil_df,                   # 外部数据
+        'time_column': 'open_time',        # 外部数据的时间列，默认 open_time，不存在时尝试 {name}_timestamp
+        'columns': ['oil_close', ...],     # 需要合并的列，默认除时间列外的全部列
+        'tolerance': pd.Timedelta('2h'),   # 最大允许时间差，None 表示不限
+        'direction': 'nearest',            # backward（只用过去数据）/ forward / nearest
+        'defaults': {'oil_close': 70.0},   # 整列无数据时的默认值
+    }
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SOURCE_CONFIG = {
+    'time_column': 'open_time',
+    'columns': None,
+    'tolerance': None,
+    'direction': 'backward',
+    'defaults': {},
+}
+
+
+def _to_int64(times):
+    """datetime 序列 -> 纳秒整数数组（统一精度后比较）"""
+    return pd.to_datetime(times).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def asof_indexer(target, source, tolerance=None, direction='backward'):
+    """
+    as-of 匹配下标：对每个 target 时间，返回 source 中匹配行的下标（无匹配为 -1）
+
+    参数：
+    - target: 目标时间（int64 纳秒，任意顺序）
+    - source: 来源时间（int64 纳秒，必须升序）
+    - tolerance: 最大允许时间差（纳秒），None 表示不限
+    - direction: backward 取 <= target 的最后一行；forward 取 >= target 的第一行；nearest 取最近的一行（等距取前一行）
+    """
+    n_source = len(source)
+    if n_source == 0:
+        return np.full(len(target), -1, dtype=np.int64)
+
+    if direction == 'backward':
+        index = np.searchsorted(source, target, side='right') - 1
+    elif direction == 'forward':
+        index = np.searchsorted(source, target, side='left')
+    elif direction == 'nearest':
+        right = np.searchsorted(source, target, side='left')
+        left = right - 1
+        left_gap = np.where(left >= 0, target - source[np.clip(left, 0, None)], np.iinfo(np.int64).max)
+        right_gap = np.where(right < n_source, source[np.clip(right, None, n_source - 1)] - target,
+                             np.iinfo(np.int64).max)
+        index = np.where(left_gap <= right_gap, left, right)
+    else:
+        raise ValueError(f"不支持的匹配方向: {direction}")
+
+    valid = (index >= 0) & (index < n_source)
+    if tolerance is not None:
+        gap = np.abs(source[np.clip(index, 0, n_source - 1)] - target)
+        valid &= gap <= tolerance
+    return np.where(valid, index, -1)
+
+
+def _resolve_source(source):
+    config = {**DEFAULT_SOURCE_CONFIG, **source}
+    frame = config['frame']
+    time_column = config['time_column']
+    if time_column not in frame.columns and f"{config['name']}_timestamp" in frame.columns:
+        time_column = f"{config['name']}_timestamp"
+    config['time_column'] = time_column
+    if config['columns'] is None:
+        config['columns'] = [column for column in frame.columns if column != time_column]
+    if config['tolerance'] is not None:
+        config['tolerance'] = pd.Timedelta(config['tolerance']).value
+    return config
+
+
+def _fill_block(block, defaults):
+    """前向填充 -> 后向填充 -> 列均值 -> 默认值（整块一次完成）"""
+    block = block.ffill().bfill()
+    if block.isna().any().any():
+        block = block.fillna(block.mean(numeric_only=True)).fillna(defaults)
+    return block
+
+
+def merge_exogenous(crypto_df, sources, time_column='open_time', fill=True, verbose=True):
+    """
+    把多个外生序列一次性合并到数字货币数据
+
+    参数：
+    - crypto_df: 主数据（含 time_column），行顺序保持不变
+    - sources: 来源配置字典列表（见模块说明）
+    - time_column: 主数据的时间列
+    - fill: 是否对合并后的缺失值做 ffill / bfill / 均值 / 默认值填充
+    - verbose: 是否打印每个来源的匹配率
+
+    返回：
+    - 新的 DataFrame：crypto_df 的全部列 + 各来源的列（同名列以外生数据为准）
+    """
+    target = _to_int64(crypto_df[time_column])
+    blocks = []
+    for source in sources:
+        config = _resolve_source(source)
+        frame = config['frame']
+        if len(frame) == 0:
+            if verbose:
+                print(f"⚠️ {config['name']}数据为空，跳过合并")
+            continue
+
+        source_times = _to_int64(frame[config['time_column']])
+        order = np.argsort(source_times, kind='stable')
+        index = asof_indexer(target, source_times[order], config['tolerance'], config['direction'])
+        matched = index >= 0
+        rows = order[np.where(matched, index, 0)]
+
+        columns = {}
+        for column in config['columns']:
+            values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+            columns[column] = np.where(matched, values[rows], np.nan)
+        block = pd.DataFrame(columns, index=crypto_df.index)
+
+        if verbose:
+            print(f"🔗 {config['name']}: 匹配 {matched.sum()}/{len(target)} ({matched.mean() * 100:.1f}%)，"
+                  f"方向 {config['direction']}")
+        if fill:
+            missing_before = int(block.isna().sum().sum())
+            block = _fill_block(block, config['defaults'])
+            if verbose and missing_before:
+                print(f"   缺失值处理: {missing_before} → {int(block.isna().sum().sum())}")
+        blocks.append(block)
+
+    if not blocks:
+        return crypto_df.copy()
+    exogenous = pd.concat(blocks, axis=1)
+    exogenous = exogenous.loc[:, ~exogenous.columns.duplicated(keep='last')]
+    base = crypto_df.drop(columns=[column for column in exogenous.columns if column in crypto_df.columns])
+    return pd.concat([base, exogenous], axis=1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部行情接口（Binance、Yahoo Finance 等）共用的 HTTP 客户端层
+
+- 每个数据源一个长连接 requests.Session（keep-alive），连接池大小可配置，按月分批的大量请求共用连接，
+  不再每次 requests.get 都重新做 TCP/TLS（以及 SOCKS 代理）握手
+- 代理、请求头、连接池大小从 ../resource/http_config.json 的 'http' 节读取，代码内的默认值兜底
+- DrissionPage 等较重的可选客户端在第一次使用时才导入，未安装时不影响模块加载
+
+用法示例:
+    session = get_session('yahoo', pool_size=4)
+    response = session.get(url, params=params, timeout=60)
+"""
+
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HTTP_CONFIG = {
+    'proxies': {
+        'http': 'socks5h://127.0.0.1:7890',
+        'https': 'socks5h://127.0.0.1:7890'
+    },
+    'headers': {
+        'User-Agent': 'PostmanRuntime/7.44.1',
+        'Accept': '*/*',
+        'Accept-Language': 'zh-CN,zh;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+    },
+    'pool_connections': 4,  # 连接池个数（按主机）
+    'pool_maxsize': 4,      # 每个连接池的最大连接数，应不小于并发线程数
+}
+
+# 数据源名称 -> 共享 Session
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def load_http_config(config_path='../resource/http_config.json', section='http', overrides=None):
+    """
+    读取 HTTP 配置：代码默认值 < 配置文件 < overrides
+
+    参数：
+    - config_path: 相对本文件的配置文件路径，文件不存在时只用默认值
+    - section: 配置节名称
+    - overrides: 调用方传入的覆盖项
+    """
+    file_config = {}
+    full_config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), config_path)
+    if os.path.exists(full_config_path):
+        try:
+            with open(full_config_path, 'r', encoding='utf-8') as f:
+                file_config = json.load(f).get(section, {})
+        except json.JSONDecodeError as e:
+            print(f"⚠️ 解析配置文件 '{full_config_path}' 失败，使用默认HTTP配置: {e}")
+    return {**DEFAULT_HTTP_CONFIG, **file_config, **(overrides or {})}
+
+
+def create_session(pool_size=None, proxies=None, headers=None, config=None):
+    """
+    创建带连接池的 Session（不缓存，调用方自行管理生命周期）
+
+    参数：
+    - pool_size: 每个连接池的最大连接数，None 时使用配置中的 pool_maxsize
+    - proxies: 代理，None 时使用配置中的代理；传 {} 表示不走代理
+    - headers: 追加的请求头
+    - config: load_http_config 的覆盖项
+    """
+    config = load_http_config(overrides=config)
+    pool_maxsize = pool_size or config['pool_maxsize']
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max(config['pool_connections'], 1), pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(config['headers'])
+    session.headers.update(headers or {})
+    proxies = config['proxies'] if proxies is None else proxies
+    if proxies:
+        session.proxies.update(proxies)
+    return session
+
+
+def get_session(name='default', pool_size=None, proxies=None, headers=None):
+    """
+    获取数据源共享的 Session（同名只创建一次，多线程安全）
+
+    第一次调用时的参数决定连接池大小和代理，之后的调用直接复用。
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = create_session(pool_size=pool_size, proxies=proxies, headers=headers)
+            _sessions[name] = session
+        return session
+
+
+def close_sessions():
+    """关闭全部共享 Session（释放连接池）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_session_page(proxies=None):
+    """
+    创建 DrissionPage 的 SessionPage（需要浏览器式会话的页面抓取时使用）
+
+    DrissionPage 只在这里导入，未安装时抛出 ImportError 并给出安装提示。
+    """
+    try:
+        from DrissionPage import SessionPage, SessionOptions
+    except ImportError as e:
+        raise ImportError("未安装 DrissionPage，请先执行: pip install DrissionPage") from e
+
+    config = load_http_config()
+    proxies = config['proxies'] if proxies is None else proxies
+    options = SessionOptions(read_file=False)
+    options.set_headers(config['headers'])
+    if proxies:
+        options.set_proxies(http=proxies.get('http'), https=proxies.get('https'))
+    return SessionPage(session_or_options=options)
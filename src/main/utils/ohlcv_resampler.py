@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OHLCV 重采样引擎：把外部数据（期货、宏观序列等）聚合到任意 Binance K线周期
+
+- 支持 Binance 全部K线间隔：1s 1m 3m 5m 15m 30m 1h 2h 4h 6h 8h 12h 1d 3d 1w 1M
+  （周线从周一 00:00 UTC 开始，月线按自然月）
+- 可按交易时段过滤（如 CME Globex 期货：周日 18:00 至周五 17:00 美东时间，每日 17:00-18:00 休市），
+  休市时段与周末不产生空K线，合并时由 as-of 匹配沿用最近的有效价格
+- 先算出每行所属的K线下标，排序后找出分组边界，用 np.fmax.reduceat / np.fmin.reduceat / np.add.reduceat
+  一次完成全部分组的 high / low / volume 聚合，不使用 pandas resample 的字典聚合
+"""
+
+import numpy as np
+import pandas as pd
+
+# 固定长度的K线周期（秒）
+BINANCE_INTERVAL_SECONDS = {
+    '1s': 1,
+    '1m': 60,
+    '3m': 3 * 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '30m': 30 * 60,
+    '1h': 3600,
+    '2h': 2 * 3600,
+    '4h': 4 * 3600,
+    '6h': 6 * 3600,
+    '8h': 8 * 3600,
+    '12h': 12 * 3600,
+    '1d': 86400,
+    '3d': 3 * 86400,
+    '1w': 7 * 86400,
+}
+BINANCE_INTERVALS = list(BINANCE_INTERVAL_SECONDS) + ['1M']
+
+# 周线原点：1970-01-05 是周一（1970-01-01 是周四）
+WEEK_ORIGIN_SECONDS = 4 * 86400
+
+# 交易时段：时区、每周开盘（星期几, 小时）、每周收盘（星期几, 小时）、每日休市区间（小时）；星期一为0
+SESSION_PROFILES = {
+    'cme_globex': {
+        'timezone': 'America/New_York',
+        'week_open': (6, 18.0),
+        'week_close': (4, 17.0),
+        'daily_break': (17.0, 18.0),
+    },
+}
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def interval_to_seconds(interval):
+    """Binance K线间隔 -> 秒数（1M 为变长，返回None）"""
+    if interval == '1M':
+        return None
+    if interval not in BINANCE_INTERVAL_SECONDS:
+        raise ValueError(f"不支持的K线间隔: {interval}，可选: {BINANCE_INTERVALS}")
+    return BINANCE_INTERVAL_SECONDS[interval]
+
+
+def bin_start_times(timestamps, interval):
+    """
+    计算每个时间戳所属K线的开始时间
+
+    参数：
+    - timestamps: datetime 序列（无时区，按 UTC 理解）
+    - interval: Binance K线间隔
+
+    返回：
+    - datetime64[ns] 数组
+    """
+    values = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[ns]')
+    if interval == '1M':
+        return values.astype('datetime64[M]').astype('datetime64[ns]')
+    width = np.int64(interval_to_seconds(interval) * 1_000_000_000)
+    origin = np.int64(WEEK_ORIGIN_SECONDS * 1_000_000_000) if interval == '1w' else np.int64(0)
+    nanos = values.astype(np.int64)
+    return ((nanos - origin) // width * width + origin).astype('datetime64[ns]')
+
+
+def session_mask(timestamps, session):
+    """
+    时间戳是否处于交易时段内
+
+    参数：
+    - timestamps: datetime 序列（无时区，按 UTC 理解）
+    - session: SESSION_PROFILES 中的名称或同结构的字典；None 表示全天候（数字货币）
+    """
+    timestamps = pd.DatetimeIndex(pd.to_datetime(pd.Series(timestamps)))
+    if session is None:
+        return np.ones(len(timestamps), dtype=bool)
+    profile = SESSION_PROFILES[session] if isinstance(session, str) else session
+    local = timestamps.tz_localize('UTC').tz_convert(profile['timezone'])
+    weekday = local.dayofweek.to_numpy()
+    hour = local.hour.to_numpy() + local.minute.to_numpy() / 60.0
+
+    # 每周位置（小时）：从周一 00:00 起算，开盘 / 收盘之间为交易周（开盘在周日时跨周）
+    week_hour = weekday * 24 + hour
+    open_hour = profile['week_open'][0] * 24 + profile['week_open'][1]
+    close_hour = profile['week_close'][0] * 24 + profile['week_close'][1]
+    if open_hour < close_hour:
+        in_week = (week_hour >= open_hour) & (week_hour < close_hour)
+    else:
+        in_week = (week_hour >= open_hour) | (week_hour < close_hour)
+
+    break_start, break_end = profile.get('daily_break') or (0.0, 0.0)
+    in_break = (hour >= break_start) & (hour < break_end)
+    return in_week & ~in_break
+
+
+def resample_ohlcv(df, interval, prefix='', time_column=None, session=None):
+    """
+    把 OHLCV 数据重采样到指定 Binance K线间隔
+
+    参数：
+    - df: 含 {prefix}open/high/low/close/volume 和时间列的 DataFrame（任意顺序）
+    - interval: 目标K线间隔（见 BINANCE_INTERVALS）
+    - prefix: 列名前缀，如 'oil_'
+    - time_column: 时间列，默认 {prefix}timestamp，不存在时用 open_time
+    - session: 交易时段（见 session_mask），时段外的数据先剔除
+
+    返回：
+    - 每根有数据的K线一行的 DataFrame（时间列为K线开始时间，列名与输入一致）；没有数据的K线不输出
+    """
+    if time_column is None:
+        time_column = f"{prefix}timestamp" if f"{prefix}timestamp" in df.columns else 'open_time'
+    columns = {field: f"{prefix}{field}" for field in OHLCV_FIELDS if f"{prefix}{field}" in df.columns}
+
+    times = pd.to_datetime(df[time_column]).to_numpy(dtype='datetime64[ns]')
+    keep = session_mask(times, session)
+    if 'close' in columns:
+        keep &= ~np.isnan(pd.to_numeric(df[columns['close']], errors='coerce').to_numpy(dtype=np.float64))
+    order = np.flatnonzero(keep)
+    order = order[np.argsort(times[order], kind='stable')]
+
+    bins = bin_start_times(times[order], interval)
+    if len(bins) == 0:
+        return pd.DataFrame({time_column: pd.Series(dtype='datetime64[ns]'),
+                             **{name: pd.Series(dtype=float) for name in columns.values()}})
+    starts = np.flatnonzero(np.concatenate([[True], bins[1:] != bins[:-1]]))
+    ends = np.concatenate([starts[1:], [len(bins)]]) - 1
+
+    result = {time_column: bins[starts]}
+    for field, name in columns.items():
+        values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)[order]
+        if field == 'open':
+            result[name] = values[starts]
+        elif field == 'close':
+            result[name] = values[ends]
+        elif field == 'high':
+            result[name] = np.fmax.reduceat(values, starts)
+        elif field == 'low':
+            result[name] = np.fmin.reduceat(values, starts)
+        else:
+            result[name] = np.add.reduceat(np.nan_to_num(values), starts)
+    return pd.DataFrame(result)
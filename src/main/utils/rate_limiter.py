@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+线程安全的请求速率限制器（令牌桶）
+
+多个线程共享同一个限制器时，全局请求速率不超过 rate 次/秒，允许 burst 个请求的突发。
+burst=1 时等价于"相邻两次请求间隔 ≥ 1/rate 秒"，即原来的 min_request_interval 语义。
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """令牌桶限速器"""
+
+    def __init__(self, rate, burst=1):
+        """
+        参数：
+        - rate: 每秒补充的令牌数（<=0 表示不限速）
+        - burst: 桶容量，即允许的最大突发请求数
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_min_interval(cls, min_interval, burst=1):
+        """按最小请求间隔（秒）创建限速器"""
+        return cls(1.0 / min_interval if min_interval and min_interval > 0 else 0, burst)
+
+    def _reserve(self, tokens):
+        """预占令牌，返回需要等待的秒数（令牌可以为负，表示已被后续等待者预定）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """阻塞直到获得令牌，返回实际等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
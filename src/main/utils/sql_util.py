@@ -412,12 +412,13 @@ class MySQLUtil:
         df = cls._sanitize_nan(df)
         columns = list(df.columns)
         placeholders = ', '.join(['%s'] * len(columns))
-        update_clause = ', '.join([f"{col} = VALUES({col})" for col in columns if col not in key_columns])
+        # 列名加反引号，兼容 interval 等保留字
+        update_clause = ', '.join([f"`{col}` = VALUES(`{col}`)" for col in columns if col not in key_columns])
         if not update_clause:
             logging.warning("🟡 没有需要更新的字段（所有字段都是主键）")
             return 0
         sql = f"""
-            INSERT INTO {table_name} ({', '.join(columns)})
+            INSERT INTO {table_name} ({', '.join(f"`{col}`" for col in columns)})
             VALUES ({placeholders})
             ON DUPLICATE KEY UPDATE {update_clause}
         """
@@ -7,8 +7,12 @@ import os
 from datetime import datetime
 import pandas as pd
 from src.main.utils.sql_util import  MySQLUtil
+from src.main.websocket.kline_ring_buffer import KlineRingBuffer
+from src.main.websocket.trade_bar_aggregator import TradeBarAggregator
+from src.main.websocket.stream_replay import StreamRecorder, PipelineLatencyStats
 
 from src.main.trade.complete_trading_system_v2_4_4h import CompleteTradingSystem
+from src.main.trade.intrabar_signals import IntrabarSignalEvaluator
 
 # 设置工作目录为脚本所在路径
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,47 +25,106 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 币安WebSocket URL
+BINANCE_WEBSOCKET_URL = "wss://stream.binance.com:9443/ws"
+## 测试网络地址
+#BINANCE_WEBSOCKET_URL = "wss://stream.testnet.binance.vision:9443/ws"
+
 class SimpleBinanceWebSocket:
     """简化的币安WebSocket客户端 - 专门用于接收K线数据"""
     
-    def __init__(self, symbols=None, interval=None):
+    def __init__(self, symbols=None, interval=None, max_klines=10000, spill_dir=None,
+                 intrabar=False, intrabar_throttle=1.0, trade_bars=None,
+                 websocket_url=None, use_proxy=True, record_path=None, bar_flush_interval=1.0):
         """
         初始化WebSocket客户端
         
         Args:
             symbols (list): 要订阅的交易对列表，默认为['BTCUSDT', 'ETHUSDT']
+            max_klines (int): 每个交易对在内存中保留的已完成K线数量上限
+            spill_dir (str): 缓冲区写满后旧K线的溢出目录，为None时直接丢弃旧K线
+            intrabar (bool): 是否开启盘中信号评估（对未完成K线评估廉价信号子集）
+            intrabar_throttle (float): 同一交易对两次盘中评估的最小间隔（秒）
+            trade_bars (dict): 基于 @aggTrade 在本地构建K线的配置，如
+                {'bar_type': 'time', 'interval': '15s'} 或 {'bar_type': 'volume', 'threshold': 1000}，
+                为None时直接订阅币安K线数据流
+            websocket_url (str): WebSocket地址，默认连接币安；回放测试时指向本地回放服务
+            use_proxy (bool): 是否通过本地HTTP代理连接
+            record_path (str): 录制原始WebSocket帧的文件路径，为None时不录制
+            bar_flush_interval (float): 本地时间K线的定时收盘检查间隔（秒），没有新成交时也按时产出K线
         """
         self.symbols = symbols or 'BTCUSDT'
         #self.symbols = symbols or ['BTCUSDT', 'ETHUSDT']
         self.interval = interval
+
+        # 本地逐笔成交聚合K线：interval 使用聚合器的周期标签（如 t15s、vol1000，见 trade_bar_aggregator.bar_label）
+        self.trade_bar_aggregator = None
+        if trade_bars:
+            self.trade_bar_aggregator = TradeBarAggregator(self.symbols, **trade_bars)
+            self.interval = self.trade_bar_aggregator.label
+        # 消息线程和定时收盘线程共用聚合器和K线处理流程（预热状态、K线ID、数据库写入、盘中状态），
+        # 聚合与 _handle_kline_data 都在同一把锁内执行，同一时刻只处理一根K线
+        self._bar_lock = threading.Lock()
+        self.bar_flush_interval = bar_flush_interval
+        self._bar_flush_stop = threading.Event()
+        self.websocket_url = websocket_url or BINANCE_WEBSOCKET_URL
+        self.use_proxy = use_proxy
         self.ws = None
         self.is_connected = False
         self.kline_data = {}
+
+        # 原始帧录制与端到端延迟统计（用于离线回放压测）
+        self.recorder = StreamRecorder(record_path) if record_path else None
+        self.latency_stats = PipelineLatencyStats()
         
-        # 初始化K线数据存储
+        # 初始化K线数据存储（已完成K线使用固定容量的环形缓冲区，长时间运行内存不增长）
+        spill_path = None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            spill_path = os.path.join(spill_dir, f"{symbols}_{self.interval}_klines_spill.csv")
         self.kline_data[symbols] = {
             'current_kline': None,
-            'completed_klines': []
+            'completed_klines': KlineRingBuffer(max_klines, spill_path)
         }
 
         # 创建交易系统实例
         self.trading_system = CompleteTradingSystem()
+        # 各交易对预热耗时（秒）
+        self.warmup_timings = {}
+
+        # 盘中信号评估：已提交K线的指标快照、上次评估时间、最近一次评估结果
+        self.intrabar = intrabar
+        self.intrabar_throttle = intrabar_throttle
+        self.intrabar_state = {}
+        self._last_intrabar_eval = {}
+        self.intrabar_signals = {}
 
         MySQLUtil.init_pool()
 
     def on_message(self, ws, message):
         """处理接收到的消息"""
+        received_at = time.perf_counter()
+        if self.recorder:
+            self.recorder.write(message)
         try:
             data = json.loads(message)
             
             # 只处理K线数据
             if 'k' in data:
-                self._handle_kline_data(data)
+                with self._bar_lock:
+                    self._handle_kline_data(data, received_at)
+            elif data.get('e') == 'aggTrade' and self.trade_bar_aggregator:
+                # 逐笔成交在本地聚合为K线后交给同一个K线处理流程
+                with self._bar_lock:
+                    for kline_message in self.trade_bar_aggregator.on_agg_trade(data):
+                        self._handle_kline_data(kline_message, received_at)
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON解析错误: {e}")
         except Exception as e:
             logger.error(f"处理消息时出错: {e}")
+        finally:
+            self.latency_stats.record_message(received_at, time.perf_counter())
     
     def on_error(self, ws, error):
         """处理WebSocket错误"""
@@ -88,8 +151,15 @@ class SimpleBinanceWebSocket:
         # 订阅K线数据流
         self._subscribe_kline_streams()
     
-    def _handle_kline_data(self, data):
-        """处理K线数据"""
+    def _handle_kline_data(self, data, received_at=None):
+        """
+        处理K线数据
+
+        Args:
+            data (dict): 币安K线推送格式的消息
+            received_at (float): 触发这根K线的消息的接收时间（time.perf_counter），
+                定时收盘的本地K线没有对应的消息，传None时不统计消息到信号的延迟
+        """
         try:
             kline = data['k']
             symbol = kline['s']
@@ -116,6 +186,10 @@ class SimpleBinanceWebSocket:
             
             # 更新当前K线数据
             self.kline_data[symbol]['current_kline'] = kline_info
+
+            # 未完成的K线：可选的盘中信号评估（不修改已提交状态）
+            if not kline['x'] and self.intrabar:
+                self._evaluate_intrabar(symbol, kline_info)
             
             # 如果是完成的K线，添加到已完成列表并输出
             if kline['x']:
@@ -133,6 +207,10 @@ class SimpleBinanceWebSocket:
                 interval=self.interval
                 first_symbol = self.symbols
                 df = self.trading_system.process_complete_system(first_symbol, interval, kline_info)
+                if received_at is not None:
+                    self.latency_stats.record_signal(received_at, time.perf_counter())
+                if self.intrabar:
+                    self.intrabar_state[symbol] = IntrabarSignalEvaluator.from_indicator_frame(df)
 
                 # 计算价格变化
                 price_change = kline_info['close'] - kline_info['open']
@@ -143,12 +221,63 @@ class SimpleBinanceWebSocket:
         except Exception as e:
             logger.error(f"处理K线数据时出错: {e}")
     
+    def _evaluate_intrabar(self, symbol, kline_info):
+        """对未完成K线评估盘中预警信号（按交易对节流）"""
+        evaluator = self.intrabar_state.get(symbol)
+        if evaluator is None:
+            return None
+
+        now = time.monotonic()
+        if now - self._last_intrabar_eval.get(symbol, float('-inf')) < self.intrabar_throttle:
+            return None
+        self._last_intrabar_eval[symbol] = now
+
+        result = evaluator.evaluate(kline_info['close'])
+        result['open_time'] = kline_info['open_time']
+        self.intrabar_signals[symbol] = result
+        if result['warnings']:
+            logger.info(f"⚡ {symbol} 盘中预警 [{kline_info['open_time']}] 价格 {kline_info['close']}: "
+                        f"{' | '.join(result['warnings'])} "
+                        f"(CMACD {result['CMACD_macd']:.6f}/{result['CMACD_signal']:.6f}, RSI6 {result['RSI6']:.2f})")
+        return result
+
+    def flush_trade_bars(self, now_ms=None):
+        """本地时间K线：当前时间已越过K线结束时间时强制收盘，返回产出的K线数量"""
+        if not self.trade_bar_aggregator or self.trade_bar_aggregator.bar_type != 'time':
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        with self._bar_lock:
+            completed = self.trade_bar_aggregator.flush_until(now_ms)
+            for kline_message in completed:
+                self._handle_kline_data(kline_message)
+        return len(completed)
+
+    def _run_bar_flush_timer(self):
+        """定时收盘线程：每 bar_flush_interval 秒检查一次，直到 _bar_flush_stop 被设置"""
+        while not self._bar_flush_stop.wait(self.bar_flush_interval):
+            try:
+                self.flush_trade_bars()
+            except Exception as e:
+                logger.error(f"定时收盘本地K线时出错: {e}")
+
+    def start_bar_flush_timer(self):
+        """本地时间K线：启动定时收盘线程（成交稀疏时也按时产出K线），其他情况返回None"""
+        if not self.trade_bar_aggregator or self.trade_bar_aggregator.bar_type != 'time':
+            return None
+        self._bar_flush_stop.clear()
+        flush_thread = threading.Thread(target=self._run_bar_flush_timer, daemon=True)
+        flush_thread.start()
+        return flush_thread
+
     def _subscribe_kline_streams(self):
         """订阅K线数据流"""
        # for symbol in self.symbols:
             #支持1s,1m,3m,5m,15m,30m,1h,2h,4h,6h,8h,12h,1d,3d,1w,1M
-        # 订阅1分钟K线数据
-        stream_name = f"{self.symbols.lower()}@kline_{self.interval.lower()}"
+        # 订阅1分钟K线数据（本地聚合K线时改为订阅逐笔成交）
+        if self.trade_bar_aggregator:
+            stream_name = self.trade_bar_aggregator.stream_name()
+        else:
+            stream_name = f"{self.symbols.lower()}@kline_{self.interval.lower()}"
         subscribe_msg = {
             "method": "SUBSCRIBE",
             "params": [stream_name],
@@ -160,41 +289,60 @@ class SimpleBinanceWebSocket:
     def connect(self):
         """建立WebSocket连接"""
         try:
-            # 币安WebSocket URL
-            websocket_url = "wss://stream.binance.com:9443/ws"
-            ## 测试网络地址
-            #websocket_url = "wss://stream.testnet.binance.vision:9443/ws"
             # 创建WebSocket连接
             self.ws = websocket.WebSocketApp(
-                websocket_url,
+                self.websocket_url,
                 on_open=self.on_open,
                 on_message=self.on_message,
                 on_error=self.on_error,
                 on_close=self.on_close
             )
             
-            logger.info("正在连接到币安WebSocket...")
+            logger.info(f"正在连接到WebSocket: {self.websocket_url}")
+            proxy_options = {}
+            if self.use_proxy:
+                proxy_options = {
+                    'http_proxy_host': "127.0.0.1",
+                    'http_proxy_port': 7890,  # 根据你代理工具实际端口修改
+                    'proxy_type': "http",
+                }
             self.ws.run_forever(
-                http_proxy_host="127.0.0.1",
-                http_proxy_port=7890,  # 根据你代理工具实际端口修改
-                proxy_type="http",
                 ping_interval=30,  # 每 30 秒发送一次 ping
                 ping_timeout=10,  # 等待 Pong 的最大时间
-                ping_payload="keepalive"  # 可自定义 ping 内容
+                ping_payload="keepalive",  # 可自定义 ping 内容
+                **proxy_options
             )
             
         except Exception as e:
             logger.error(f"连接WebSocket时出错: {e}")
     
+    def warm_up(self):
+        """启动预热：为订阅的交易对加载历史窗口并计算指标，避免第一根K线出现延迟尖峰"""
+        #for symbol in self.symbols:
+        symbol = self.symbols
+        try:
+            elapsed = self.trading_system.warm_up(symbol, self.interval)
+            self.warmup_timings[symbol] = elapsed
+            state = self.trading_system.live_state.get((symbol, self.interval))
+            if self.intrabar and state is not None:
+                self.intrabar_state[symbol] = IntrabarSignalEvaluator.from_indicator_frame(state['indicators'])
+            logger.info(f"{symbol} {self.interval} 预热耗时: {elapsed:.3f} 秒")
+        except Exception as e:
+            logger.error(f"{symbol} 预热失败，首根K线将走冷启动流程: {e}")
+        return self.warmup_timings
+
     def start(self):
         """启动WebSocket客户端"""
         logger.info("启动简化的币安WebSocket客户端...")
         #logger.info(f"订阅的交易对: {', '.join(self.symbols)}")
         logger.info(f"订阅的交易对: {self.symbols}")
+        # 连接前先完成指标预热
+        self.warm_up()
         # 在单独的线程中运行WebSocket连接
         ws_thread = threading.Thread(target=self.connect)
         ws_thread.daemon = True
         ws_thread.start()
+        self.start_bar_flush_timer()
         
         # 主线程每分钟输出一次状态
         try:
@@ -203,8 +351,14 @@ class SimpleBinanceWebSocket:
                 self._print_status()
         except KeyboardInterrupt:
             logger.info("正在关闭WebSocket连接...")
+            self._bar_flush_stop.set()
             if self.ws:
                 self.ws.close()
+            # 把缓冲区中尚未溢出的K线写盘（仅在配置了 spill_dir 时生效）
+            for symbol_data in self.kline_data.values():
+                symbol_data['completed_klines'].flush()
+            if self.recorder:
+                self.recorder.close()
     
     def _print_status(self):
         """打印当前状态"""
@@ -225,19 +379,27 @@ class SimpleBinanceWebSocket:
                 logger.info(f"  当前K线时间: {current_kline['open_time']}")
                 logger.info(f"  当前价格: {current_kline['close']}")
                 logger.info(f"  是否完成: {current_kline['is_final']}")
-        
+
+        stats = self.latency_stats.summary()
+        if stats['messages']:
+            logger.info(f"  消息数: {stats['messages']}, 吞吐: {stats['throughput_msg_per_s']:.1f} 条/秒")
+            for name, latency in (('消息处理', stats['message_latency']), ('信号计算', stats['signal_latency'])):
+                if latency:
+                    logger.info(f"  {name}延迟 p50/p95/p99: {latency['p50_ms']:.2f}/{latency['p95_ms']:.2f}/"
+                                f"{latency['p99_ms']:.2f} ms")
+
         logger.info("=" * 50)
     
     def get_latest_kline(self, symbol):
-        """获取指定交易对的最新K线数据"""
-        if symbol in self.kline_data and self.kline_data[symbol]['completed_klines']:
-            return self.kline_data[symbol]['completed_klines'][-1]
+        """获取指定交易对的最新K线数据（零拷贝视图，长度为1的结构化数组）"""
+        if symbol in self.kline_data:
+            return self.kline_data[symbol]['completed_klines'].latest()
         return None
     
     def get_all_klines(self, symbol):
-        """获取指定交易对的所有K线数据"""
+        """获取指定交易对缓冲区内的所有K线数据（零拷贝视图，按时间正序）"""
         if symbol in self.kline_data:
-            return self.kline_data[symbol]['completed_klines']
+            return self.kline_data[symbol]['completed_klines'].view()
         return []
     
     def save_klines_to_csv(self, symbol, filename=None):
@@ -251,26 +413,13 @@ class SimpleBinanceWebSocket:
         
         try:
             klines = self.kline_data[symbol]['completed_klines']
-            if not klines:
+            if len(klines) == 0:
                 logger.warning(f"没有 {symbol} 的K线数据可保存")
                 return
             
-            # 准备数据
-            data_list = []
-            for kline in klines:
-                data_list.append({
-                    'timestamp': kline['open_time'],
-                    'open': kline['open'],
-                    'high': kline['high'],
-                    'low': kline['low'],
-                    'close': kline['close'],
-                    'volume': kline['volume'],
-                    'quote_volume': kline['quote_volume'],
-                    'trades': kline['trades']
-                })
-            
-            # 创建DataFrame并保存
-            df = pd.DataFrame(data_list)
+            # 直接由环形缓冲区的列数组构建DataFrame并保存
+            df = klines.to_dataframe().rename(columns={'open_time': 'timestamp'})
+            df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades']]
             df.to_csv(filename, index=False)
             logger.info(f"{symbol} K线数据已保存到 {filename}")
             
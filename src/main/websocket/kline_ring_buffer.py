@@ -0,0 +1,122 @@
+import os
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# K线环形缓冲区的列定义（open_time / close_time 为毫秒时间戳）
+KLINE_DTYPE = np.dtype([
+    ('open_time', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+    ('close_time', 'i8'),
+    ('quote_volume', 'f8'),
+    ('trades', 'i8'),
+])
+
+
+class KlineRingBuffer:
+    """
+    固定容量、基于NumPy的K线环形缓冲区。
+
+    内部使用两倍容量的结构化数组，每条K线同时写入 i 和 i + capacity 两个位置，
+    因此最近 capacity 条K线在内存中始终是连续的，view() 可以直接返回零拷贝视图。
+    缓冲区写满后，可选地把即将被覆盖的旧K线批量追加到磁盘CSV文件（spill_path）。
+    """
+
+    def __init__(self, capacity=10000, spill_path=None):
+        """
+        Args:
+            capacity (int): 内存中保留的最大K线条数
+            spill_path (str): 溢出文件路径，为None时旧数据直接丢弃
+        """
+        if capacity <= 0:
+            raise ValueError("capacity 必须为正整数")
+        self.capacity = int(capacity)
+        self.spill_path = spill_path
+        self._data = np.zeros(2 * self.capacity, dtype=KLINE_DTYPE)
+        self._count = 0    # 累计写入条数
+        self._spilled = 0  # 已写入磁盘的条数
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total_count(self):
+        """累计写入的K线条数（包括已被覆盖的）"""
+        return self._count
+
+    def append(self, kline_info):
+        """追加一条已完成的K线（kline_info 为 _handle_kline_data 构建的字典）"""
+        if self._count >= self.capacity and self._spilled <= self._count - self.capacity:
+            # 即将覆盖尚未落盘的最旧K线，先把当前窗口中未落盘的部分整体写出
+            self._spill()
+
+        pos = self._count % self.capacity
+        row = (
+            int(kline_info['timestamp']),
+            kline_info['open'],
+            kline_info['high'],
+            kline_info['low'],
+            kline_info['close'],
+            kline_info['volume'],
+            int(kline_info['close_time']),
+            kline_info['quote_volume'],
+            int(kline_info['trades']),
+        )
+        self._data[pos] = row
+        self._data[pos + self.capacity] = row
+        self._count += 1
+
+    def view(self):
+        """返回按时间正序排列的最近K线的零拷贝视图（只读）"""
+        if self._count <= self.capacity:
+            window = self._data[:self._count]
+        else:
+            start = self._count % self.capacity
+            window = self._data[start:start + self.capacity]
+        window = window.view()
+        window.flags.writeable = False
+        return window
+
+    def latest(self):
+        """返回最新一条K线的零拷贝视图（长度为1的结构化数组），无数据时返回None"""
+        if self._count == 0:
+            return None
+        return self.view()[-1:]
+
+    def to_dataframe(self):
+        """将缓冲区中的K线转换为DataFrame（open_time/close_time 转为本地时间）"""
+        df = pd.DataFrame(self.view())
+        return self._format_frame(df)
+
+    def flush(self):
+        """将内存中尚未落盘的K线全部写入溢出文件"""
+        if self.spill_path and self._spilled < self._count:
+            self._spill()
+
+    def _spill(self):
+        """把 [_spilled, _count) 范围内仍在内存中的K线追加写入溢出文件"""
+        oldest_in_memory = max(0, self._count - self.capacity)
+        first = max(self._spilled, oldest_in_memory)
+        if self.spill_path and first < self._count:
+            start = first % self.capacity
+            chunk = self._data[start:start + (self._count - first)]
+            df = self._format_frame(pd.DataFrame(chunk))
+            write_header = not os.path.exists(self.spill_path)
+            df.to_csv(self.spill_path, mode='a', header=write_header, index=False)
+            logger.debug(f"K线缓冲区溢出写盘 {len(df)} 条 -> {self.spill_path}")
+        self._spilled = self._count
+
+    @staticmethod
+    def _format_frame(df):
+        # 与 datetime.fromtimestamp 保持一致，转换为本地时间
+        local_tz = datetime.now().astimezone().tzinfo
+        for col in ('open_time', 'close_time'):
+            df[col] = pd.to_datetime(df[col], unit='ms', utc=True).dt.tz_convert(local_tz).dt.tz_localize(None)
+        return df
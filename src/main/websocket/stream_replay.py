@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket 数据流录制与回放工具
+
+- StreamRecorder: 把收到的原始WebSocket帧连同接收时间戳写入紧凑的追加式二进制文件
+- read_frames:    按顺序读取录制文件
+- ReplayServer:   在本地启动WebSocket服务，按 1x / Nx / 最大速度 回放录制的帧
+- PipelineLatencyStats: 统计 on_message 到 process_complete_system 的端到端延迟和吞吐
+
+用法示例:
+    # 录制（在客户端中开启）
+    python -m src.main.trading_system_lets_go --record recorded/suiusdt_1m.bin
+    # 回放（10倍速）
+    python -m src.main.websocket.stream_replay --file recorded/suiusdt_1m.bin --speed 10
+    # 客户端连接本地回放服务
+    python -m src.main.trading_system_lets_go --ws-url ws://127.0.0.1:8765 --no-proxy
+"""
+
+import os
+import time
+import json
+import struct
+import logging
+import argparse
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 帧头：接收时间（纳秒，int64） + 帧长度（uint32），小端
+FRAME_HEADER = struct.Struct('<qI')
+
+
+class StreamRecorder:
+    """追加式WebSocket帧录制器（线程安全）"""
+
+    def __init__(self, path, flush_every=100):
+        """
+        Args:
+            path (str): 录制文件路径，已存在时追加写入
+            flush_every (int): 每写入多少帧刷新一次文件缓冲
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self.frame_count = 0
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+
+    def write(self, message, recv_ns=None):
+        """写入一帧原始消息（str 或 bytes）"""
+        if recv_ns is None:
+            recv_ns = time.time_ns()
+        payload = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        with self._lock:
+            self._file.write(FRAME_HEADER.pack(recv_ns, len(payload)))
+            self._file.write(payload)
+            self.frame_count += 1
+            if self.frame_count % self.flush_every == 0:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._file.close()
+
+
+def read_frames(path):
+    """
+    顺序读取录制文件
+
+    返回:
+    - 生成器，逐个产出 (recv_ns, message) 元组；文件末尾不完整的帧会被忽略
+    """
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            recv_ns, length = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield recv_ns, payload.decode('utf-8')
+
+
+class ReplayServer:
+    """本地WebSocket回放服务（依赖 websockets 库，按需导入）"""
+
+    def __init__(self, path, host='127.0.0.1', port=8765, speed=1.0, loop_count=1):
+        """
+        Args:
+            path (str): 录制文件路径
+            host / port: 监听地址
+            speed (float): 回放倍速，1 为原速，<=0 或 None 表示不等待、以最大速度发送
+            loop_count (int): 每个连接回放录制文件的次数
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop_count = loop_count
+
+    async def _handle_client(self, websocket, path=None):
+        import asyncio
+
+        # 客户端的 SUBSCRIBE 等请求只做应答，不影响回放
+        async def consume_requests():
+            async for raw in websocket:
+                try:
+                    request = json.loads(raw)
+                    await websocket.send(json.dumps({'result': None, 'id': request.get('id')}))
+                except (ValueError, AttributeError):
+                    continue
+
+        consumer = asyncio.ensure_future(consume_requests())
+        sent = 0
+        start = time.perf_counter()
+        try:
+            for _ in range(self.loop_count):
+                first_ns = None
+                replay_start = time.perf_counter()
+                for recv_ns, message in read_frames(self.path):
+                    if self.speed and self.speed > 0:
+                        if first_ns is None:
+                            first_ns = recv_ns
+                        due = (recv_ns - first_ns) / 1e9 / self.speed
+                        delay = due - (time.perf_counter() - replay_start)
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    await websocket.send(message)
+                    sent += 1
+        finally:
+            consumer.cancel()
+            elapsed = time.perf_counter() - start
+            logger.info(f"回放结束: 发送 {sent} 帧, 耗时 {elapsed:.3f} 秒, "
+                        f"{sent / elapsed if elapsed > 0 else 0:.0f} 帧/秒")
+
+    def serve_forever(self):
+        """启动回放服务（阻塞）"""
+        try:
+            import asyncio
+            import websockets
+        except ImportError as e:
+            raise ImportError("回放服务需要安装 websockets: pip install websockets") from e
+
+        async def main():
+            async with websockets.serve(self._handle_client, self.host, self.port):
+                logger.info(f"回放服务已启动: ws://{self.host}:{self.port} (文件: {self.path}, 倍速: {self.speed or 'max'})")
+                await asyncio.Future()
+
+        asyncio.run(main())
+
+
+class PipelineLatencyStats:
+    """端到端延迟统计：消息接收 -> 处理完成（K线收盘时包含 process_complete_system）"""
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._message_latency = np.zeros(capacity)
+        self._signal_latency = np.zeros(capacity)
+        self.message_count = 0
+        self.signal_count = 0
+        self._first_ts = None
+        self._last_ts = None
+
+    def record_message(self, received_at, finished_at):
+        """记录一条消息的处理耗时（perf_counter 秒）"""
+        self._message_latency[self.message_count % self.capacity] = finished_at - received_at
+        self.message_count += 1
+        if self._first_ts is None:
+            self._first_ts = received_at
+        self._last_ts = finished_at
+
+    def record_signal(self, received_at, finished_at):
+        """记录一次 K线收盘 -> 指标/信号 计算完成的耗时"""
+        self._signal_latency[self.signal_count % self.capacity] = finished_at - received_at
+        self.signal_count += 1
+
+    @staticmethod
+    def _percentiles(values):
+        if len(values) == 0:
+            return {}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': values.max() * 1000}
+
+    def summary(self):
+        """返回吞吐与延迟分位数统计"""
+        wall = (self._last_ts - self._first_ts) if self._first_ts is not None else 0
+        return {
+            'messages': self.message_count,
+            'signals': self.signal_count,
+            'throughput_msg_per_s': self.message_count / wall if wall > 0 else 0.0,
+            'message_latency': self._percentiles(self._message_latency[:min(self.message_count, self.capacity)]),
+            'signal_latency': self._percentiles(self._signal_latency[:min(self.signal_count, self.capacity)]),
+        }
+
+
+def main():
+    """启动回放服务"""
+    parser = argparse.ArgumentParser(description='WebSocket录制数据回放服务')
+    parser.add_argument('--file', required=True, help='录制文件路径')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--speed', default='1',
+                        help='回放倍速，如 1、10，max 表示以最大速度发送 (默认: 1)')
+    parser.add_argument('--loop', type=int, default=1, help='每个连接回放的次数 (默认: 1)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    speed = None if args.speed == 'max' else float(args.speed)
+    ReplayServer(args.file, args.host, args.port, speed, args.loop).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import logging
+import re
+from decimal import Decimal
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 时间周期单位 -> 毫秒
+_UNIT_MS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+    'w': 7 * 24 * 60 * 60 * 1000,
+}
+
+
+def interval_to_ms(interval):
+    """将 '15s'、'1m'、'4h' 这类周期字符串转换为毫秒数"""
+    match = re.fullmatch(r'(\d+)([smhdw])', str(interval).strip())
+    if not match:
+        raise ValueError(f"不支持的时间周期: {interval}")
+    return int(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+# K线周期标签（写入 kline_data.interval，VARCHAR(10)）：
+# - 时间K线: 't' + 周期，如 t15s、t1m
+# - 成交量K线: 'vol' + 阈值，如 vol1000、vol2p5（小数点写作 p）
+# - 成交额K线: 'usd' + 阈值，如 usd500K、usd1M（整千/整百万/整十亿写作 K/M/B）
+# 币安K线周期都以数字开头（1m、4h、1M ...），本地聚合的标签以字母开头，两者不会冲突
+MAX_LABEL_LENGTH = 10
+_LABEL_PREFIX = {'time': 't', 'volume': 'vol', 'dollar': 'usd'}
+_THRESHOLD_SUFFIXES = ((10 ** 9, 'B'), (10 ** 6, 'M'), (10 ** 3, 'K'))
+
+
+def format_threshold(threshold):
+    """阈值 -> 标签中的数字部分（不使用科学计数法）"""
+    value = Decimal(repr(float(threshold))).normalize()
+    if value <= 0:
+        raise ValueError(f"阈值必须为正数: {threshold}")
+    if value == value.to_integral_value():
+        number = int(value)
+        for scale, suffix in _THRESHOLD_SUFFIXES:
+            if number % scale == 0:
+                return f"{number // scale}{suffix}"
+        return str(number)
+    return format(value, 'f').replace('.', 'p')
+
+
+def bar_label(bar_type, interval=None, threshold=None):
+    """
+    本地聚合K线的周期标签（格式见上方说明）
+
+    标签超过 kline_data.interval 的长度时抛出 ValueError。
+    """
+    value = interval if bar_type == 'time' else format_threshold(threshold)
+    label = f"{_LABEL_PREFIX[bar_type]}{value}"
+    if len(label) > MAX_LABEL_LENGTH:
+        raise ValueError(f"K线周期标签 {label} 超过 {MAX_LABEL_LENGTH} 个字符，请调整 interval / threshold")
+    return label
+
+
+def aggregate_trades(price, qty, trade_time, bar_keys):
+    """
+    向量化地把逐笔成交聚合为OHLCV K线
+
+    参数:
+    - price / qty / trade_time: 按时间排序的成交价格、数量、时间（毫秒）数组
+    - bar_keys: 每笔成交所属K线的编号（单调不减）
+
+    返回:
+    - 每根K线的 key、起止下标及 OHLCV/成交额/成交笔数 组成的字典
+    """
+    starts = np.flatnonzero(np.r_[True, bar_keys[1:] != bar_keys[:-1]])
+    ends = np.r_[starts[1:], len(price)]
+    return {
+        'key': bar_keys[starts],
+        'start': starts,
+        'end': ends,
+        'first_time': trade_time[starts],
+        'last_time': trade_time[ends - 1],
+        'open': price[starts],
+        'high': np.maximum.reduceat(price, starts),
+        'low': np.minimum.reduceat(price, starts),
+        'close': price[ends - 1],
+        'volume': np.add.reduceat(qty, starts),
+        'quote_volume': np.add.reduceat(price * qty, starts),
+        'trades': ends - starts,
+    }
+
+
+class TradeBarAggregator:
+    """
+    基于 @aggTrade 逐笔成交在本地构建K线。
+
+    支持三种K线类型:
+    - 'time'  : 任意时间周期（包括秒级，如 '15s'）
+    - 'volume': 每累计 threshold 个基础资产成交量生成一根K线
+    - 'dollar': 每累计 threshold 的成交额（价格 × 数量）生成一根K线
+
+    逐笔成交先缓存在当前未完成K线中，只有在检测到K线边界（O(1) 判断）时才把缓存
+    整体交给 aggregate_trades 做向量化聚合；产出的消息与币安K线推送格式一致，
+    可直接交给 SimpleBinanceWebSocket._handle_kline_data 处理。
+
+    K线周期标签由 bar_label 生成（t15s、vol1000、usd1M），不会与币安K线周期冲突。
+    时间K线在没有新成交时不会自动收盘，需要调用方定期调用 flush_until；
+    K线产出后迟到的成交（属于已产出的K线）被丢弃并计入 late_trades，同一根K线不会重复产出。
+    """
+
+    def __init__(self, symbol, bar_type='time', interval='1m', threshold=None):
+        """
+        Args:
+            symbol (str): 交易对，如 'BTCUSDT'
+            bar_type (str): 'time' / 'volume' / 'dollar'
+            interval (str): 时间K线周期（bar_type='time' 时使用）
+            threshold (float): 成交量/成交额K线的阈值
+        """
+        if bar_type not in ('time', 'volume', 'dollar'):
+            raise ValueError(f"不支持的K线类型: {bar_type}")
+        if bar_type != 'time' and not threshold:
+            raise ValueError(f"{bar_type} K线需要设置 threshold")
+
+        self.symbol = symbol.upper()
+        self.bar_type = bar_type
+        self.interval_ms = interval_to_ms(interval) if bar_type == 'time' else None
+        self.threshold = float(threshold) if threshold else None
+        # K线周期标签（写入 kline_data.interval）
+        self.label = bar_label(bar_type, interval, threshold)
+
+        # 当前未完成K线中的逐笔成交
+        self._prices = []
+        self._qtys = []
+        self._times = []
+        self._current_key = None
+        # 时间K线：最近一根已产出K线的编号，以及因迟到而丢弃的成交笔数
+        self._last_emitted_key = None
+        self.late_trades = 0
+        # 成交量/成交额K线按累计量的固定网格（threshold 的整数倍）切分：
+        # _carry 为缓存起点相对当前网格的偏移，_cum 为 _carry 加上缓存中的累计量
+        self._carry = 0.0
+        self._cum = 0.0
+
+    def stream_name(self):
+        """对应的币安逐笔成交数据流名称"""
+        return f"{self.symbol.lower()}@aggTrade"
+
+    def on_agg_trade(self, data):
+        """
+        处理一条 aggTrade 推送
+
+        返回:
+        - 本次成交触发完成的K线消息列表（可能为空）
+        """
+        price = float(data['p'])
+        qty = float(data['q'])
+        trade_time = int(data['T'])
+
+        completed = []
+        if self.bar_type == 'time':
+            key = trade_time // self.interval_ms
+            if self._last_emitted_key is not None and key <= self._last_emitted_key:
+                self._drop_late_trades(1)
+                return []
+            if self._current_key is not None and key != self._current_key:
+                # 新成交已进入下一根K线，缓存中的K线全部完成
+                completed = self._flush(force=True)
+            self._current_key = key
+        self._prices.append(price)
+        self._qtys.append(qty)
+        self._times.append(trade_time)
+
+        if self.bar_type != 'time':
+            self._cum += qty if self.bar_type == 'volume' else price * qty
+            if self._cum >= self.threshold:
+                completed = self._flush()
+        return completed
+
+    def add_trades(self, price, qty, trade_time):
+        """
+        批量加入逐笔成交（用于回放或历史回补），一次性向量化聚合
+
+        返回:
+        - 完成的K线消息列表
+        """
+        price = np.asarray(price, dtype=float)
+        qty = np.asarray(qty, dtype=float)
+        trade_time = np.asarray(trade_time, dtype=np.int64)
+        if self.bar_type == 'time' and self._last_emitted_key is not None:
+            on_time = trade_time // self.interval_ms > self._last_emitted_key
+            self._drop_late_trades(int(np.sum(~on_time)))
+            price, qty, trade_time = price[on_time], qty[on_time], trade_time[on_time]
+        self._prices.extend(price.tolist())
+        self._qtys.extend(qty.tolist())
+        self._times.extend(trade_time.tolist())
+        if self._times and self.bar_type == 'time':
+            self._current_key = self._times[-1] // self.interval_ms
+        return self._flush()
+
+    def flush_until(self, now_ms):
+        """时间K线：当前时间已越过K线结束时间时，强制收盘（无新成交时也能及时产出K线）"""
+        if self.bar_type != 'time' or self._current_key is None:
+            return []
+        if now_ms // self.interval_ms > self._current_key:
+            return self._flush(force=True)
+        return []
+
+    def _drop_late_trades(self, count):
+        """丢弃属于已产出K线的迟到成交（已写入数据库的K线不再重复产出）"""
+        if count:
+            self.late_trades += count
+            logger.warning(f"{self.symbol} {self.label} 丢弃 {count} 笔迟到成交（K线已收盘），累计 {self.late_trades} 笔")
+
+    def _measure(self, price, qty):
+        return qty if self.bar_type == 'volume' else price * qty
+
+    def _grid_position(self, price, qty):
+        """每笔成交之前在累计量网格上的位置（跨越阈值的那笔成交计入当前K线）"""
+        measure = self._measure(price, qty)
+        return self._carry + np.cumsum(measure) - measure
+
+    def _flush(self, force=False):
+        """聚合缓存中的成交，产出已完成的K线，未完成部分留在缓存中"""
+        if not self._times:
+            return []
+
+        price = np.asarray(self._prices, dtype=float)
+        qty = np.asarray(self._qtys, dtype=float)
+        trade_time = np.asarray(self._times, dtype=np.int64)
+        if self.bar_type == 'time':
+            keys = trade_time // self.interval_ms
+        else:
+            grid = self._grid_position(price, qty)
+            keys = (grid // self.threshold).astype(np.int64)
+        bars = aggregate_trades(price, qty, trade_time, keys)
+
+        # 判断最后一根K线是否已完成
+        n_bars = len(bars['key'])
+        if self.bar_type == 'time':
+            last_complete = force or (self._current_key is not None and bars['key'][-1] != self._current_key)
+        else:
+            end_position = self._carry + float(np.sum(self._measure(price, qty)))
+            last_complete = end_position >= (bars['key'][-1] + 1) * self.threshold
+        n_complete = n_bars if last_complete else n_bars - 1
+
+        messages = [self._to_kline_message(bars, i) for i in range(n_complete)]
+
+        # 未完成的K线保留在缓存中
+        keep_from = bars['start'][n_complete] if n_complete < n_bars else len(price)
+        self._prices = self._prices[keep_from:]
+        self._qtys = self._qtys[keep_from:]
+        self._times = self._times[keep_from:]
+        if self.bar_type == 'time':
+            if n_complete:
+                self._last_emitted_key = int(bars['key'][n_complete - 1])
+            if force:
+                self._current_key = None
+        else:
+            if keep_from < len(price):
+                self._carry = float(grid[keep_from] - keys[keep_from] * self.threshold)
+            else:
+                self._carry = end_position % self.threshold
+            self._cum = self._carry + float(np.sum(self._measure(price[keep_from:], qty[keep_from:])))
+        return messages
+
+    def _to_kline_message(self, bars, i):
+        """构造与币安 kline 推送一致的消息体"""
+        if self.bar_type == 'time':
+            open_time = int(bars['key'][i]) * self.interval_ms
+            close_time = open_time + self.interval_ms - 1
+        else:
+            open_time = int(bars['first_time'][i])
+            close_time = int(bars['last_time'][i])
+        return {
+            'e': 'kline',
+            'E': close_time,
+            's': self.symbol,
+            'k': {
+                't': open_time,
+                'T': close_time,
+                's': self.symbol,
+                'i': self.label,
+                'o': str(bars['open'][i]),
+                'c': str(bars['close'][i]),
+                'h': str(bars['high'][i]),
+                'l': str(bars['low'][i]),
+                'v': str(bars['volume'][i]),
+                'n': int(bars['trades'][i]),
+                'x': True,
+                'q': str(bars['quote_volume'][i]),
+            }
+        }
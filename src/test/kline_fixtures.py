@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+
+
+def raw_klines(n=700, seed=0):
+    """kline_data 格式的模拟K线（SUIUSDT 4h，id 从1开始），多个测试模块共用"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1), 'symbol': 'SUIUSDT', 'interval': '4h',
+        'open_time': pd.date_range('2025-01-01', periods=n, freq='4h'),
+        'open': close * (1 + rng.normal(0, 0.002, n)), 'high': close * 1.01, 'low': close * 0.99,
+        'close': close, 'volume': rng.uniform(100, 1000, n),
+    })
@@ -0,0 +1,148 @@
+import importlib.util
+import json
+import os
+import tempfile
+
+import pandas as pd
+import requests
+
+from src.main.init.backfill_commodity_data import CommodityBackfill
+from src.test.test_commodity_fetcher import _FakeSession
+
+
+class _FlakySession(_FakeSession):
+    """指定月份的请求失败"""
+
+    def __init__(self, failing_period1):
+        super().__init__(delay=0)
+        self.failing_period1 = failing_period1
+
+    def get(self, url, params=None, timeout=None):
+        if params['period1'] in self.failing_period1:
+            self.calls.append((url.rsplit('/', 1)[-1], params['period1'], params['period2'], params['interval']))
+            raise requests.exceptions.ConnectionError('proxy down')
+        return super().get(url, params=params, timeout=timeout)
+
+
+def _config(temp_dir):
+    return {'interval': '1d', 'min_request_interval': 0, 'max_retries': 1, 'max_workers': 4,
+            'cache_dir': os.path.join(temp_dir, 'cache'), 'checkpoint_dir': os.path.join(temp_dir, 'checkpoints')}
+
+
+def test_backfill_resumes_only_failed_months():
+    temp_dir = tempfile.mkdtemp()
+    march = int(pd.Timestamp('2022-03-01').timestamp())
+    flaky = _FlakySession({march})
+    summary = CommodityBackfill(_config(temp_dir), session=flaky).run(['CL=F', 'GC=F'], '2021-01-01', '2022-12-31')
+    # 24 个月 × 2 个品种，不再受 24 个月上限约束
+    assert summary == {'done': 46, 'failed': 2, 'skipped': 0, 'rows': summary['rows']}
+    assert len(flaky.calls) == 48
+
+    with open(os.path.join(temp_dir, 'checkpoints', 'CL_F_1d.json'), encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    assert checkpoint['months']['2022-03']['status'] == 'failed'
+    assert checkpoint['months']['2022-02']['status'] == 'done'
+    assert checkpoint['months']['2022-02']['rows'] == 27  # 28 天，其中一根 close 为 None 被过滤
+
+    # 重跑只请求失败的月份，已完成的月份直接用缓存
+    session = _FakeSession(delay=0)
+    backfill = CommodityBackfill(_config(temp_dir), session=session)
+    summary = backfill.run(['CL=F', 'GC=F'], '2021-01-01', '2022-12-31')
+    assert summary['done'] == 2 and summary['skipped'] == 46 and summary['failed'] == 0
+    assert sorted(call[0] for call in session.calls) == ['CL=F', 'GC=F']
+    assert all(call[1] == march for call in session.calls)
+
+    frame = backfill.cache.load('CL=F', '1d', '2022-03')
+    assert len(frame) == 30 and frame['oil_close'].notna().all()
+    assert backfill.run(['CL=F'], '2021-01-01', '2022-12-31')['skipped'] == 24
+
+
+def test_rate_limiter_allows_configured_burst():
+    backfill = CommodityBackfill({'min_request_interval': 10, 'rate_burst': 3,
+                                  'cache_dir': tempfile.mkdtemp(), 'checkpoint_dir': tempfile.mkdtemp()},
+                                 session=_FakeSession(delay=0))
+    assert [backfill.fetcher.rate_limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def _trading_system_class():
+    """加载原油/黄金交易系统（模块加载时会切换工作目录，加载后恢复）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main', 'trade',
+                        '01_complete_trading_system_v2.4_4h_oil_gold.py')
+    cwd = os.getcwd()
+    try:
+        spec = importlib.util.spec_from_file_location('oil_gold_trading_system', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module.CompleteTradingSystem
+
+
+def test_trading_system_reads_what_backfill_wrote():
+    temp_dir = tempfile.mkdtemp()
+    config = {'min_request_interval': 0, 'max_retries': 1,
+              'cache_dir': os.path.join(temp_dir, 'cache'), 'checkpoint_dir': os.path.join(temp_dir, 'checkpoints')}
+    backfill_session = _FakeSession(delay=0)
+    backfill = CommodityBackfill(config, session=backfill_session)
+    assert backfill.run(['CL=F', 'GC=F'], '2023-01-01', '2023-06-30')['done'] == 12
+    # 超出小时线回溯范围的月份按日线回填，不会被接口拒绝后反复重试
+    assert {call[3] for call in backfill_session.calls} == {'1d'}
+    with open(os.path.join(config['checkpoint_dir'], 'CL_F_1h.json'), encoding='utf-8') as f:
+        assert json.load(f)['months']['2023-03']['interval'] == '1d'
+
+    system = _trading_system_class()()
+    system.update_oil_batch_config(cache_dir=config['cache_dir'], min_request_interval=0)
+    assert system.oil_batch_config['interval'] == backfill.config['interval']
+    session = _FakeSession(delay=0)
+    system.commodity_fetcher.session = session
+    frames = system.commodity_fetcher.fetch_range(['CL=F', 'GC=F'], '2023-02-10', '2023-05-20')
+    assert session.calls == []
+    assert len(frames['oil']) > 0 and len(frames['gld']) > 0
+
+
+def test_trading_system_fetches_oil_and_gold_in_one_call():
+    system = _trading_system_class()()
+    system.update_oil_batch_config(cache_dir=None, min_request_interval=0, max_workers=4)
+    session = _FakeSession(delay=0.05)
+    system.commodity_fetcher.session = session
+    requested = []
+    fetch_range = system.commodity_fetcher.fetch_range
+
+    def spy(symbols, *args, **kwargs):
+        requested.append(list(symbols))
+        return fetch_range(symbols, *args, **kwargs)
+
+    system.commodity_fetcher.fetch_range = spy
+    crypto_df = pd.DataFrame({'open_time': pd.date_range('2023-01-01', '2023-02-28', freq='4h')})
+    frames = system.get_commodity_frames_by_crypto_timerange(crypto_df, '4h')
+    # 两个品种在同一次 fetch_range 中并发请求，按前缀拆分结果
+    assert requested == [['CL=F', 'GC=F']]
+    assert len(session.calls) == 4 and session.max_active > 1
+    assert frames['oil']['oil_close'].max() < 2000.0 and frames['gld']['gld_close'].min() >= 2000.0
+
+
+def test_open_month_is_partial_and_refetched():
+    temp_dir = tempfile.mkdtemp()
+    start = pd.Timestamp.now(tz='UTC').tz_localize(None).replace(day=1) - pd.DateOffset(months=1)
+    session = _FakeSession(delay=0)
+    backfill = CommodityBackfill(_config(temp_dir), session=session)
+    backfill.run(['CL=F'], start, None)
+    with open(os.path.join(temp_dir, 'checkpoints', 'CL_F_1d.json'), encoding='utf-8') as f:
+        statuses = [entry['status'] for entry in json.load(f)['months'].values()]
+    assert statuses[-1] == 'partial'
+    # 月初宽限期内上个月也尚未结束
+    partial = statuses.count('partial')
+
+    # 当前月份的缓存过期后重新请求，已结束的月份不再请求
+    backfill.cache.ttl = 0
+    calls = len(session.calls)
+    summary = backfill.run(['CL=F'], start, None)
+    assert summary['done'] == partial and len(session.calls) == calls + partial
+
+
+if __name__ == "__main__":
+    test_backfill_resumes_only_failed_months()
+    test_rate_limiter_allows_configured_burst()
+    test_trading_system_reads_what_backfill_wrote()
+    test_trading_system_fetches_oil_and_gold_in_one_call()
+    test_open_month_is_partial_and_refetched()
@@ -0,0 +1,93 @@
+import tempfile
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from src.main.utils.sql_util import MySQLUtil
+from src.main.data_visual import backtest_data_source
+
+
+def _fake_table(n=1000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'open_time': pd.date_range('2024-01-01', periods=n, freq='4h'),
+        'close': 100 + np.cumsum(rng.normal(0, 1, n)),
+        'label': rng.choice([0, 1, 2], n),
+    })
+
+
+def _install_fake_fetch(monkeypatch, table, queries):
+    """按 fetch_dataframe 收到的条件在内存表上过滤，模拟 complete_tech_indicators 查询"""
+
+    def fake_fetch_dataframe(table_name, conditions=None, columns='*', order_by=None, limit=None, offset=None):
+        queries.append(conditions)
+        df = table
+        op, low, high = conditions['open_time']
+        assert op == 'BETWEEN'
+        df = df[(df['open_time'] >= pd.Timestamp(low)) & (df['open_time'] <= pd.Timestamp(high))]
+        if '(`open_time`, `id`)' in conditions:
+            op, (last_time, last_id) = conditions['(`open_time`, `id`)']
+            assert op == '>'
+            last_time = pd.Timestamp(last_time)
+            df = df[(df['open_time'] > last_time) | ((df['open_time'] == last_time) & (df['id'] > last_id))]
+        names = [c.strip('`') for c in columns]
+        return df.sort_values(['open_time', 'id'])[names].head(limit).reset_index(drop=True)
+
+    monkeypatch.setattr(MySQLUtil, 'fetch_dataframe', fake_fetch_dataframe)
+
+
+def test_chunked_fetch_and_incremental_cache(monkeypatch):
+    table = _fake_table()
+    queries = []
+    _install_fake_fetch(monkeypatch, table, queries)
+    cache_dir = tempfile.mkdtemp()
+
+    df = backtest_data_source.load_backtest_data('SUIUSDT', '4h', cache_dir=cache_dir, chunk_size=300)
+    assert len(queries) == 4
+    assert np.array_equal(df['close'].to_numpy(), table['close'].to_numpy())
+
+    # 缓存命中后只查询缓存之后的新数据，并按时间范围切片
+    queries.clear()
+    window = backtest_data_source.load_backtest_data('SUIUSDT', '4h', '2024-02-01', '2024-03-01',
+                                                     cache_dir=cache_dir, chunk_size=300)
+    assert len(queries) == 1
+    expected = table[(table['open_time'] >= '2024-02-01') & (table['open_time'] <= '2024-03-01')]
+    assert np.array_equal(window['close'].to_numpy(), expected['close'].to_numpy())
+
+
+def test_rows_sharing_open_time_across_chunks_are_not_lost(monkeypatch):
+    table = _fake_table(n=10)
+    # 同一 open_time 的多条记录跨越分块边界
+    table.loc[2:6, 'open_time'] = table.loc[2, 'open_time']
+    queries = []
+    _install_fake_fetch(monkeypatch, table, queries)
+
+    df = backtest_data_source.fetch_backtest_frame('SUIUSDT', '4h', chunk_size=3)
+    assert list(df.columns) == backtest_data_source.BACKTEST_COLUMNS
+    assert np.array_equal(df['close'].to_numpy(), table['close'].to_numpy())
+    assert len(queries) == 4
+
+    queries.clear()
+    window = backtest_data_source.fetch_backtest_frame('SUIUSDT', '4h', table['open_time'].iloc[2],
+                                                       table['open_time'].iloc[7], chunk_size=3)
+    assert np.array_equal(window['close'].to_numpy(), table['close'].iloc[2:8].to_numpy())
+
+
+def test_calculate_daily_pnl_accepts_dataframe():
+    analyzer = importlib.import_module('src.main.data_visual.02_BacktestProfitAnalyzer')
+    table = _fake_table()
+    result = analyzer.calculate_daily_pnl(table, 1.0, '2024-02-01')
+    assert len(result) == (table['open_time'] >= '2024-02-01').sum()
+    assert 'asset' not in table.columns
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_chunked_fetch_and_incremental_cache(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_rows_sharing_open_time_across_chunks_are_not_lost(monkeypatch)
+    test_calculate_daily_pnl_accepts_dataframe()
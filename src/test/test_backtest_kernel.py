@@ -0,0 +1,69 @@
+import os
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.backtest_kernel import run_position_kernel, NUMBA_AVAILABLE
+
+RESOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'main', 'resource',
+                            'complete_dataset_SUIUSDT_1m_squeeze_luxalgo_advanced1_chk.csv')
+
+
+def _reference_pnl(close, label, initial_btc=1.0, price_threshold=0.02):
+    """原 calculate_daily_pnl 的逐行实现，作为对照"""
+    btc_qty, usdt_qty, buy_price = initial_btc, 0.0, None
+    initial_asset = initial_btc * close[0]
+    prev_asset, cumulative_return = initial_asset, 0.0
+    rows = []
+    for price, signal in zip(close, label):
+        if signal == 1:
+            if usdt_qty > 0:
+                if btc_qty == 0:
+                    btc_qty += usdt_qty / price
+                    usdt_qty = 0.0
+                    buy_price = price
+                elif buy_price is not None and (price - buy_price) / buy_price < -price_threshold:
+                    btc_qty += usdt_qty / price
+                    usdt_qty = 0.0
+                    buy_price = price
+        elif signal == 2:
+            if btc_qty > 0:
+                usdt_qty += btc_qty * price
+                btc_qty = 0.0
+                buy_price = None
+        current_asset = btc_qty * price + usdt_qty
+        daily_return = current_asset - prev_asset
+        cumulative_return += daily_return
+        rows.append((current_asset, daily_return, cumulative_return, cumulative_return / initial_asset))
+        prev_asset = current_asset
+    return np.array(rows)
+
+
+def test_kernel_matches_reference_loop():
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 5000)))
+    label = rng.choice([0, 1, 2], size=5000, p=[0.8, 0.1, 0.1]).astype(float)
+    expected = _reference_pnl(close.tolist(), label.tolist())
+
+    for use_numba in {False, NUMBA_AVAILABLE}:
+        result = run_position_kernel(close, label, 1.0, 0.02, use_numba=use_numba)
+        actual = np.column_stack([result['asset'], result['daily_return'],
+                                  result['cumulative_return'], result['cumulative_return_rate']])
+        assert np.array_equal(actual, expected)
+        assert result['trades'] > 0
+
+
+def test_calculate_daily_pnl_on_resource_csv():
+    analyzer = importlib.import_module('src.main.data_visual.02_BacktestProfitAnalyzer')
+    df = analyzer.calculate_daily_pnl(RESOURCE_CSV, 1.0)
+
+    raw = pd.read_csv(RESOURCE_CSV).sort_values('open_time')
+    expected = _reference_pnl(raw['close'].tolist(), raw['label'].tolist())
+    assert np.array_equal(df['asset'].to_numpy(), expected[:, 0])
+    assert np.array_equal(df['cumulative_return_rate'].to_numpy(), expected[:, 3])
+
+
+if __name__ == "__main__":
+    test_kernel_matches_reference_loop()
+    test_calculate_daily_pnl_on_resource_csv()
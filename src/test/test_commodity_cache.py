@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from src.main.utils.commodity_cache import CLOSED_MONTH_GRACE, CommodityCache, utc_month_windows
+from src.main.utils.commodity_fetcher import CommodityFetcher
+from src.test.test_commodity_fetcher import _FakeSession
+
+
+def test_utc_month_windows_are_full_months():
+    start = pd.Timestamp('2024-01-20').timestamp()
+    end = pd.Timestamp('2024-02-03').timestamp()
+    windows = utc_month_windows(start, end)
+    assert windows == [('2024-01', int(pd.Timestamp('2024-01-01').timestamp()),
+                        int(pd.Timestamp('2024-02-01').timestamp()) - 1),
+                       ('2024-02', int(pd.Timestamp('2024-02-01').timestamp()),
+                        int(pd.Timestamp('2024-03-01').timestamp()) - 1)]
+
+
+def test_closed_months_are_immutable_and_open_month_uses_ttl():
+    cache = CommodityCache(tempfile.mkdtemp(), ttl=60)
+    frame = pd.DataFrame({'oil_timestamp': pd.to_datetime(['2024-01-02']), 'oil_close': [70.0]})
+    cache.save('CL=F', '1d', '2024-01', frame)
+    pd.testing.assert_frame_equal(cache.load('CL=F', '1d', '2024-01'), frame)
+
+    assert cache.is_valid('CL=F', '1d', '2024-01', now='2024-03-01')
+    # 月份尚未结束：文件修改时间超过 ttl 后失效
+    cache.save('CL=F', '1d', '2024-02', frame)
+    path = cache.month_path('CL=F', '1d', '2024-02')
+    now = pd.Timestamp('2024-02-15')
+    os.utime(path, (now.timestamp() - 30, now.timestamp() - 30))
+    assert cache.is_valid('CL=F', '1d', '2024-02', now=now)
+    os.utime(path, (now.timestamp() - 120, now.timestamp() - 120))
+    assert not cache.is_valid('CL=F', '1d', '2024-02', now=now)
+
+    cache.invalidate('CL=F', '1d')
+    assert not cache.is_valid('CL=F', '1d', '2024-01', now='2024-03-01')
+
+
+def test_fetcher_makes_no_requests_for_cached_history():
+    session = _FakeSession(delay=0)
+    fetcher = CommodityFetcher({'min_request_interval': 0}, session=session,
+                               cache=CommodityCache(tempfile.mkdtemp()))
+    first = fetcher.fetch_range(['CL=F', 'GC=F'], '2023-01-10', '2023-03-20')
+    assert len(session.calls) == 6
+    assert first['oil']['oil_timestamp'].min() >= pd.Timestamp('2023-01-10')
+    assert first['oil']['oil_timestamp'].max() <= pd.Timestamp('2023-03-20')
+
+    second = fetcher.fetch_range(['CL=F', 'GC=F'], '2023-01-10', '2023-03-20')
+    assert len(session.calls) == 6
+    pd.testing.assert_frame_equal(first['oil'], second['oil'])
+    pd.testing.assert_frame_equal(first['gld'], second['gld'])
+
+
+def test_partial_month_is_refetched_after_month_closes():
+    cache = CommodityCache(tempfile.mkdtemp(), ttl=3600)
+    frame = pd.DataFrame({'oil_timestamp': pd.to_datetime(['2024-02-01']), 'oil_close': [70.0]})
+    cache.save('CL=F', '1d', '2024-02', frame)
+    path = cache.month_path('CL=F', '1d', '2024-02')
+    # 月中写入：当时有效，月份结束后不再视为完整数据
+    written = pd.Timestamp('2024-02-15').timestamp()
+    os.utime(path, (written, written))
+    assert cache.is_valid('CL=F', '1d', '2024-02', now=pd.Timestamp('2024-02-15 00:30'))
+    assert not cache.is_valid('CL=F', '1d', '2024-02', now='2024-04-01')
+
+    # 月份结束（含宽限期）后重新写入的文件永久有效
+    written = (pd.Timestamp('2024-03-01') + CLOSED_MONTH_GRACE).timestamp()
+    os.utime(path, (written, written))
+    assert cache.is_valid('CL=F', '1d', '2024-02', now='2024-04-01')
+    assert cache.is_valid('CL=F', '1d', '2024-02', now='2030-01-01')
+
+
+if __name__ == "__main__":
+    test_utc_month_windows_are_full_months()
+    test_closed_months_are_immutable_and_open_month_uses_ttl()
+    test_fetcher_makes_no_requests_for_cached_history()
+    test_partial_month_is_refetched_after_month_closes()
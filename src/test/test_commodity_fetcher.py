@@ -0,0 +1,142 @@
+import threading
+import time
+
+import tempfile
+import types
+
+import numpy as np
+import pandas as pd
+
+from src.main.utils.commodity_cache import CommodityCache
+from src.main.utils.commodity_fetcher import CommodityFetcher, month_windows, parse_chart
+from src.main.utils import rate_limiter
+from src.main.utils.rate_limiter import RateLimiter
+
+
+def _chart(timestamps, base):
+    n = len(timestamps)
+    close = [base + i for i in range(n)]
+    close[1] = None  # 接口偶尔返回 None，需要被过滤
+    return {'chart': {'result': [{
+        'timestamp': timestamps,
+        'indicators': {'quote': [{'open': close, 'high': close, 'low': close, 'close': close,
+                                  'volume': [100] * n}]},
+    }]}}
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class _FakeSession:
+    """按 symbol 返回固定数据，并记录并发请求数"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.calls.append((url.rsplit('/', 1)[-1], params['period1'], params['period2'], params['interval']))
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        start, end = params['period1'], params['period2']
+        timestamps = list(range(start, end + 1, 86400))
+        return _FakeResponse(_chart(timestamps, 70.0 if 'CL' in url else 2000.0))
+
+
+def test_parse_chart_is_prefixed_and_filtered():
+    frame = parse_chart(_chart([0, 86400, 172800, 259200], 70.0), 'oil', start_ts=0, end_ts=172800)
+    assert list(frame.columns) == ['oil_timestamp', 'oil_open', 'oil_high', 'oil_low', 'oil_close', 'oil_volume']
+    assert frame['oil_close'].tolist() == [70.0, 72.0]
+    assert parse_chart(None, 'gld').empty
+
+
+def test_month_windows_cover_range():
+    start = pd.Timestamp('2024-01-15').timestamp()
+    end = pd.Timestamp('2024-03-10').timestamp()
+    windows = month_windows(start, end)
+    assert [month for month, _, _ in windows] == ['2024-01', '2024-02', '2024-03']
+    assert windows[0][1] == start and windows[-1][2] == end
+    assert all(windows[i][2] + 1 == windows[i + 1][1] for i in range(len(windows) - 1))
+
+
+def test_fetch_range_runs_symbols_and_months_concurrently():
+    session = _FakeSession()
+    fetcher = CommodityFetcher({'min_request_interval': 0, 'max_workers': 4}, session=session)
+    frames = fetcher.fetch_range(['CL=F', 'GC=F'], '2024-01-01', '2024-03-31')
+    assert set(frames) == {'oil', 'gld'}
+    # 3 个月 × 2 个品种，每个请求只发一次
+    assert len(session.calls) == 6
+    assert session.max_active > 1
+    assert frames['gld']['gld_close'].min() >= 2000.0
+    assert frames['oil']['oil_timestamp'].is_monotonic_increasing
+    assert not frames['oil']['oil_timestamp'].duplicated().any()
+
+
+def test_windows_beyond_intraday_range_use_daily_bars():
+    fetcher = CommodityFetcher({'interval': '1h'}, session=_FakeSession())
+    now = pd.Timestamp('2026-10-19')
+    assert fetcher.window_interval(pd.Timestamp('2026-01-01').timestamp(), now) == '1h'
+    assert fetcher.window_interval(pd.Timestamp('2024-10-01').timestamp(), now) == '1d'
+    assert CommodityFetcher({'interval': '1d'}).window_interval(0, now) == '1d'
+
+    cache = CommodityCache(tempfile.mkdtemp())
+    session = _FakeSession(delay=0)
+    fetcher = CommodityFetcher({'min_request_interval': 0, 'interval': '1h'}, session=session, cache=cache)
+    recent = pd.Timestamp.now().normalize() - pd.Timedelta(days=40)
+    fetcher.fetch_range(['CL=F'], '2022-01-01', '2022-02-28')
+    fetcher.fetch_range(['CL=F'], recent, recent + pd.Timedelta(days=5))
+    assert [call[3] for call in session.calls] == ['1d', '1d', '1h']
+    assert cache.is_valid('CL=F', '1d', '2022-01') and not cache.is_valid('CL=F', '1h', '2022-01')
+
+    # 旧月份命中日线缓存，不再请求
+    session.calls.clear()
+    frames = fetcher.fetch_range(['CL=F'], '2022-01-01', '2022-02-28')
+    assert session.calls == [] and len(frames['oil']) == 30 + 27
+
+
+def test_rate_limiter_spaces_requests_across_threads(monkeypatch):
+    # 固定时钟：等待时间只由预占的令牌决定，不受线程调度抖动影响
+    clock = types.SimpleNamespace(monotonic=lambda: 100.0, sleep=lambda seconds: None)
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    limiter = RateLimiter.from_min_interval(0.05)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        wait = limiter.acquire()
+        with lock:
+            waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 6 个线程依次排队，相邻请求间隔 0.05 秒
+    np.testing.assert_allclose(sorted(waits), np.arange(6) * 0.05)
+
+
+if __name__ == "__main__":
+    test_parse_chart_is_prefixed_and_filtered()
+    test_month_windows_cover_range()
+    test_fetch_range_runs_symbols_and_months_concurrently()
+    test_windows_beyond_intraday_range_use_daily_bars()
+    import pytest
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_rate_limiter_spaces_requests_across_threads(monkeypatch)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.main.utils.commodity_indicators import calculate_rsi, compute_commodity_indicators
+from src.main.utils.synthetic_market_data import generate_ohlcv, generate_prefixed_ohlcv
+
+
+def _frame(prefixes=('oil', 'gld'), n=600):
+    df = generate_ohlcv(n, freq='1h', seed=1)
+    df['MA_20'] = df['close'].rolling(20, min_periods=1).mean()
+    for i, prefix in enumerate(prefixes):
+        block = generate_prefixed_ohlcv(df['open_time'], prefix, 70.0 + i, 0.01, seed=i)
+        for col in block.columns[1:]:
+            df[col] = block[col].to_numpy()
+    return df
+
+
+def test_parallel_blocks_match_serial_and_keep_rows():
+    df = _frame(prefixes=[f'c{i}' for i in range(6)])
+    df.loc[10:12, 'c0_close'] = np.nan
+    prefixes = [f'c{i}_' for i in range(6)]
+    parallel = compute_commodity_indicators(df, prefixes)
+    serial = compute_commodity_indicators(df, prefixes, max_workers=1)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+    assert len(parallel) == len(df)
+    assert list(parallel.columns[:len(df.columns)]) == list(df.columns)
+    numeric = parallel.select_dtypes('number')
+    assert not numeric.isna().any().any()
+    # 输入表不被修改
+    assert df['c0_close'].isna().sum() == 3
+
+
+def test_indicator_values():
+    df = _frame()
+    result = compute_commodity_indicators(df, ['oil_'])
+    close = df['oil_close']
+    np.testing.assert_allclose(result['oil_MA_20'], close.rolling(20, min_periods=1).mean())
+    np.testing.assert_allclose(result['oil_RSI6'], calculate_rsi(close, 6).fillna(50).clip(0, 100))
+    expected_corr = df['close'].rolling(20, min_periods=5).corr(close).fillna(0).clip(-1, 1)
+    np.testing.assert_allclose(result['oil_crypto_price_corr'], expected_corr)
+    assert set(result['oil_market_state']) <= {'强势', '弱势', '震荡'}
+    assert 'gld_RSI6' not in result
+
+
+def test_missing_commodity_columns_use_defaults():
+    df = generate_ohlcv(100, freq='1h', seed=2)
+    result = compute_commodity_indicators(df, ['gld_'])
+    assert (result['gld_close'] == 70.0).all()
+    assert (result['gld_volume'] == 100000.0).all()
+    assert (result['gld_Momentum_10'] == 0).all()
+
+
+if __name__ == "__main__":
+    test_parallel_blocks_match_serial_and_keep_rows()
+    test_indicator_values()
+    test_missing_commodity_columns_use_defaults()
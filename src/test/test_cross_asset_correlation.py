@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from src.main.utils.cross_asset_correlation import cross_asset_features, rolling_cross_stats, rolling_std
+
+
+def _series(n=3000, k=6, seed=0):
+    rng = np.random.default_rng(seed)
+    base = pd.Series(60000 + np.cumsum(rng.normal(0, 100, n)))
+    others = pd.DataFrame({f'asset{i}': 70 + np.cumsum(rng.normal(0, 0.5, n)) for i in range(k)})
+    others.iloc[100:130, 1] = np.nan
+    others.iloc[:50, 2] = np.nan
+    return base, others
+
+
+def test_matches_pandas_rolling_for_every_window():
+    base, others = _series()
+    stats = rolling_cross_stats(base, others, windows=(20, 60), min_periods=5)
+    for window in (20, 60):
+        for i, column in enumerate(others.columns):
+            expected = base.rolling(window, min_periods=5).corr(others[column]).to_numpy()
+            np.testing.assert_allclose(stats[window]['corr'][:, i], expected, atol=1e-8)
+
+            # beta / 波动率比只使用两者同时有效的样本
+            paired = base.where(others[column].notna())
+            covariance = paired.rolling(window, min_periods=5).cov(others[column])
+            other_var = others[column].rolling(window, min_periods=5).var()
+            np.testing.assert_allclose(stats[window]['beta'][:, i], (covariance / other_var).to_numpy(), rtol=1e-7)
+            vol_ratio = paired.rolling(window, min_periods=5).std() / others[column].rolling(window, min_periods=5).std()
+            np.testing.assert_allclose(stats[window]['vol_ratio'][:, i], vol_ratio.to_numpy(), rtol=1e-7)
+
+
+def test_rolling_std_and_constant_series():
+    base, others = _series(n=500, k=3)
+    np.testing.assert_allclose(rolling_std(others, 20, min_periods=1),
+                               others.rolling(20, min_periods=1).std().to_numpy(), atol=1e-9)
+    np.testing.assert_allclose(rolling_std(base, 30), base.rolling(30).std().to_numpy(), rtol=1e-9)
+
+    # 常数序列的相关性无定义，返回 NaN 而不是舍入误差放大出来的 ±inf
+    flat = np.full(len(base), 1800.0)
+    corr = rolling_cross_stats(base, flat, windows=(20,), min_periods=5)[20]['corr']
+    assert np.isnan(corr).all()
+
+
+def test_cross_asset_features_columns():
+    base, others = _series(n=400, k=3)
+    features = cross_asset_features(base, others, windows=(20, 60))
+    assert len(features) == len(base)
+    assert 'asset0_corr_20' in features and 'asset2_vol_ratio_60' in features
+    assert features.shape[1] == 3 * 2 * 3
+    returns_corr = base.pct_change().rolling(60).corr(others['asset0'].pct_change())
+    np.testing.assert_allclose(features['asset0_corr_60'], returns_corr, atol=1e-8)
+
+
+if __name__ == "__main__":
+    test_matches_pandas_rolling_for_every_window()
+    test_rolling_std_and_constant_series()
+    test_cross_asset_features_columns()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual import event_backtester
+from src.main.data_visual.event_backtester import run_event_backtest, run_event_backtest_arrays
+
+NO_COST = {'fee_rate': 0.0, 'slippage_model': 'none', 'sizing': 'full', 'atr_stop_mult': None}
+
+
+def _frame():
+    return pd.DataFrame({
+        'open_time': pd.date_range('2025-01-01', periods=6, freq='4h'),
+        'open': [10.0, 11.0, 12.0, 13.0, 14.0, 15.0],
+        'high': [10.5, 11.5, 12.5, 13.5, 14.5, 15.5],
+        'low': [9.5, 10.5, 11.5, 12.5, 13.5, 14.5],
+        'close': [10.2, 11.2, 12.2, 13.2, 14.2, 15.2],
+        'label': ['1', '0', '2', '0', '0', '0'],
+        'confidence': [0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+        'ATR': [1.0] * 6,
+    })
+
+
+def test_next_open_fill_without_costs():
+    curve, trades, summary = run_event_backtest(_frame(), {**NO_COST, 'initial_cash': 1000.0})
+    # 第0根收盘买入信号 -> 第1根开盘成交；第2根卖出信号 -> 第3根开盘成交
+    assert len(trades) == 1
+    assert trades.loc[0, 'entry_price'] == 11.0 and trades.loc[0, 'exit_price'] == 13.0
+    assert np.isclose(summary['final_equity'], 1000.0 * 13.0 / 11.0)
+    assert curve['position'].tolist()[:3] == [0.0, 1000.0 / 11.0, 1000.0 / 11.0]
+
+
+def test_fees_slippage_and_confidence_sizing():
+    config = {'initial_cash': 1000.0, 'fee_rate': 0.001, 'slippage_model': 'bps', 'slippage_bps': 10,
+              'atr_stop_mult': None}
+    _, trades, summary = run_event_backtest(_frame(), config)
+    entry = 11.0 * 1.001
+    exit_price = 13.0 * 0.999
+    qty = 500.0 / (entry * 1.001)
+    assert np.isclose(trades.loc[0, 'quantity'], qty)
+    assert np.isclose(summary['final_equity'], 500.0 + qty * exit_price * 0.999)
+
+
+def test_atr_stop_loss():
+    df = _frame()
+    df.loc[2, 'label'] = '0'
+    df.loc[2, 'low'] = 8.0
+    _, trades, _ = run_event_backtest(df, {**NO_COST, 'atr_stop_mult': 2.0})
+    assert trades.loc[0, 'exit_reason'] == 'ATR止损'
+    assert trades.loc[0, 'exit_price'] == 11.0 - 2.0
+
+
+def test_compiled_and_python_loops_agree():
+    rng = np.random.default_rng(5)
+    n = 3000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * 1.002
+    low = np.minimum(open_, close) * 0.998
+    label = rng.choice([0, 1, 2], n, p=[0.8, 0.1, 0.1]).astype(float)
+    confidence = rng.uniform(0.3, 1.0, n)
+    atr = np.full(n, 0.5)
+    args = (open_, high, low, close, label, confidence, atr)
+
+    compiled = run_event_backtest_arrays(*args, config={'fill_on': 'close'})
+    kernel = event_backtester._event_kernel
+    try:
+        event_backtester._event_kernel = getattr(kernel, 'py_func', kernel)
+        python = run_event_backtest_arrays(*args, config={'fill_on': 'close'})
+    finally:
+        event_backtester._event_kernel = kernel
+    assert np.allclose(compiled['equity'], python['equity'])
+    assert np.allclose(compiled['trades'], python['trades'])
+
+
+if __name__ == "__main__":
+    test_next_open_fill_without_costs()
+    test_fees_slippage_and_confidence_sizing()
+    test_atr_stop_loss()
+    test_compiled_and_python_loops_agree()
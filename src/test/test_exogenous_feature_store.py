@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.main.utils.commodity_indicators import compute_commodity_indicators
+from src.main.utils.exogenous_feature_store import (EXOGENOUS_FEATURE_COLUMNS, ExogenousFeatureStore,
+                                                    join_exogenous_features, split_exogenous_features)
+from src.test.test_commodity_indicators import _frame
+
+
+def _wide(n=300):
+    return compute_commodity_indicators(_frame(n=n), ['oil_', 'gld_'])
+
+
+def test_split_and_join_round_trip():
+    wide = _wide()
+    features = split_exogenous_features(wide, ['oil', 'gld'], 'SUIUSDT', '1h')
+    assert len(features) == 2 * len(wide)
+    assert set(EXOGENOUS_FEATURE_COLUMNS) <= set(features.columns)
+    # 宽表的指标块与特征表的列一一对应
+    assert not [col for col in wide.columns if col.startswith('oil_') and col[4:] not in EXOGENOUS_FEATURE_COLUMNS]
+
+    crypto = wide[[col for col in wide.columns if not col.startswith(('oil_', 'gld_'))]]
+    joined = join_exogenous_features(crypto, features)
+    pd.testing.assert_frame_equal(joined[wide.columns.tolist()], wide, check_dtype=False)
+
+
+def test_file_store_selects_assets_and_columns():
+    wide = _wide()
+    store = ExogenousFeatureStore('file', base_dir=tempfile.mkdtemp())
+    assert store.save(wide.iloc[:200], 'SUIUSDT', '1h') == 400
+    # 重叠时间段覆盖旧记录，不重复
+    assert store.save(wide.iloc[150:], 'SUIUSDT', '1h') == 2 * (len(wide) - 150)
+    assert os.path.exists(store.asset_path('SUIUSDT', '1h', 'gld'))
+
+    gold = store.load('SUIUSDT', '1h', assets=['gld'], columns=['close', 'RSI6'])
+    assert list(gold.columns) == ['asset', 'symbol', 'interval', 'open_time', 'close', 'RSI6']
+    assert len(gold) == len(wide) and (gold['asset'] == 'gld').all()
+
+    crypto = wide[['open_time', 'close']].iloc[100:]
+    joined = store.join(crypto, 'SUIUSDT', '1h', assets=['oil'], columns=['close', 'crypto_price_corr'])
+    assert list(joined.columns) == ['open_time', 'close', 'oil_close', 'oil_crypto_price_corr']
+    np.testing.assert_allclose(joined['oil_crypto_price_corr'], wide['oil_crypto_price_corr'].iloc[100:])
+    assert store.load('BTCUSDT', '1h').empty
+
+
+if __name__ == "__main__":
+    test_split_and_join_round_trip()
+    test_file_store_selects_assets_and_columns()
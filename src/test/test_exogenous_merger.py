@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from src.main.utils.exogenous_merger import merge_exogenous
+
+
+def _random_frame(rng, n, prefix, freq_minutes):
+    offsets = np.sort(rng.choice(n * 4, n, replace=False)) * freq_minutes
+    return pd.DataFrame({
+        'open_time': pd.Timestamp('2024-01-01') + pd.to_timedelta(offsets, unit='min'),
+        f'{prefix}_close': rng.normal(100, 5, n),
+    })
+
+
+def test_matches_pandas_merge_asof_in_every_direction():
+    rng = np.random.default_rng(0)
+    crypto = pd.DataFrame({'open_time': pd.date_range('2024-01-01', periods=2000, freq='15min'),
+                           'close': rng.normal(size=2000)})
+    oil = _random_frame(rng, 300, 'oil', 60)
+    for direction in ('backward', 'forward', 'nearest'):
+        merged = merge_exogenous(crypto, [{'name': 'oil', 'frame': oil.sample(frac=1, random_state=1),
+                                           'direction': direction, 'tolerance': '3h'}],
+                                 fill=False, verbose=False)
+        expected = pd.merge_asof(crypto, oil, on='open_time', direction=direction,
+                                 tolerance=pd.Timedelta('3h'))
+        np.testing.assert_allclose(merged['oil_close'].to_numpy(), expected['oil_close'].to_numpy(),
+                                   equal_nan=True)
+
+
+def test_merges_many_sources_in_one_pass_and_fills():
+    rng = np.random.default_rng(1)
+    crypto = pd.DataFrame({'open_time': pd.date_range('2024-01-01', periods=500, freq='1h'),
+                           'close': np.arange(500.0)})
+    sources = [{'name': f'macro{i}', 'frame': _random_frame(rng, 50, f'macro{i}', 240),
+                'tolerance': pd.Timedelta('1h')} for i in range(30)]
+    sources.append({'name': 'gld', 'frame': pd.DataFrame({'open_time': [], 'gld_close': []})})
+    merged = merge_exogenous(crypto, sources, verbose=False)
+
+    assert len(merged) == len(crypto)
+    assert merged['close'].tolist() == crypto['close'].tolist()
+    assert [f'macro{i}_close' for i in range(30)] == list(merged.columns[2:])
+    assert not merged.isna().any().any()
+
+
+def test_defaults_used_when_source_never_matches():
+    crypto = pd.DataFrame({'open_time': pd.date_range('2024-01-01', periods=5, freq='1h')})
+    oil = pd.DataFrame({'oil_timestamp': [pd.Timestamp('2020-01-01')], 'oil_close': [50.0]})
+    merged = merge_exogenous(crypto, [{'name': 'oil', 'frame': oil, 'time_column': 'oil_timestamp',
+                                       'tolerance': '1h', 'defaults': {'oil_close': 70.0}}], verbose=False)
+    assert merged['oil_close'].tolist() == [70.0] * 5
+
+
+if __name__ == "__main__":
+    test_matches_pandas_merge_asof_in_every_direction()
+    test_merges_many_sources_in_one_pass_and_fills()
+    test_defaults_used_when_source_never_matches()
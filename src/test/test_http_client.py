@@ -0,0 +1,112 @@
+import builtins
+import importlib
+import json
+import os
+import sys
+import tempfile
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.main.utils import http_client
+from src.main.utils.commodity_fetcher import CommodityFetcher
+
+
+def test_shared_session_is_reused_across_threads():
+    http_client.close_sessions()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sessions = list(executor.map(lambda _: http_client.get_session('unit-test', pool_size=8), range(32)))
+        assert len({id(session) for session in sessions}) == 1
+        adapter = sessions[0].get_adapter('https://example.com')
+        assert adapter._pool_maxsize == 8
+        assert sessions[0].proxies == http_client.DEFAULT_HTTP_CONFIG['proxies']
+    finally:
+        http_client.close_sessions()
+    assert http_client.get_session('unit-test') is not sessions[0]
+    http_client.close_sessions()
+
+
+def test_config_file_and_overrides():
+    temp_dir = tempfile.mkdtemp()
+    config_path = os.path.join(temp_dir, 'http_config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'http': {'proxies': {}, 'pool_maxsize': 16}}, f)
+    config = http_client.load_http_config(config_path=config_path)
+    assert config['proxies'] == {} and config['pool_maxsize'] == 16
+    assert config['headers'] == http_client.DEFAULT_HTTP_CONFIG['headers']
+    assert http_client.load_http_config(config_path=config_path, overrides={'pool_maxsize': 2})['pool_maxsize'] == 2
+
+    session = http_client.create_session(proxies={}, headers={'X-Test': '1'})
+    assert not session.proxies and session.headers['X-Test'] == '1'
+
+
+def test_fetcher_pool_matches_workers_and_drission_is_lazy():
+    fetcher = CommodityFetcher({'max_workers': 6, 'proxies': {}})
+    assert fetcher.session.get_adapter('https://query1.finance.yahoo.com')._pool_maxsize == 6
+    assert not fetcher.session.proxies
+    # 导入 http_client 不会加载 DrissionPage
+    assert 'DrissionPage' not in sys.modules
+
+
+def _fake_drission_page():
+    """最小化的 DrissionPage 替身：记录 SessionOptions 的设置和 SessionPage 的构造参数"""
+    module = types.ModuleType('DrissionPage')
+
+    class SessionOptions:
+        def __init__(self, read_file=True):
+            self.read_file = read_file
+            self.headers = None
+            self.proxies = None
+
+        def set_headers(self, headers):
+            self.headers = headers
+
+        def set_proxies(self, http=None, https=None):
+            self.proxies = {'http': http, 'https': https}
+
+    class SessionPage:
+        def __init__(self, session_or_options=None):
+            self.options = session_or_options
+
+    module.SessionOptions = SessionOptions
+    module.SessionPage = SessionPage
+    return module
+
+
+def test_drission_page_is_imported_only_on_get_session_page(monkeypatch):
+    fake = _fake_drission_page()
+    monkeypatch.setitem(sys.modules, 'DrissionPage', fake)
+    imports = []
+    real_import = builtins.__import__
+
+    def recording_import(name, *args, **kwargs):
+        if name.split('.')[0] == 'DrissionPage':
+            imports.append(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', recording_import)
+    module = importlib.reload(http_client)
+    module.create_session(proxies={})
+    CommodityFetcher({'proxies': {}})
+    assert imports == []
+
+    page = module.get_session_page(proxies={'http': 'http://proxy:1', 'https': 'http://proxy:2'})
+    assert imports == ['DrissionPage']
+    assert isinstance(page, fake.SessionPage) and page.options.read_file is False
+    assert page.options.headers == module.DEFAULT_HTTP_CONFIG['headers']
+    assert page.options.proxies == {'http': 'http://proxy:1', 'https': 'http://proxy:2'}
+
+    # 未安装时给出安装提示
+    monkeypatch.setitem(sys.modules, 'DrissionPage', None)
+    with pytest.raises(ImportError, match='pip install DrissionPage'):
+        module.get_session_page()
+
+
+if __name__ == "__main__":
+    test_shared_session_is_reused_across_threads()
+    test_config_file_and_overrides()
+    test_fetcher_pool_matches_workers_and_drission_is_lazy()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_drission_page_is_imported_only_on_get_session_page(monkeypatch)
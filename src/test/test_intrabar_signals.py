@@ -0,0 +1,96 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.main.trade.complete_trading_system_v2_4_4h import CompleteTradingSystem
+from src.main.trade.intrabar_signals import IntrabarSignalEvaluator
+from src.main.utils.sql_util import MySQLUtil
+from src.test.kline_fixtures import raw_klines
+
+
+def _with_provisional_close(raw, price):
+    last = raw.iloc[-1]
+    provisional = {'id': last['id'] + 1, 'symbol': last['symbol'], 'interval': last['interval'],
+                   'open_time': last['open_time'] + pd.Timedelta(hours=4), 'open': last['close'],
+                   'high': max(last['close'], price), 'low': min(last['close'], price), 'close': price,
+                   'volume': last['volume']}
+    return pd.concat([raw, pd.DataFrame([provisional])], ignore_index=True)
+
+
+def test_evaluate_matches_full_recompute():
+    system = CompleteTradingSystem()
+    raw = raw_klines(n=500)
+    committed = system.compute_feature_frame(raw.copy())
+    evaluator = IntrabarSignalEvaluator.from_indicator_frame(committed)
+    last_close = raw['close'].iloc[-1]
+
+    for price in last_close * np.array([0.9, 0.98, 1.0, 1.02, 1.1]):
+        result = evaluator.evaluate(price)
+        full = system.compute_feature_frame(_with_provisional_close(raw, price).copy()).iloc[-1]
+        assert np.isclose(result['CMACD_macd'], full['CMACD_macd'], rtol=1e-9, atol=1e-12)
+        assert np.isclose(result['CMACD_signal'], full['CMACD_signal'], rtol=1e-9, atol=1e-12)
+        assert np.isclose(result['RSI6'], full['RSI6'], atol=1e-6)
+
+        # 金叉/死叉判断与全量重算的结果一致
+        prev = committed.iloc[-1]
+        golden = full['CMACD_macd'] > full['CMACD_signal'] and prev['CMACD_macd'] <= prev['CMACD_signal']
+        dead = full['CMACD_macd'] < full['CMACD_signal'] and prev['CMACD_macd'] >= prev['CMACD_signal']
+        assert ('CMACD金叉(盘中)' in result['warnings']) == golden
+        assert ('CMACD死叉(盘中)' in result['warnings']) == dead
+
+
+def test_committed_state_is_not_mutated():
+    committed = CompleteTradingSystem().compute_feature_frame(raw_klines(n=300))
+    evaluator = IntrabarSignalEvaluator.from_indicator_frame(committed)
+    snapshot = copy.deepcopy(vars(evaluator))
+    first = evaluator.evaluate(committed['close'].iloc[-1] * 1.05)
+
+    rng = np.random.default_rng(0)
+    for price in committed['close'].iloc[-1] * (1 + rng.normal(0, 0.05, 1000)):
+        evaluator.evaluate(price)
+
+    after = vars(evaluator)
+    for key, value in snapshot.items():
+        if isinstance(value, np.ndarray):
+            assert np.array_equal(after[key], value)
+        else:
+            assert after[key] == value
+    assert evaluator.evaluate(committed['close'].iloc[-1] * 1.05) == first
+
+
+def test_intrabar_evaluation_is_throttled_per_symbol(monkeypatch):
+    cwd = os.getcwd()
+    try:
+        from src.main.websocket import binance_websocket
+    finally:
+        os.chdir(cwd)
+    monkeypatch.setattr(MySQLUtil, 'init_pool', classmethod(lambda cls, *args, **kwargs: None))
+    client = binance_websocket.SimpleBinanceWebSocket('SUIUSDT', '4h', intrabar=True, intrabar_throttle=1.0)
+    evaluator = IntrabarSignalEvaluator.from_indicator_frame(
+        CompleteTradingSystem().compute_feature_frame(raw_klines(n=300)))
+    client.intrabar_state = {'SUIUSDT': evaluator, 'ETHUSDT': evaluator}
+
+    clock = {'now': 100.0}
+    monkeypatch.setattr(binance_websocket.time, 'monotonic', lambda: clock['now'])
+    kline = {'open_time': pd.Timestamp('2025-04-01'), 'close': 1.5}
+
+    assert client._evaluate_intrabar('SUIUSDT', kline) is not None
+    clock['now'] = 100.5
+    assert client._evaluate_intrabar('SUIUSDT', kline) is None
+    # 节流按交易对独立计算
+    assert client._evaluate_intrabar('ETHUSDT', kline) is not None
+    clock['now'] = 101.0
+    assert client._evaluate_intrabar('SUIUSDT', kline) is not None
+    assert client.intrabar_signals['SUIUSDT']['open_time'] == kline['open_time']
+    assert client._evaluate_intrabar('BTCUSDT', kline) is None
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_evaluate_matches_full_recompute()
+    test_committed_state_is_not_mutated()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_intrabar_evaluation_is_throttled_per_symbol(monkeypatch)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from src.main.websocket.kline_ring_buffer import KlineRingBuffer
+
+
+def _kline(i):
+    return {
+        'timestamp': i * 60000,
+        'open': float(i), 'high': i + 1.0, 'low': i - 1.0, 'close': i + 0.5,
+        'volume': 10.0 * i, 'close_time': i * 60000 + 59999,
+        'quote_volume': 100.0 * i, 'trades': i,
+    }
+
+
+def test_ring_buffer_keeps_latest_window_in_order():
+    buffer = KlineRingBuffer(capacity=5)
+    for i in range(12):
+        buffer.append(_kline(i))
+
+    view = buffer.view()
+    assert len(buffer) == 5
+    assert buffer.total_count == 12
+    assert list(view['trades']) == [7, 8, 9, 10, 11]
+    assert buffer.latest()['close'][0] == 11.5
+    # 视图与内部存储共享内存（零拷贝）
+    assert view.base is not None
+
+
+def test_ring_buffer_spills_evicted_klines_to_disk():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spill_path = os.path.join(tmp_dir, 'spill.csv')
+        buffer = KlineRingBuffer(capacity=4, spill_path=spill_path)
+        for i in range(10):
+            buffer.append(_kline(i))
+        buffer.flush()
+
+        spilled = pd.read_csv(spill_path)
+        assert list(spilled['trades']) == list(range(10))
+        assert list(buffer.view()['trades']) == [6, 7, 8, 9]
+
+
+if __name__ == "__main__":
+    test_ring_buffer_keeps_latest_window_in_order()
+    test_ring_buffer_spills_evicted_klines_to_disk()
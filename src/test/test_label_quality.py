@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.label_quality import evaluate_label_quality, explode_rules
+
+
+def test_explode_rules_splits_reasons():
+    reasons = pd.Series(['买入信号: 底部动能确认 | 支撑确认', '无明显信号', None, '卖出信号: 结构破坏'])
+    rules = explode_rules(reasons)
+    assert rules.index.tolist() == [0, 0, 3]
+    assert rules['rule'].tolist() == ['买入: 底部动能确认', '买入: 支撑确认', '卖出: 结构破坏']
+    assert rules['rule_direction'].tolist() == [1.0, 1.0, -1.0]
+
+
+def test_label_quality_by_label_rule_and_risk_level():
+    frames = []
+    for symbol, step in (('SUIUSDT', 1.0), ('BTCUSDT', -1.0)):
+        close = 100 + step * np.arange(20, dtype=float)
+        frames.append(pd.DataFrame({
+            'symbol': symbol,
+            'open_time': pd.date_range('2025-01-01', periods=20, freq='4h'),
+            'close': close,
+            'label': ['1', '0'] * 10 if step > 0 else ['2', '0'] * 10,
+            'confidence': np.linspace(0.5, 1.0, 20),
+            'signal_reason': ['买入信号: 底部动能确认 | 支撑确认', '无明显信号'] * 10 if step > 0
+            else ['卖出信号: 结构破坏', '无明显信号'] * 10,
+            'risk_level': '低',
+        }))
+    # 打乱顺序，未来收益需要按币种、时间重新排序后计算
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+    report = evaluate_label_quality(df, horizons=(1, 3))
+    by_label = report['by_label'].set_index(['label', 'horizon'])
+    # 上涨币种上的买入信号、下跌币种上的卖出信号全部命中
+    assert by_label.loc[(1, 1), 'hit_rate'] == 1.0
+    assert by_label.loc[(2, 3), 'hit_rate'] == 1.0
+    assert by_label.loc[(1, 3), 'count'] == 9
+
+    by_rule = report['by_rule'].set_index(['rule', 'horizon'])
+    assert by_rule.loc[('买入: 支撑确认', 1), 'count'] == 10
+    assert by_rule.loc[('卖出: 结构破坏', 1), 'mean_signed_return'] > 0
+    assert report['by_risk_level']['risk_level'].unique().tolist() == ['低']
+
+
+if __name__ == "__main__":
+    test_explode_rules_splits_reasons()
+    test_label_quality_by_label_rule_and_risk_level()
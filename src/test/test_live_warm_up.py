@@ -0,0 +1,113 @@
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.main.trade.complete_trading_system_v2_4_4h import CompleteTradingSystem
+from src.main.utils.exogenous_feature_store import ExogenousFeatureStore
+from src.main.utils.sql_util import MySQLUtil
+from src.test.kline_fixtures import raw_klines
+
+
+def _install_fake_db(monkeypatch, klines):
+    """用内存表模拟 kline_data 的查询/插入，记录写入 complete_tech_indicators 的结果"""
+    db = {'kline_data': klines.copy(), 'complete_tech_indicators': []}
+
+    def fake_fetch_dataframe(table_name, conditions=None, columns='*', order_by=None, limit=None, offset=None):
+        df = db[table_name].sort_values('open_time', ascending=False).head(limit).reset_index(drop=True)
+        return df[columns] if isinstance(columns, list) else df
+
+    def fake_insert(table_name, data):
+        # process_complete_system 中 symbol / interval / id 以单元素集合传入
+        row = {k: next(iter(v)) if isinstance(v, set) else v for k, v in data.items()}
+        db[table_name] = pd.concat([db[table_name], pd.DataFrame([row])], ignore_index=True)
+        return row['id']
+
+    def fake_insert_dataframe(table_name, df):
+        db[table_name].append(df)
+        return len(df)
+
+    monkeypatch.setattr(MySQLUtil, 'fetch_dataframe', fake_fetch_dataframe)
+    monkeypatch.setattr(MySQLUtil, 'insert', fake_insert)
+    monkeypatch.setattr(MySQLUtil, 'insert_dataframe', fake_insert_dataframe)
+    return db
+
+
+def _new_bar(klines, hours):
+    last = klines.iloc[-1]
+    return {'open_time': last['open_time'] + pd.Timedelta(hours=hours), 'open': last['close'],
+            'high': last['close'] * 1.01, 'low': last['close'] * 0.99, 'close': last['close'] * 1.002,
+            'volume': 500.0}
+
+
+def test_warm_bar_matches_cold_recompute(monkeypatch):
+    klines = raw_klines(n=400)
+    bars = [_new_bar(klines, 4), _new_bar(klines, 8)]
+
+    warm_db = _install_fake_db(monkeypatch, klines)
+    warm = CompleteTradingSystem()
+    warm.warm_up('SUIUSDT', '4h')
+    assert len(warm.live_state[('SUIUSDT', '4h')]['indicators']) == 350
+    for bar in bars:
+        warm.process_complete_system('SUIUSDT', '4h', bar)
+
+    cold_db = _install_fake_db(monkeypatch, klines)
+    cold = CompleteTradingSystem()
+    for bar in bars:
+        cold.process_complete_system('SUIUSDT', '4h', bar)
+
+    drop = ['create_datetime']
+    for warm_row, cold_row in zip(warm_db['complete_tech_indicators'], cold_db['complete_tech_indicators']):
+        pd.testing.assert_frame_equal(warm_row.drop(columns=drop).reset_index(drop=True),
+                                      cold_row.drop(columns=drop).reset_index(drop=True), check_dtype=False)
+    assert warm_db['complete_tech_indicators'][-1]['open_time'].iloc[0] == bars[-1]['open_time']
+    state = warm.live_state[('SUIUSDT', '4h')]
+    assert state['indicators']['open_time'].iloc[-1] == bars[-1]['open_time']
+
+
+def test_new_id_follows_other_writers(monkeypatch):
+    klines = raw_klines(n=300)
+    db = _install_fake_db(monkeypatch, klines)
+    system = CompleteTradingSystem()
+    system.warm_up('SUIUSDT', '4h')
+
+    # 预热之后另一个写入方插入了一根K线
+    other = klines.iloc[[-1]].assign(id=301, open_time=klines['open_time'].iloc[-1] + pd.Timedelta(hours=4))
+    db['kline_data'] = pd.concat([db['kline_data'], other], ignore_index=True)
+    system.process_complete_system('SUIUSDT', '4h', _new_bar(other, 4))
+    assert db['kline_data']['id'].tolist()[-2:] == [301, 302]
+    assert np.unique(db['kline_data']['id']).size == len(db['kline_data'])
+
+
+def test_live_bar_joins_stored_exogenous_features(monkeypatch):
+    klines = raw_klines(n=300)
+    bar = _new_bar(klines, 4)
+    db = _install_fake_db(monkeypatch, klines)
+
+    # 离线流程写入的外生特征（最新一根K线还没有对应的特征）
+    base_dir = tempfile.mkdtemp()
+    wide = pd.DataFrame({'open_time': klines['open_time'], 'oil_close': np.linspace(70, 80, len(klines)),
+                         'oil_RSI6': 55.0, 'gld_close': 1900.0})
+    ExogenousFeatureStore.from_config({'base_dir': base_dir}).save(wide, 'SUIUSDT', '4h')
+
+    system = CompleteTradingSystem({'base_dir': base_dir, 'columns': ['close', 'RSI6']})
+    df = system.process_complete_system('SUIUSDT', '4h', bar)
+    expected = wide.set_index('open_time')['oil_close'].reindex(df['open_time'].iloc[:-1]).to_numpy()
+    np.testing.assert_allclose(df['oil_close'].iloc[:-1], expected)
+    assert (df['gld_close'].iloc[:-1] == 1900.0).all() and np.isnan(df['oil_close'].iloc[-1])
+    # 外生特征不写入 complete_tech_indicators
+    assert not [col for col in db['complete_tech_indicators'][-1].columns if col.startswith(('oil_', 'gld_'))]
+
+    disabled = CompleteTradingSystem({'enabled': False, 'base_dir': base_dir})
+    assert 'oil_close' not in disabled.process_complete_system('SUIUSDT', '4h', _new_bar(db['kline_data'], 4))
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_warm_bar_matches_cold_recompute(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_new_id_follows_other_writers(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_live_bar_joins_stored_exogenous_features(monkeypatch)
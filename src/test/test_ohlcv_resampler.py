@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from src.main.utils.ohlcv_resampler import BINANCE_INTERVALS, resample_ohlcv, session_mask
+from src.main.utils.synthetic_market_data import generate_prefixed_ohlcv
+
+PANDAS_RULES = {'1m': '1min', '15m': '15min', '1h': '1h', '4h': '4h', '8h': '8h', '12h': '12h', '1d': '1D'}
+
+
+def _oil(n=5000, freq='1min', seed=0):
+    open_time = pd.Series(pd.date_range('2024-01-01', periods=n, freq=freq))
+    df = generate_prefixed_ohlcv(open_time, 'oil', 75.0, 0.002, seed=seed)
+    return df.rename(columns={'open_time': 'oil_timestamp'})
+
+
+def _pandas_resample(df, rule, **kwargs):
+    expected = df.set_index('oil_timestamp').resample(rule, **kwargs).agg({
+        'oil_open': 'first', 'oil_high': 'max', 'oil_low': 'min', 'oil_close': 'last', 'oil_volume': 'sum'})
+    return expected.dropna().reset_index()
+
+
+def test_matches_pandas_resample():
+    df = _oil()
+    # 乱序 + 部分缺失
+    df = df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    df.loc[df.index[:40], 'oil_close'] = np.nan
+    for interval, rule in PANDAS_RULES.items():
+        result = resample_ohlcv(df, interval, prefix='oil_')
+        expected = _pandas_resample(df.dropna(subset=['oil_close']), rule, origin='epoch')
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_freq=False)
+
+
+def test_week_and_month_bins():
+    df = _oil(n=24 * 120, freq='1h')
+    weekly = resample_ohlcv(df, '1w', prefix='oil_')
+    assert (weekly['oil_timestamp'].dt.dayofweek == 0).all()
+    expected = _pandas_resample(df, 'W-MON', label='left', closed='left')
+    np.testing.assert_allclose(weekly['oil_high'], expected['oil_high'])
+
+    monthly = resample_ohlcv(df, '1M', prefix='oil_')
+    assert list(monthly['oil_timestamp'].dt.day.unique()) == [1]
+    expected = _pandas_resample(df, 'MS')
+    np.testing.assert_allclose(monthly['oil_volume'], expected['oil_volume'])
+    np.testing.assert_allclose(monthly['oil_close'], expected['oil_close'])
+    assert set(BINANCE_INTERVALS) >= {'1s', '3m', '2h', '6h', '12h', '1M'}
+
+
+def test_cme_session_skips_weekend_and_daily_break():
+    # 2024-01-05 是周五；美东冬令时 17:00 = 22:00 UTC
+    times = pd.Series(pd.to_datetime([
+        '2024-01-04 21:30',  # 周四 16:30 ET，交易中
+        '2024-01-04 22:30',  # 周四 17:30 ET，每日休市
+        '2024-01-05 21:59',  # 周五 16:59 ET，收盘前
+        '2024-01-06 12:00',  # 周六
+        '2024-01-07 22:30',  # 周日 17:30 ET，尚未开盘
+        '2024-01-07 23:00',  # 周日 18:00 ET，开盘
+    ]))
+    assert list(session_mask(times, 'cme_globex')) == [True, False, True, False, False, True]
+
+    df = _oil(n=24 * 14, freq='1h')
+    resampled = resample_ohlcv(df, '4h', prefix='oil_', session='cme_globex')
+    assert not (resampled['oil_timestamp'].dt.dayofweek == 5).any()
+    assert len(resampled) < len(resample_ohlcv(df, '4h', prefix='oil_'))
+
+
+if __name__ == "__main__":
+    test_matches_pandas_resample()
+    test_week_and_month_bins()
+    test_cme_session_skips_weekend_and_daily_break()
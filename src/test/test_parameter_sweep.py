@@ -0,0 +1,35 @@
+import os
+import tempfile
+import importlib
+
+import numpy as np
+
+from src.main.data_visual.parameter_sweep import run_parameter_sweep
+
+RESOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'main', 'resource',
+                            'complete_dataset_SUIUSDT_1m_squeeze_luxalgo_advanced1_chk.csv')
+
+
+def test_sweep_matches_single_backtest_and_resumes():
+    analyzer = importlib.import_module('src.main.data_visual.02_BacktestProfitAnalyzer')
+    output_path = os.path.join(tempfile.mkdtemp(), 'sweep.csv')
+
+    first = run_parameter_sweep(RESOURCE_CSV, [0.01, 0.02], ['', '2025-08-04 12:00:00'], [1.0],
+                                output_path=output_path, max_workers=2, batch_size=1)
+    assert len(first) == 4
+
+    # 再次运行时已完成的组合被跳过，只追加新组合
+    second = run_parameter_sweep(RESOURCE_CSV, [0.01, 0.02, 0.05], ['', '2025-08-04 12:00:00'], [1.0],
+                                 output_path=output_path, max_workers=2)
+    assert len(second) == 6
+    assert not second.duplicated(['price_threshold', 'start_date', 'initial_btc']).any()
+
+    row = second[(second['price_threshold'] == 0.02) & (second['start_date'] == '2025-08-04 12:00:00')].iloc[0]
+    expected = analyzer.calculate_daily_pnl(RESOURCE_CSV, 1.0, '2025-08-04 12:00:00', 0.02)
+    assert row['rows'] == len(expected)
+    assert np.isclose(row['final_return_rate'], expected['cumulative_return_rate'].iloc[-1])
+    assert row['max_drawdown'] <= 0
+
+
+if __name__ == "__main__":
+    test_sweep_matches_single_backtest_and_resumes()
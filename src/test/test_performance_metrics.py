@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.main.data_visual.performance_metrics import (compute_metrics, rolling_metrics, max_drawdown_duration,
+                                                      metrics_frame, sharpe_ratio, sortino_ratio)
+
+
+def _curves(k=4, n=400, seed=2):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (k, n)), axis=1)
+
+
+def test_drawdown_duration_and_basic_metrics():
+    equity = np.array([100.0, 110.0, 105.0, 100.0, 108.0, 112.0, 111.0])
+    metrics = compute_metrics(equity, periods_per_year=365)
+    assert max_drawdown_duration(equity) == 3
+    assert np.isclose(metrics['max_drawdown'], 100.0 / 110.0 - 1)
+    assert np.isclose(metrics['total_return'], 0.11)
+    assert np.isclose(metrics['win_rate'], 3 / 6)
+    assert metrics['calmar'] > 0
+
+
+def test_batch_metrics_match_single_curves():
+    curves = _curves()
+    batch = metrics_frame(curves, periods_per_year=2190)
+    for i, equity in enumerate(curves):
+        single = compute_metrics(equity, periods_per_year=2190)
+        for name, value in single.items():
+            assert np.isclose(batch.loc[i, name], value)
+
+
+def test_rolling_metrics_match_naive_windows():
+    curves = _curves(k=2, n=300)
+    window = 30
+    rolling = rolling_metrics(curves, window)
+    for t in (window, 150, 299):
+        segment = curves[:, t - window:t + 1]
+        returns = segment[:, 1:] / segment[:, :-1] - 1
+        assert np.allclose(rolling['rolling_sharpe'][:, t], sharpe_ratio(returns))
+        assert np.allclose(rolling['rolling_sortino'][:, t], sortino_ratio(returns))
+        assert np.allclose(rolling['rolling_return'][:, t], segment[:, -1] / segment[:, 0] - 1)
+        assert np.allclose(rolling['rolling_drawdown'][:, t], segment[:, -1] / segment.max(axis=1) - 1)
+    assert np.isnan(rolling['rolling_sharpe'][:, window - 1]).all()
+
+
+if __name__ == "__main__":
+    test_drawdown_duration_and_basic_metrics()
+    test_batch_metrics_match_single_curves()
+    test_rolling_metrics_match_naive_windows()
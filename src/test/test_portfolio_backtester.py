@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.portfolio_backtester import run_portfolio_backtest, align_symbol_frames
+
+
+def _frame(close, label, start='2025-01-01'):
+    return pd.DataFrame({
+        'open_time': pd.date_range(start, periods=len(close), freq='4h'),
+        'close': close,
+        'label': label,
+    })
+
+
+def test_single_symbol_matches_buy_and_hold_between_signals():
+    close = [10.0, 11.0, 12.0, 9.0, 10.0]
+    frames = {'SUIUSDT': _frame(close, ['1', '0', '2', '0', '0'])}
+    curve, weights, summary = run_portfolio_backtest(frames, {'fee_rate': 0.0, 'initial_capital': 100.0})
+    # 第0根收盘买入，第2根收盘卖出
+    assert np.isclose(summary['final_equity'], 100.0 * 12.0 / 10.0)
+    assert curve['exposure'].tolist() == [1.0, 1.0, 0.0, 0.0, 0.0]
+
+
+def test_capital_split_across_simultaneous_signals():
+    frames = {
+        'SUIUSDT': _frame([10.0, 11.0, 12.0, 13.0], [1, 0, 0, 0]),
+        # 晚一根K线上市，上市前不分配资金
+        'BTCUSDT': _frame([100.0, 90.0, 80.0], [1, 0, 0], start='2025-01-01 04:00'),
+    }
+    aligned = align_symbol_frames(frames)
+    assert np.isnan(aligned['close'][1, 0])
+
+    curve, weights, summary = run_portfolio_backtest(frames, {'fee_rate': 0.0, 'initial_capital': 1.0})
+    assert weights.iloc[0].tolist() == [1.0, 0.0]
+    assert weights.iloc[1].tolist() == [0.5, 0.5]
+    expected = (11 / 10) * (1 + 0.5 * (12 / 11 - 1) + 0.5 * (90 / 100 - 1)) \
+        * (1 + 0.5 * (13 / 12 - 1) + 0.5 * (80 / 90 - 1))
+    assert np.isclose(summary['final_equity'], expected)
+    assert (curve['exposure'] <= 1.0).all()
+    assert curve['drawdown'].max() <= 0
+
+
+def test_gaps_are_filled_only_inside_each_symbols_range():
+    eth = _frame([100.0, 110.0, 120.0, 130.0], [1, 0, 0, 0]).drop(index=2)
+    frames = {
+        'SUIUSDT': _frame([10.0, 10.0, 10.0, 10.0, 10.0, 10.0], [1, 0, 0, 0, 0, 0]),
+        # 第2根K线中途缺失，第3根之后不再有数据（下架）
+        'ETHUSDT': eth,
+    }
+    aligned = align_symbol_frames(frames)
+    np.testing.assert_array_equal(aligned['close'][1], [100.0, 110.0, 110.0, 130.0, np.nan, np.nan])
+
+    curve, weights, summary = run_portfolio_backtest(frames, {'fee_rate': 0.0, 'initial_capital': 1.0})
+    # 最后一条数据之后不再持有，资金全部回到仍有数据的币种
+    assert weights['ETHUSDT'].tolist() == [0.5, 0.5, 0.5, 0.5, 0.0, 0.0]
+    assert weights['SUIUSDT'].tolist() == [0.5, 0.5, 0.5, 0.5, 1.0, 1.0]
+    assert np.isclose(summary['final_equity'], (1 + 0.5 * 0.1) * (1 + 0.5 * (130 / 110 - 1)))
+
+
+if __name__ == "__main__":
+    test_single_symbol_matches_buy_and_hold_between_signals()
+    test_capital_split_across_simultaneous_signals()
+    test_gaps_are_filled_only_inside_each_symbols_range()
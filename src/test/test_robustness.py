@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from src.main.data_visual.robustness import (block_bootstrap_indices, bootstrap_returns, bootstrap_trades,
+                                             trade_returns_from_pnl)
+
+
+def test_block_indices_are_contiguous_blocks():
+    rng = np.random.default_rng(0)
+    indices = block_bootstrap_indices(rng, 50, 103, 10)
+    assert indices.shape == (50, 103)
+    steps = np.diff(indices, axis=1)
+    # 块内下标连续（循环回绕时为 1 - length），块边界可任意跳转
+    inside = np.ones(102, dtype=bool)
+    inside[9::10] = False
+    assert np.isin(steps[:, inside], [1, 1 - 103]).all()
+
+
+def test_bootstrap_is_reproducible_across_workers():
+    returns = np.random.default_rng(1).normal(0.001, 0.02, 500)
+    serial, intervals = bootstrap_returns(returns, n_resamples=1200, block_size=20, chunk_size=250,
+                                          seed=7, max_workers=1)
+    parallel, _ = bootstrap_returns(returns, n_resamples=1200, block_size=20, chunk_size=250,
+                                    seed=7, max_workers=2)
+    assert len(serial) == 1200
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert intervals.loc['total_return', 'p2.5'] < intervals.loc['total_return', 'observed'] \
+        < intervals.loc['total_return', 'p97.5']
+    assert (serial['max_drawdown'] <= 0).all()
+
+
+def test_trade_bootstrap_from_pnl_result():
+    df = pd.DataFrame({'asset': [10.0, 11.0, 12.0, 12.0, 12.0, 13.0, 9.0],
+                       'label': [0, 0, 2, 0, 1, 0, 2]})
+    trade_returns = trade_returns_from_pnl(df)
+    assert np.allclose(trade_returns, [0.2, 9.0 / 12.0 - 1])
+
+    samples, intervals = bootstrap_trades(trade_returns, n_resamples=300, seed=3, max_workers=1)
+    assert len(samples) == 300
+    assert intervals.loc['total_return', 'p50'] >= samples['total_return'].min()
+
+
+if __name__ == "__main__":
+    test_block_indices_are_contiguous_blocks()
+    test_bootstrap_is_reproducible_across_workers()
+    test_trade_bootstrap_from_pnl_result()
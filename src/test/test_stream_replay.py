@@ -0,0 +1,134 @@
+import asyncio
+import os
+import tempfile
+
+import numpy as np
+
+from src.main.websocket import stream_replay
+from src.main.websocket.stream_replay import FRAME_HEADER, PipelineLatencyStats, ReplayServer, StreamRecorder, read_frames
+
+# 录制时间（纳秒）：0s、1s、2.5s
+FRAMES = [(1_000_000_000_000, '{"e":"kline","n":1}'), (1_001_000_000_000, '{"e":"kline","n":2}'),
+          (1_002_500_000_000, '{"e":"kline","n":"价格"}')]
+
+
+def _record(frames=FRAMES):
+    path = os.path.join(tempfile.mkdtemp(), 'recorded', 'stream.bin')
+    recorder = StreamRecorder(path, flush_every=2)
+    for recv_ns, message in frames:
+        recorder.write(message, recv_ns=recv_ns)
+    recorder.write(b'{"bytes":true}', recv_ns=1_003_000_000_000)
+    recorder.close()
+    return path
+
+
+def test_recorder_round_trip_and_truncated_tail():
+    path = _record()
+    frames = list(read_frames(path))
+    assert frames == FRAMES + [(1_003_000_000_000, '{"bytes":true}')]
+
+    # 帧头为 <qI：小端 int64 接收时间 + uint32 长度
+    with open(path, 'rb') as f:
+        raw = f.read()
+    recv_ns, length = FRAME_HEADER.unpack(raw[:12])
+    assert FRAME_HEADER.size == 12
+    assert (recv_ns, length) == (FRAMES[0][0], len(FRAMES[0][1].encode('utf-8')))
+    assert raw[12:12 + length].decode('utf-8') == FRAMES[0][1]
+
+    # 进程被中断时末尾可能只写了半帧：只截断帧头或只截断负载都应被忽略
+    for cut in (5, 12 + 3):
+        truncated = path + f'.cut{cut}'
+        with open(truncated, 'wb') as f:
+            f.write(raw[:-len(b'{"bytes":true}') - 12 + cut])
+        assert list(read_frames(truncated)) == FRAMES
+
+    # 已存在的文件追加写入
+    recorder = StreamRecorder(path)
+    recorder.write('{"n":5}', recv_ns=1_004_000_000_000)
+    recorder.close()
+    assert len(list(read_frames(path))) == 5
+
+
+class _FakeWebSocket:
+    """记录发送时刻（虚拟时钟）的 WebSocket，客户端不发送任何请求"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+    async def send(self, message):
+        self.sent.append((self.clock['now'], message))
+
+
+def _replay(monkeypatch, speed, loop_count=1):
+    clock = {'now': 0.0}
+
+    async def fake_sleep(delay):
+        clock['now'] += delay
+
+    monkeypatch.setattr(stream_replay.time, 'perf_counter', lambda: clock['now'])
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    websocket = _FakeWebSocket(clock)
+    server = ReplayServer(_record(FRAMES), speed=speed, loop_count=loop_count)
+    asyncio.run(server._handle_client(websocket))
+    return websocket.sent
+
+
+def test_replay_timing(monkeypatch):
+    sent = _replay(monkeypatch, speed=1.0)
+    assert [message for _, message in sent][:3] == [message for _, message in FRAMES]
+    np.testing.assert_allclose([at for at, _ in sent], [0.0, 1.0, 2.5, 3.0])
+
+    sent = _replay(monkeypatch, speed=10)
+    np.testing.assert_allclose([at for at, _ in sent], [0.0, 0.1, 0.25, 0.3])
+
+    # 最大速度：不等待
+    for speed in (None, 0):
+        sent = _replay(monkeypatch, speed=speed)
+        assert [at for at, _ in sent] == [0.0] * 4
+
+    # 多次回放时每轮从头计时
+    sent = _replay(monkeypatch, speed=2, loop_count=2)
+    np.testing.assert_allclose([at for at, _ in sent], [0.0, 0.5, 1.25, 1.5, 1.5, 2.0, 2.75, 3.0])
+
+
+def test_latency_percentiles():
+    stats = PipelineLatencyStats(capacity=1000)
+    assert stats.summary()['message_latency'] == {}
+    for i in range(1, 101):
+        stats.record_message(10.0 + i, 10.0 + i + i / 1000)  # 1ms ~ 100ms
+    for i in range(1, 11):
+        stats.record_signal(0.0, i / 100)  # 10ms ~ 100ms
+
+    summary = stats.summary()
+    assert summary['messages'] == 100 and summary['signals'] == 10
+    latency = np.arange(1, 101) / 1000
+    expected = np.percentile(latency, [50, 95, 99]) * 1000
+    np.testing.assert_allclose([summary['message_latency'][key] for key in ('p50_ms', 'p95_ms', 'p99_ms')],
+                               expected)
+    assert np.isclose(summary['message_latency']['max_ms'], 100)
+    assert np.isclose(summary['signal_latency']['p50_ms'], 55)
+    # 第一条消息接收到最后一条处理完成共 99.1 秒
+    assert np.isclose(summary['throughput_msg_per_s'], 100 / 99.1)
+
+    # 超出容量后环形覆盖，只统计最近 capacity 条
+    small = PipelineLatencyStats(capacity=10)
+    for i in range(25):
+        small.record_message(0.0, 1.0 if i < 15 else 0.002)
+    assert small.summary()['messages'] == 25
+    assert np.isclose(small.summary()['message_latency']['max_ms'], 2)
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_recorder_round_trip_and_truncated_tail()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_replay_timing(monkeypatch)
+    test_latency_percentiles()
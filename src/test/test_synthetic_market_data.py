@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.main.utils.synthetic_market_data import generate_ohlcv, generate_prefixed_ohlcv
+
+
+def test_generator_is_reproducible_and_consistent():
+    df = generate_ohlcv(5000, start='2024-01-01', freq='4h', seed=11, include_regime=True)
+    again = generate_ohlcv(5000, start='2024-01-01', freq='4h', seed=11, include_regime=True)
+    pd.testing.assert_frame_equal(df, again)
+    assert not df.equals(generate_ohlcv(5000, start='2024-01-01', freq='4h', seed=12, include_regime=True))
+
+    assert list(df.columns) == ['open_time', 'open', 'high', 'low', 'close', 'volume', 'regime']
+    assert (df['open_time'].diff().dropna() == pd.Timedelta(hours=4)).all()
+    assert (df['low'] <= df[['open', 'close']].min(axis=1)).all()
+    assert (df['high'] >= df[['open', 'close']].max(axis=1)).all()
+    assert np.allclose(df['open'].to_numpy()[1:], df['close'].to_numpy()[:-1])
+    assert (df['volume'] > 0).all()
+    # 相邻状态段不同，且每个状态都出现过
+    assert df['regime'].nunique() == 3
+
+
+def test_volatility_clustering_and_volume_correlation():
+    df = generate_ohlcv(200_000, freq='1min', seed=3)
+    returns = np.log(df['close']).diff().dropna().to_numpy()
+    abs_returns = np.abs(returns)
+    # 收益率本身近似不相关，绝对收益率显著正自相关（波动率聚集）
+    assert abs(np.corrcoef(returns[1:], returns[:-1])[0, 1]) < 0.05
+    assert np.corrcoef(abs_returns[1:], abs_returns[:-1])[0, 1] > 0.1
+    assert np.corrcoef(abs_returns, df['volume'].to_numpy()[1:])[0, 1] > 0.2
+
+
+def test_generates_millions_of_bars():
+    df = generate_ohlcv(2_000_000, freq='1min', seed=5)
+    assert len(df) == 2_000_000
+    assert df['open_time'].iloc[-1] == pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=2_000_000 - 1)
+    assert np.isfinite(df[['open', 'high', 'low', 'close', 'volume']].to_numpy()).all()
+    assert (df['close'] > 0).all()
+
+
+def test_prefixed_commodity_data_is_bounded_with_stable_volatility():
+    # 一年的1分钟时间戳（原来逐行生成约52万个字典）
+    times = pd.date_range('2024-01-01', '2024-12-31', freq='1min')
+    oil = generate_prefixed_ohlcv(times, 'oil', start_price=65.0, volatility=0.008,
+                                  price_bounds=(40.0, 90.0), seed=1)
+    assert len(oil) == len(times)
+    assert list(oil.columns) == ['oil_timestamp', 'oil_open', 'oil_high', 'oil_low', 'oil_close', 'oil_volume']
+    assert oil['oil_close'].between(40.0, 90.0).all()
+    assert (oil['oil_high'] >= oil[['oil_open', 'oil_close']].max(axis=1)).all()
+    assert (oil['oil_low'] <= oil[['oil_open', 'oil_close']].min(axis=1)).all()
+    pd.testing.assert_frame_equal(oil, generate_prefixed_ohlcv(
+        times, 'oil', start_price=65.0, volatility=0.008, price_bounds=(40.0, 90.0), seed=1))
+
+    # 反射不改变每根K线的波动率：整段和最后一段的实际波动率都接近 volatility，价格不会贴在边界上
+    returns = np.abs(np.diff(np.log(oil['oil_close'].to_numpy())))
+    assert abs(np.sqrt(np.mean(returns ** 2)) / 0.008 - 1) < 0.05
+    assert abs(np.sqrt(np.mean(returns[-1000:] ** 2)) / 0.008 - 1) < 0.15
+    assert np.median(returns[-1000:]) > 0.003
+    assert returns.max() < 0.008 * 7
+
+
+if __name__ == "__main__":
+    test_generator_is_reproducible_and_consistent()
+    test_volatility_clustering_and_volume_correlation()
+    test_generates_millions_of_bars()
+    test_prefixed_commodity_data_is_bounded_with_stable_volatility()
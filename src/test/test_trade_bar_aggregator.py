@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from src.main.utils.ohlcv_resampler import BINANCE_INTERVALS
+from src.main.utils.sql_util import MySQLUtil
+from src.main.websocket.trade_bar_aggregator import MAX_LABEL_LENGTH, TradeBarAggregator, bar_label
+
+
+def _trades(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    trade_time = np.sort(rng.integers(0, 120000, n))
+    price = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    qty = rng.uniform(0.1, 2.0, n)
+    return price, qty, trade_time
+
+
+def _stream(aggregator, price, qty, trade_time):
+    bars = []
+    for p, q, t in zip(price, qty, trade_time):
+        bars += aggregator.on_agg_trade({'p': str(p), 'q': str(q), 'T': int(t)})
+    return bars
+
+
+def test_time_bars_match_batch_aggregation():
+    price, qty, trade_time = _trades()
+    streamed = _stream(TradeBarAggregator('btcusdt', 'time', '15s'), price, qty, trade_time)
+    batch = TradeBarAggregator('btcusdt', 'time', '15s').add_trades(price, qty, trade_time)
+
+    assert [bar['k'] for bar in streamed] == [bar['k'] for bar in batch]
+    # 最后一根K线尚未收盘，其余成交全部计入已完成K线
+    assert sum(bar['k']['n'] for bar in streamed) == np.sum(trade_time < (trade_time[-1] // 15000) * 15000)
+    assert all(bar['k']['t'] % 15000 == 0 for bar in streamed)
+
+
+def test_volume_bars_cover_threshold():
+    price, qty, trade_time = _trades()
+    streamed = _stream(TradeBarAggregator('btcusdt', 'volume', threshold=25), price, qty, trade_time)
+    aggregator = TradeBarAggregator('btcusdt', 'volume', threshold=25)
+    batch = aggregator.add_trades(price[:200], qty[:200], trade_time[:200])
+    batch += aggregator.add_trades(price[200:], qty[200:], trade_time[200:])
+
+    assert [bar['k'] for bar in streamed] == [bar['k'] for bar in batch]
+    assert len(streamed) == int(qty.sum() // 25)
+    assert all(float(bar['k']['v']) >= 25 - 2.0 for bar in streamed)
+
+
+def test_late_trade_does_not_reopen_a_flushed_bar():
+    aggregator = TradeBarAggregator('btcusdt', 'time', '1m')
+    assert aggregator.on_agg_trade({'p': '100', 'q': '1', 'T': 60100}) == []
+    flushed = aggregator.flush_until(120005)
+    assert [bar['k']['t'] for bar in flushed] == [60000]
+
+    # 属于已产出K线的迟到成交被丢弃，不会再次产出 60000 这根K线
+    assert aggregator.on_agg_trade({'p': '99', 'q': '2', 'T': 119990}) == []
+    assert aggregator.on_agg_trade({'p': '101', 'q': '1', 'T': 120010}) == []
+    assert aggregator.late_trades == 1
+    later = aggregator.flush_until(180000)
+    assert [bar['k']['t'] for bar in later] == [120000] and later[0]['k']['n'] == 1
+
+    # 批量加入时同样丢弃迟到成交
+    assert aggregator.add_trades([1.0, 2.0], [1.0, 1.0], [150000, 185000]) == []
+    assert aggregator.late_trades == 2
+    assert [bar['k']['t'] for bar in aggregator.flush_until(240000)] == [180000]
+
+
+def test_bar_labels_do_not_collide_with_binance_intervals():
+    assert bar_label('time', '15s') == 't15s'
+    assert bar_label('time', '1m') == 't1m'
+    assert bar_label('volume', threshold=1000) == 'vol1K'
+    assert bar_label('volume', threshold=1500) == 'vol1500'
+    assert bar_label('volume', threshold=2.5) == 'vol2p5'
+    assert bar_label('dollar', threshold=1e6) == 'usd1M'
+    assert bar_label('dollar', threshold=2.5e9) == 'usd2500M'
+    assert bar_label('dollar', threshold=250000.0) == 'usd250K'
+
+    labels = [TradeBarAggregator('btcusdt', 'time', interval).label for interval in ('1s', '1m', '4h', '1d')]
+    labels += [TradeBarAggregator('btcusdt', bar_type, threshold=threshold).label
+               for bar_type in ('volume', 'dollar') for threshold in (1, 0.001, 1e6, 1234567, 1e12)]
+    assert not set(labels) & set(BINANCE_INTERVALS)
+    assert all(len(label) <= MAX_LABEL_LENGTH and 'e' not in label[3:] for label in labels)
+
+    with pytest.raises(ValueError):
+        bar_label('dollar', threshold=123456789.5)
+
+
+def _client(monkeypatch, **kwargs):
+    cwd = os.getcwd()
+    try:
+        from src.main.websocket import binance_websocket
+    finally:
+        os.chdir(cwd)
+    monkeypatch.setattr(MySQLUtil, 'init_pool', classmethod(lambda cls, *args, **kwargs: None))
+    client = binance_websocket.SimpleBinanceWebSocket('BTCUSDT', trade_bars={'bar_type': 'time', 'interval': '15s'},
+                                                      **kwargs)
+    handled = []
+
+    def handle(message, received_at=None):
+        # K线处理必须在 _bar_lock 内执行（消息线程和定时收盘线程互斥）
+        assert client._bar_lock.locked()
+        handled.append(message)
+
+    client._handle_kline_data = handle
+    return client, handled
+
+
+def _agg_trade(price, qty, trade_time):
+    return json.dumps({'e': 'aggTrade', 's': 'BTCUSDT', 'p': str(price), 'q': str(qty), 'T': trade_time})
+
+
+def test_client_closes_time_bars_without_new_trades(monkeypatch):
+    client, handled = _client(monkeypatch)
+    assert client.interval == 't15s'
+    client.on_message(None, _agg_trade(100.0, 1.0, 1_000))
+    client.on_message(None, _agg_trade(101.0, 2.0, 14_000))
+    assert handled == []
+
+    # K线结束前不收盘，越过结束时间后即使没有新成交也收盘
+    assert client.flush_trade_bars(now_ms=14_999) == 0
+    assert client.flush_trade_bars(now_ms=15_000) == 1
+    assert handled[0]['k']['t'] == 0 and handled[0]['k']['i'] == 't15s' and handled[0]['k']['n'] == 2
+    assert client.flush_trade_bars(now_ms=60_000) == 0
+
+    # 收盘后的下一笔成交开始新的K线
+    client.on_message(None, _agg_trade(102.0, 1.0, 31_000))
+    assert client.flush_trade_bars(now_ms=45_000) == 1
+    assert handled[1]['k']['t'] == 30_000
+
+
+def test_signal_latency_is_only_recorded_for_message_closed_bars(monkeypatch):
+    client, _ = _client(monkeypatch)
+    del client._handle_kline_data
+    client.trading_system.process_complete_system = lambda symbol, interval, kline_info: None
+
+    # 定时收盘的K线没有触发它的消息，不统计消息到信号的延迟
+    client.on_message(None, _agg_trade(100.0, 1.0, 1_000))
+    assert client.flush_trade_bars(now_ms=15_000) == 1
+    assert client.latency_stats.summary()['signals'] == 0
+
+    # 新成交进入下一根K线时，按这条成交消息的接收时间统计
+    client.on_message(None, _agg_trade(101.0, 1.0, 16_000))
+    client.on_message(None, _agg_trade(102.0, 1.0, 31_000))
+    summary = client.latency_stats.summary()
+    assert summary['messages'] == 3 and summary['signals'] == 1
+    assert len(client.get_all_klines('BTCUSDT')) == 2
+
+
+def test_flush_timer_thread(monkeypatch):
+    client, handled = _client(monkeypatch, bar_flush_interval=0.01)
+    flushed = threading.Event()
+    calls = []
+
+    def fake_flush(now_ms=None):
+        calls.append(now_ms)
+        flushed.set()
+        return 0
+
+    client.flush_trade_bars = fake_flush
+    thread = client.start_bar_flush_timer()
+    assert flushed.wait(5)
+    client._bar_flush_stop.set()
+    thread.join(5)
+    assert not thread.is_alive() and calls
+
+    # 成交量K线按阈值收盘，不需要定时线程
+    client.trade_bar_aggregator = TradeBarAggregator('btcusdt', 'volume', threshold=10)
+    assert client.start_bar_flush_timer() is None
+
+
+if __name__ == "__main__":
+    test_time_bars_match_batch_aggregation()
+    test_volume_bars_cover_threshold()
+    test_late_trade_does_not_reopen_a_flushed_bar()
+    test_bar_labels_do_not_collide_with_binance_intervals()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_client_closes_time_bars_without_new_trades(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_signal_latency_is_only_recorded_for_message_closed_bars(monkeypatch)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_flush_timer_thread(monkeypatch)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.main.trade.complete_trading_system_v2_4_4h import CompleteTradingSystem
+from src.main.trade.label_rules import compute_rule_masks, score_labels
+from src.main.data_visual.walk_forward import walk_forward, split_walk_forward
+from src.test.kline_fixtures import raw_klines
+
+
+def test_vectorized_rules_match_generate_smc_labels():
+    trading_system = CompleteTradingSystem()
+    feature_df = trading_system.compute_feature_frame(raw_klines())
+    expected = trading_system.generate_smc_labels(feature_df.copy())
+
+    masks = compute_rule_masks(trading_system._create_normalized_label_data(feature_df))
+    label, confidence = score_labels(masks)
+    assert np.array_equal(label, expected['label'].astype(int).to_numpy())
+    assert np.allclose(confidence, expected['confidence'].to_numpy(dtype=float))
+
+
+def test_walk_forward_runs_out_of_sample():
+    assert split_walk_forward(10, 4, 2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+
+    trading_system = CompleteTradingSystem()
+    feature_df = trading_system.compute_feature_frame(raw_klines())
+    folds_df, oos_df, summary = walk_forward(trading_system, feature_df, train_size=300, test_size=100,
+                                             param_grid={'min_buy_score': [9, 15], 'min_sell_score': [6, 12]})
+    assert len(folds_df) == summary['folds'] == 3
+    assert len(oos_df) == 300
+    assert oos_df['open_time'].is_monotonic_increasing
+
+
+if __name__ == "__main__":
+    test_vectorized_rules_match_generate_smc_labels()
+    test_walk_forward_runs_out_of_sample()